@@ -1,7 +1,90 @@
 from fastapi import HTTPException, status
-from typing import Optional
+from typing import Optional, Tuple, Dict, Any
+from collections import OrderedDict
+import hashlib
+import time
 import jwt
 from app.config import settings
+from app.metrics import REVOKED_TOKENS_REJECTED
+from app.revocation import revocation_list
+
+class TokenCache:
+    """
+    Cache LRU borné des tokens JWT déjà vérifiés
+    
+    Clé : digest SHA-256 du token (le token brut n'est jamais stocké).
+    Valeur : (expiration, username, erreur, jti) - un token valide reste en
+    cache jusqu'à son exp, un token invalide quelques secondes seulement. Le
+    jti permet de vérifier la révocation même quand le token vient du cache.
+    """
+    
+    def __init__(self, max_size: int, max_ttl: int, negative_ttl: int):
+        self.max_size = max_size
+        self.max_ttl = max_ttl
+        self.negative_ttl = negative_ttl
+        self.entries: "OrderedDict[bytes, Tuple[float, Optional[str], Optional[str], Optional[str]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+    
+    def get(self, key: bytes) -> Optional[Tuple[Optional[str], Optional[str], Optional[str]]]:
+        """Retourner (username, erreur, jti) si le token est en cache et pas expiré"""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        expires_at, username, error, jti = entry
+        if expires_at <= time.time():
+            del self.entries[key]
+            self.misses += 1
+            return None
+        
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return username, error, jti
+    
+    def _store(self, key: bytes, entry: Tuple[float, Optional[str], Optional[str], Optional[str]]):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+    
+    def set_valid(self, key: bytes, username: str, exp: Optional[float], jti: Optional[str] = None):
+        """Mettre en cache un token valide jusqu'à son expiration"""
+        expires_at = exp if exp is not None else time.time() + self.max_ttl
+        self._store(key, (expires_at, username, None, jti))
+    
+    def set_invalid(self, key: bytes, error: str):
+        """Mettre en cache un token invalide pour une courte durée"""
+        self._store(key, (time.time() + self.negative_ttl, None, error, None))
+    
+    def clear(self):
+        self.entries.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "negative_ttl_s": self.negative_ttl
+        }
+
+# Instance globale du cache de tokens
+token_cache = TokenCache(
+    max_size=settings.JWT_CACHE_MAX_SIZE,
+    max_ttl=settings.JWT_CACHE_MAX_TTL,
+    negative_ttl=settings.JWT_CACHE_NEGATIVE_TTL
+)
 
 def verify_jwt_token(authorization: Optional[str]) -> str:
     """
@@ -14,7 +97,7 @@ def verify_jwt_token(authorization: Optional[str]) -> str:
         str: Username de l'utilisateur authentifié
         
     Raises:
-        HTTPException: Si le token est invalide ou manquant
+        HTTPException: Si le token est invalide, révoqué ou manquant
     """
     if not authorization:
         raise HTTPException(
@@ -32,6 +115,48 @@ def verify_jwt_token(authorization: Optional[str]) -> str:
     
     token = authorization.split(" ")[1]
     
+    # Token déjà vérifié récemment : pas de nouveau décodage HMAC
+    cache_key = token_cache.digest(token)
+    cached = token_cache.get(cache_key)
+    if cached is not None:
+        username, error, jti = cached
+        if error is not None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail=error,
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+    else:
+        try:
+            username, exp, jti = decode_jwt_token(token)
+        except HTTPException as e:
+            token_cache.set_invalid(cache_key, e.detail)
+            raise
+        token_cache.set_valid(cache_key, username, exp, jti)
+    
+    # Révocation vérifiée à chaque requête, cache ou non : liste locale, sans appel réseau
+    if revocation_list.is_revoked(jti):
+        REVOKED_TOKENS_REJECTED.inc()
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return username
+
+def decode_jwt_token(token: str) -> Tuple[str, Optional[float], Optional[str]]:
+    """
+    Décoder et valider un JWT token (vérification de signature complète)
+    
+    Args:
+        token: Le JWT token brut
+        
+    Returns:
+        Tuple[str, Optional[float], Optional[str]]: Username, date d'expiration (epoch) et jti du token
+        
+    Raises:
+        HTTPException: Si le token est invalide ou expiré
+    """
     try:
         # Décoder le JWT token
         payload = jwt.decode(
@@ -49,7 +174,7 @@ def verify_jwt_token(authorization: Optional[str]) -> str:
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        return username
+        return username, payload.get("exp"), payload.get("jti")
         
     except jwt.ExpiredSignatureError:
         raise HTTPException(
@@ -63,29 +188,3 @@ def verify_jwt_token(authorization: Optional[str]) -> str:
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-
-def is_public_endpoint(path: str) -> bool:
-    """
-    Vérifier si l'endpoint est public (pas d'auth requise)
-    
-    Args:
-        path: Le chemin de l'endpoint
-        
-    Returns:
-        bool: True si l'endpoint est public
-    """
-    public_endpoints = [
-        "/auth/login",
-        "/auth/register", 
-        "/auth/health",
-        "/health",
-        "/ready",
-        "/services/status"
-    ]
-    
-    # Vérifier les patterns exacts
-    for public_path in public_endpoints:
-        if path == public_path or path.startswith(public_path + "/"):
-            return True
-    
-    return False
\ No newline at end of file
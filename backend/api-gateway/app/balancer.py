@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import random
+import socket
+import time
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlsplit
+from app.config import settings
+from app.metrics import ENDPOINT_EJECTIONS
+
+logger = logging.getLogger(__name__)
+
+# Multiplicateur maximal de la durée d'éjection (éjections répétées d'une même instance)
+MAX_EJECTION_MULTIPLIER = 10
+
+class Endpoint:
+    """Instance (pod) d'un microservice et sa charge vue par la gateway"""
+
+    __slots__ = ("url", "in_flight", "requests", "errors", "consecutive_failures", "ejected_until", "ejections")
+
+    def __init__(self, url: str):
+        self.url = url
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.ejections = 0
+
+class ServiceBalancer:
+    """
+    Répartition des requêtes d'un microservice entre ses instances
+
+    - instances : liste statique (SERVICE_ENDPOINTS), adresses d'un service
+      headless résolues toutes les DNS_REFRESH_INTERVAL secondes (SERVICE_DNS),
+      sinon l'URL unique de SERVICE_ROUTES (répartition laissée à kube-proxy)
+    - choix : "p2c" (deux instances tirées au hasard, la moins chargée gagne)
+      ou "least_outstanding" (la moins chargée de toutes)
+    - éjection passive : après EJECTION_CONSECUTIVE_FAILURES échecs consécutifs
+      (erreur réseau ou 5xx), instance écartée EJECTION_BASE_DURATION_S fois son
+      nombre d'éjections, sans dépasser EJECTION_MAX_PERCENT des instances
+    """
+
+    def __init__(self, service_name: str, urls: List[str]):
+        self.service_name = service_name
+        self.endpoints: Dict[str, Endpoint] = {}
+        self.set_urls(urls)
+
+    def set_urls(self, urls: List[str]):
+        """Remplacer les instances en conservant l'état (charge, éjection) de celles déjà connues"""
+        if not urls:
+            # Résolution vide ou en échec : garder les dernières instances connues
+            return
+        self.endpoints = {url: self.endpoints.get(url) or Endpoint(url) for url in urls}
+
+    def pick(self) -> Endpoint:
+        """Choisir l'instance d'une requête (à rendre avec release())"""
+        now = time.monotonic()
+        endpoints = list(self.endpoints.values())
+        # Toutes éjectées : mieux vaut tenter une instance que rejeter la requête
+        candidates = [endpoint for endpoint in endpoints if endpoint.ejected_until <= now] or endpoints
+
+        if len(candidates) == 1:
+            chosen = candidates[0]
+        elif settings.LB_STRATEGY == "least_outstanding":
+            lowest = min(endpoint.in_flight for endpoint in candidates)
+            chosen = random.choice([endpoint for endpoint in candidates if endpoint.in_flight == lowest])
+        else:
+            first, second = random.sample(candidates, 2)
+            chosen = first if first.in_flight <= second.in_flight else second
+
+        chosen.in_flight += 1
+        chosen.requests += 1
+        return chosen
+
+    def release(self, endpoint: Endpoint, failed: Optional[bool] = False):
+        """
+        Rendre l'instance après la requête
+
+        failed : erreur réseau ou 5xx (True), succès (False), ou None si la
+        requête a été abandonnée côté gateway (ni succès ni échec de l'instance)
+        """
+        endpoint.in_flight -= 1
+        if failed is None:
+            return
+        if not failed:
+            endpoint.consecutive_failures = 0
+            if endpoint.ejections and time.monotonic() - endpoint.ejected_until > settings.EJECTION_BASE_DURATION_S:
+                # Instance saine depuis sa dernière éjection : pénalité oubliée
+                endpoint.ejections = 0
+            return
+
+        endpoint.errors += 1
+        endpoint.consecutive_failures += 1
+        if endpoint.consecutive_failures >= settings.EJECTION_CONSECUTIVE_FAILURES:
+            self._eject(endpoint)
+
+    def _eject(self, endpoint: Endpoint):
+        now = time.monotonic()
+        if endpoint.ejected_until > now or endpoint.url not in self.endpoints:
+            return
+        ejected = sum(1 for other in self.endpoints.values() if other.ejected_until > now)
+        if (ejected + 1) * 100 > len(self.endpoints) * settings.EJECTION_MAX_PERCENT:
+            # Trop d'instances déjà écartées (ou instance unique) : le circuit breaker prend le relais
+            return
+
+        endpoint.ejections += 1
+        endpoint.consecutive_failures = 0
+        duration = settings.EJECTION_BASE_DURATION_S * min(endpoint.ejections, MAX_EJECTION_MULTIPLIER)
+        endpoint.ejected_until = now + duration
+        ENDPOINT_EJECTIONS.labels(self.service_name).inc()
+        logger.warning(f"Endpoint {endpoint.url} of {self.service_name} ejected for {duration:.0f}s")
+
+    async def resolve(self, target: str):
+        """Résoudre le nom d'un service headless : une instance par adresse IP"""
+        parts = urlsplit(target)
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        infos = await asyncio.get_running_loop().getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)
+        addresses = sorted({info[4][0] for info in infos})
+        self.set_urls([
+            f"{parts.scheme}://[{address}]:{port}" if ":" in address else f"{parts.scheme}://{address}:{port}"
+            for address in addresses
+        ])
+
+    def get_state(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "strategy": settings.LB_STRATEGY if len(self.endpoints) > 1 else "single",
+            "endpoints": [
+                {
+                    "url": endpoint.url,
+                    "in_flight": endpoint.in_flight,
+                    "requests": endpoint.requests,
+                    "errors": endpoint.errors,
+                    "ejected": endpoint.ejected_until > now,
+                    "ejected_for_s": round(max(0.0, endpoint.ejected_until - now), 1),
+                    "ejections": endpoint.ejections
+                }
+                for endpoint in self.endpoints.values()
+            ]
+        }
+
+class BalancerRegistry:
+    """Un répartiteur par entrée de SERVICE_ROUTES, résolution DNS périodique des services headless"""
+
+    def __init__(self):
+        self.balancers: Dict[str, ServiceBalancer] = {
+            service_name: ServiceBalancer(service_name, settings.SERVICE_ENDPOINTS.get(service_name) or [service_url])
+            for service_name, service_url in settings.SERVICE_ROUTES.items()
+        }
+        self._task: Optional[asyncio.Task] = None
+
+    def get(self, service_name: str) -> ServiceBalancer:
+        return self.balancers[service_name]
+
+    async def start(self):
+        """Première résolution DNS puis rafraîchissement en arrière-plan"""
+        if settings.SERVICE_DNS and self._task is None:
+            await self.refresh()
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def refresh(self):
+        """Résoudre en parallèle les noms headless de SERVICE_DNS"""
+        targets = [
+            (self.balancers[service_name], target)
+            for service_name, target in settings.SERVICE_DNS.items()
+            if service_name in self.balancers
+        ]
+        results = await asyncio.gather(
+            *(balancer.resolve(target) for balancer, target in targets),
+            return_exceptions=True
+        )
+        for (balancer, target), result in zip(targets, results):
+            if isinstance(result, Exception):
+                logger.warning(f"DNS resolution failed for {balancer.service_name} ({target}): {result}")
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(settings.DNS_REFRESH_INTERVAL)
+            await self.refresh()
+
+    def get_states(self) -> Dict[str, Dict[str, Any]]:
+        return {name: balancer.get_state() for name, balancer in self.balancers.items()}
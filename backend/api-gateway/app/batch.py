@@ -0,0 +1,123 @@
+import asyncio
+import json
+from contextlib import nullcontext
+from urllib.parse import parse_qsl
+from typing import Any, Optional
+from fastapi import APIRouter, Request, HTTPException
+from app.client import service_client, UpstreamResponse
+from app.auth import verify_jwt_token
+from app.config import settings
+from app.cache import response_cache
+from app.ratelimit import rate_limiter
+from app.router import route_table
+from app.schemas import BatchRequest, BatchResponse, BatchSubRequest, BatchSubResponse
+
+# Router de l'endpoint batch (inclus avant le proxy générique)
+batch_router = APIRouter()
+
+@batch_router.post("/batch", response_model=BatchResponse)
+async def batch(batch_request: BatchRequest, request: Request):
+    """
+    Exécuter plusieurs appels API en un seul aller-retour
+
+    Le JWT est vérifié une seule fois pour tout le batch ; les sous-requêtes
+    passent en parallèle par le ServiceClient (cache, coalescing, limites de
+    l'utilisateur compris) et chaque résultat porte son propre status.
+
+    Raises:
+        HTTPException: 401 sans JWT valide, 413 si le batch dépasse BATCH_MAX_REQUESTS
+    """
+    username = verify_jwt_token(request.headers.get("authorization"))
+
+    if len(batch_request.requests) > settings.BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large ({settings.BATCH_MAX_REQUESTS} requests max)"
+        )
+
+    semaphore = asyncio.Semaphore(settings.BATCH_MAX_CONCURRENCY)
+
+    async def run(sub_request: BatchSubRequest) -> BatchSubResponse:
+        async with semaphore:
+            try:
+                upstream = await execute_sub_request(sub_request, username)
+            except HTTPException as e:
+                return BatchSubResponse(id=sub_request.id, status=e.status_code, body={"detail": e.detail})
+        return BatchSubResponse(id=sub_request.id, status=upstream.status_code, body=decode_body(upstream))
+
+    responses = await asyncio.gather(*[run(sub_request) for sub_request in batch_request.requests])
+    return BatchResponse(responses=responses)
+
+async def execute_sub_request(sub_request: BatchSubRequest, username: str) -> UpstreamResponse:
+    """Exécuter une sous-requête avec la politique de sa route"""
+    method = sub_request.method.upper()
+    if method not in ["GET", "POST", "PUT", "DELETE"]:
+        raise HTTPException(status_code=405, detail=f"Method {method} not supported")
+
+    path, _, query = sub_request.path.partition("?")
+    if path.startswith(settings.API_V1_PREFIX + "/"):
+        path = path[len(settings.API_V1_PREFIX):]
+
+    resolved = route_table.resolve(path)
+    if resolved is None:
+        raise HTTPException(status_code=404, detail="Service not found")
+    policy, service_path = resolved
+    if policy.streaming:
+        raise HTTPException(status_code=400, detail="Streaming routes cannot be batched")
+
+    content = None
+    headers = {"accept": "application/json", "X-User": username}
+    if sub_request.body is not None:
+        content = json.dumps(sub_request.body).encode()
+        if len(content) > policy.max_body_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Request body too large ({policy.max_body_bytes} bytes max)"
+            )
+        headers["content-type"] = "application/json"
+
+    # Les sous-requêtes consomment les mêmes budgets que des appels individuels
+    limit = (
+        rate_limiter.limit(username, policy.service, method, path)
+        if settings.RATE_LIMIT_ENABLED else nullcontext()
+    )
+    async with limit:
+        if method == "GET" and policy.cache_ttl > 0 and settings.CACHE_ENABLED:
+            cache_key = response_cache.make_key(
+                username, policy.service, service_path, parse_qsl(query, keep_blank_values=True)
+            )
+            cached = response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            # Relevée avant l'appel : une écriture concurrente rend la réponse non stockable
+            generation = response_cache.generation(username, policy.service)
+
+        upstream = await service_client.fetch(
+            service_name=policy.service,
+            path=service_path,
+            method=method,
+            headers=headers,
+            query=query,
+            timeout=policy.timeout,
+            content=content
+        )
+
+        if method == "GET" and policy.cache_ttl > 0 and settings.CACHE_ENABLED:
+            response_cache.set(cache_key, upstream, policy.cache_ttl, generation)
+        elif method != "GET" and settings.CACHE_ENABLED:
+            # Écriture réussie : les GET en cache de cet utilisateur sur ce service sont périmés
+            response_cache.write_completed(username, policy.service, upstream.status_code)
+
+        return upstream
+
+def decode_body(upstream: UpstreamResponse) -> Optional[Any]:
+    """Body JSON décodé si possible, texte brut sinon"""
+    if not upstream.body:
+        return None
+    content_type = upstream.header("content-type") or ""
+    if "json" in content_type:
+        try:
+            return json.loads(upstream.body)
+        except ValueError:
+            pass
+    return upstream.body.decode("utf-8", errors="replace")
@@ -0,0 +1,154 @@
+import time
+import logging
+from collections import deque
+from typing import Dict, Any, Deque, Tuple
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """
+    Circuit breaker d'un microservice
+
+    - closed    : les requêtes passent, les résultats alimentent une fenêtre glissante
+    - open      : taux d'erreur ou d'appels lents trop élevé, rejet immédiat (503)
+    - half_open : après BREAKER_OPEN_DURATION_S, quelques requêtes d'essai passent ;
+                  toutes réussies -> closed, un échec -> open
+    """
+
+    def __init__(self, service_name: str):
+        self.service_name = service_name
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.calls: Deque[Tuple[float, bool, bool]] = deque()  # (timestamp, échec, lent)
+        # Compteurs de la fenêtre tenus à jour à l'ajout et à l'expiration : taux en O(1)
+        self.window_failures = 0
+        self.window_slow = 0
+        self.half_open_in_flight = 0
+        self.half_open_successes = 0
+        self.rejected = 0
+        self.times_opened = 0
+
+    def _append(self, now: float, failed: bool, is_slow: bool):
+        self.calls.append((now, failed, is_slow))
+        self.window_failures += failed
+        self.window_slow += is_slow
+
+    def _trim(self, now: float):
+        while self.calls and self.calls[0][0] < now - settings.BREAKER_WINDOW_S:
+            _, failed, is_slow = self.calls.popleft()
+            self.window_failures -= failed
+            self.window_slow -= is_slow
+
+    def _rates(self) -> Tuple[float, float]:
+        total = len(self.calls)
+        if not total:
+            return 0.0, 0.0
+        return self.window_failures / total, self.window_slow / total
+
+    def _open(self, now: float):
+        self.state = OPEN
+        self.opened_at = now
+        self.times_opened += 1
+        self.half_open_in_flight = 0
+        self.half_open_successes = 0
+        logger.warning(f"Circuit opened for service {self.service_name}")
+
+    def _close(self):
+        self.state = CLOSED
+        self.calls.clear()
+        self.window_failures = 0
+        self.window_slow = 0
+        self.half_open_in_flight = 0
+        self.half_open_successes = 0
+        logger.info(f"Circuit closed for service {self.service_name}")
+
+    def allow_request(self) -> bool:
+        """Décider si une requête peut être envoyée au service"""
+        now = time.monotonic()
+
+        if self.state == OPEN:
+            if now - self.opened_at < settings.BREAKER_OPEN_DURATION_S:
+                self.rejected += 1
+                return False
+            self.state = HALF_OPEN
+
+        if self.state == HALF_OPEN:
+            if self.half_open_in_flight >= settings.BREAKER_HALF_OPEN_CALLS:
+                self.rejected += 1
+                return False
+            self.half_open_in_flight += 1
+
+        return True
+
+    def release(self):
+        """Rendre la place d'une requête autorisée qui n'a pas abouti (annulée) : ni succès ni échec"""
+        if self.state == HALF_OPEN:
+            self.half_open_in_flight = max(0, self.half_open_in_flight - 1)
+
+    def record(self, failed: bool, latency_ms: float):
+        """Enregistrer le résultat d'une requête autorisée"""
+        now = time.monotonic()
+        is_slow = latency_ms >= settings.BREAKER_SLOW_CALL_MS
+
+        if self.state == HALF_OPEN:
+            self.half_open_in_flight = max(0, self.half_open_in_flight - 1)
+            if failed or is_slow:
+                self._open(now)
+            else:
+                self.half_open_successes += 1
+                if self.half_open_successes >= settings.BREAKER_HALF_OPEN_CALLS:
+                    self._close()
+            return
+
+        if self.state == OPEN:
+            # Requête partie avant l'ouverture du circuit
+            return
+
+        self._append(now, failed, is_slow)
+        self._trim(now)
+
+        if len(self.calls) >= settings.BREAKER_MIN_CALLS:
+            error_rate, slow_rate = self._rates()
+            if error_rate >= settings.BREAKER_ERROR_RATE or slow_rate >= settings.BREAKER_SLOW_CALL_RATE:
+                self._open(now)
+
+    def retry_after(self) -> int:
+        """Secondes restantes avant la prochaine tentative (header Retry-After)"""
+        remaining = settings.BREAKER_OPEN_DURATION_S - (time.monotonic() - self.opened_at)
+        return max(1, int(remaining + 0.999))
+
+    def get_state(self) -> Dict[str, Any]:
+        self._trim(time.monotonic())
+        error_rate, slow_rate = self._rates()
+        return {
+            "state": self.state,
+            "window_calls": len(self.calls),
+            "error_rate": round(error_rate, 3),
+            "slow_call_rate": round(slow_rate, 3),
+            "rejected": self.rejected,
+            "times_opened": self.times_opened
+        }
+
+class BreakerRegistry:
+    """Un circuit breaker par entrée de SERVICE_ROUTES"""
+
+    def __init__(self):
+        self.breakers: Dict[str, CircuitBreaker] = {
+            service_name: CircuitBreaker(service_name)
+            for service_name in settings.SERVICE_ROUTES.keys()
+        }
+
+    def get(self, service_name: str) -> CircuitBreaker:
+        breaker = self.breakers.get(service_name)
+        if breaker is None:
+            breaker = CircuitBreaker(service_name)
+            self.breakers[service_name] = breaker
+        return breaker
+
+    def get_states(self) -> Dict[str, Dict[str, Any]]:
+        return {name: breaker.get_state() for name, breaker in self.breakers.items()}
@@ -0,0 +1,142 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Set, Tuple
+from app.config import settings
+from app.client import UpstreamResponse
+
+# Clé de cache : (utilisateur, service, chemin, query params triés)
+CacheKey = Tuple[str, str, str, Tuple[Tuple[str, str], ...]]
+
+class ResponseCache:
+    """
+    Cache LRU des réponses GET par utilisateur, borné en mémoire
+    (le TTL de chaque route vient de sa politique dans la table de routage)
+
+    Les entrées d'un utilisateur sont indexées par service : un POST/PUT/DELETE
+    du même utilisateur sur ce service invalide toutes ses entrées. Chaque
+    invalidation incrémente la génération du couple (utilisateur, service) :
+    un GET parti avant l'écriture ne stocke pas sa réponse, périmée.
+    """
+
+    def __init__(self, max_bytes: int, max_entry_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.entries: "OrderedDict[CacheKey, Tuple[float, UpstreamResponse, int]]" = OrderedDict()
+        self.scopes: Dict[Tuple[str, str], Set[CacheKey]] = {}
+        self.generations: Dict[Tuple[str, str], int] = {}
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_skips = 0
+
+    @staticmethod
+    def make_key(username: str, service_name: str, path: str, query_items) -> CacheKey:
+        return (username, service_name, path, tuple(sorted(query_items)))
+
+    def get(self, key: CacheKey) -> Optional[UpstreamResponse]:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, response, _ = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return response
+
+    def generation(self, username: str, service_name: str) -> int:
+        """Génération courante du cache d'un utilisateur pour un service (à relever avant l'appel)"""
+        return self.generations.get((username, service_name), 0)
+
+    def set(self, key: CacheKey, response: UpstreamResponse, ttl: float, generation: Optional[int] = None):
+        """
+        Stocker une réponse 200 si elle est cacheable et pas trop volumineuse
+
+        generation : génération relevée avant l'appel au service ; si une
+        écriture l'a invalidée entre-temps, la réponse n'est pas stockée
+        """
+        if ttl <= 0 or response.status_code != 200:
+            return
+
+        if generation is not None and generation != self.generation(key[0], key[1]):
+            self.stale_skips += 1
+            return
+
+        cache_control = (response.header("cache-control") or "").lower()
+        if "no-store" in cache_control or "no-cache" in cache_control or "private" in cache_control:
+            return
+
+        size = len(response.body) + sum(len(k) + len(v) for k, v in response.headers)
+        if size > self.max_entry_bytes:
+            return
+
+        if key in self.entries:
+            self._remove(key)
+
+        self.entries[key] = (time.monotonic() + ttl, response, size)
+        self.scopes.setdefault(key[:2], set()).add(key)
+        self.size_bytes += size
+
+        while self.size_bytes > self.max_bytes and self.entries:
+            oldest_key = next(iter(self.entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def _remove(self, key: CacheKey):
+        _, _, size = self.entries.pop(key)
+        self.size_bytes -= size
+        scope = self.scopes.get(key[:2])
+        if scope is not None:
+            scope.discard(key)
+            if not scope:
+                del self.scopes[key[:2]]
+
+    def invalidate(self, username: str, service_name: str) -> int:
+        """Supprimer toutes les entrées d'un utilisateur pour un service"""
+        scope = (username, service_name)
+        self.generations[scope] = self.generations.get(scope, 0) + 1
+        keys = self.scopes.pop(scope, set())
+        for key in keys:
+            _, _, size = self.entries.pop(key)
+            self.size_bytes -= size
+        self.invalidations += len(keys)
+        return len(keys)
+
+    def write_completed(self, username: str, service_name: str, status_code: int):
+        """Écriture d'un utilisateur traitée : invalider son cache pour ce service si elle a réussi (< 400)"""
+        if status_code < 400:
+            self.invalidate(username, service_name)
+
+    def clear(self):
+        self.entries.clear()
+        self.scopes.clear()
+        self.generations.clear()
+        self.size_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": settings.CACHE_ENABLED,
+            "entries": len(self.entries),
+            "size_bytes": self.size_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "stale_skips": self.stale_skips
+        }
+
+# Instance globale du cache de réponses
+response_cache = ResponseCache(
+    max_bytes=settings.CACHE_MAX_BYTES,
+    max_entry_bytes=settings.CACHE_MAX_ENTRY_BYTES
+)
@@ -1,15 +1,99 @@
+import asyncio
 import httpx
 import time
-from typing import Dict, Any, Optional
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Union, AsyncIterator, Callable, List, Tuple
 from fastapi import HTTPException
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
 from app.config import settings
-from app.schemas import ServiceStatus
+from app.schemas import ServiceStatus, EndpointHealth
+from app.pool import ServicePool
+from app.breaker import BreakerRegistry
+from app.concurrency import LimiterRegistry
+from app.balancer import BalancerRegistry
+from app.retry import IDEMPOTENT_METHODS, RetryBudget, LatencyTracker, backoff_delay
+from app.streaming import relay_stream, is_event_stream
+from app.tracing import tracer
+from app.metrics import observe_upstream, add_upstream_time, UPSTREAM_RETRIES, HEDGED_REQUESTS
+
+# Headers liés à la connexion (hop-by-hop) - jamais retransmis au client
+HOP_BY_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailer",
+    "transfer-encoding",
+    "upgrade"
+}
+
+def upstream_headers(response: httpx.Response) -> List[Tuple[bytes, bytes]]:
+    """
+    Headers bruts de l'upstream sans les headers hop-by-hop (doublons comme Set-Cookie préservés)
+    
+    Noms en minuscules comme l'exige ASGI (les middlewares les recherchent ainsi).
+    """
+    return [
+        (key.lower(), value) for key, value in response.headers.raw
+        if key.lower().decode("latin-1") not in HOP_BY_HOP_HEADERS
+    ]
+
+@dataclass
+class UpstreamResponse:
+    """Réponse d'un microservice entièrement lue (body brut, encodage d'origine)"""
+    status_code: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    
+    def header(self, name: str) -> Optional[str]:
+        name_bytes = name.lower().encode("latin-1")
+        for key, value in self.headers:
+            if key.lower() == name_bytes:
+                return value.decode("latin-1")
+        return None
+    
+    def to_response(self, extra_headers: Optional[Dict[str, str]] = None) -> Response:
+        response = Response(content=self.body, status_code=self.status_code)
+        # Remplacer les headers par défaut par ceux de l'upstream
+        response.raw_headers = list(self.headers)
+        for key, value in (extra_headers or {}).items():
+            response.raw_headers.append((key.lower().encode("latin-1"), value.encode("latin-1")))
+        return response
 
 class ServiceClient:
     """Client HTTP pour communiquer avec les microservices"""
     
-    def __init__(self):
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
         self.timeout = settings.SERVICE_TIMEOUT
+        # Connexions keep-alive réutilisées entre les requêtes
+        self.pool = ServicePool(transport)
+        # Un circuit breaker et une limite de concurrence adaptative par microservice
+        self.breakers = BreakerRegistry()
+        self.limiters = LimiterRegistry()
+        # Répartition entre les instances de chaque service (p2c / least outstanding, éjection passive)
+        self.balancers = BalancerRegistry()
+        # GET identiques en vol (coalescing) et nombre de requêtes dédupliquées
+        self.in_flight: Dict[tuple, asyncio.Future] = {}
+        self.coalesced_requests = 0
+        # Budget global de retries et latences récentes par service (hedging)
+        self.retry_budget = RetryBudget(
+            ratio=settings.RETRY_BUDGET_RATIO,
+            min_per_s=settings.RETRY_BUDGET_MIN_PER_S,
+            max_tokens=settings.RETRY_BUDGET_MAX_TOKENS
+        )
+        self.latency_trackers: Dict[str, LatencyTracker] = {}
+    
+    async def start(self):
+        """Ouvrir les pools de connexions et résoudre les instances des services (startup de la gateway)"""
+        await self.pool.start()
+        await self.balancers.start()
+    
+    async def close(self):
+        """Arrêter la résolution DNS et fermer les pools de connexions (shutdown de la gateway)"""
+        await self.balancers.stop()
+        await self.pool.close()
         
     async def forward_request(
         self, 
@@ -18,7 +102,8 @@ class ServiceClient:
         method: str = "GET",
         headers: Optional[Dict[str, str]] = None,
         params: Optional[Dict[str, Any]] = None,
-        json_data: Optional[Dict[str, Any]] = None
+        json_data: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None
     ) -> Dict[str, Any]:
         """
         Transmet une requête vers un microservice
@@ -30,6 +115,7 @@ class ServiceClient:
             headers: Headers HTTP à transmettre
             params: Paramètres de requête
             json_data: Données JSON pour POST/PUT
+            timeout: Timeout de la route (SERVICE_TIMEOUT par défaut)
             
         Returns:
             Réponse du microservice
@@ -38,68 +124,494 @@ class ServiceClient:
             HTTPException: Si le service est inaccessible ou retourne une erreur
         """
         
-        # Récupérer l'URL du service
-        service_url = settings.SERVICE_ROUTES.get(service_name)
-        if not service_url:
+        if method.upper() not in ["GET", "POST", "PUT", "DELETE"]:
+            raise HTTPException(status_code=405, detail=f"Method {method} not supported")
+        
+        response = await self._send(
+            service_name,
+            method.upper(),
+            path,
+            headers=headers,
+            params=params,
+            json_data=json_data,
+            timeout=timeout
+        )
+        
+        # Si le service retourne une erreur HTTP, on la propage
+        if response.status_code >= 400:
             raise HTTPException(
-                status_code=404, 
-                detail=f"Service {service_name} not configured"
+                status_code=response.status_code,
+                detail=response.text or f"Error from {service_name} service"
             )
         
-        # Construire l'URL complète
-        full_url = f"{service_url}{path}"
+        # Retourner la réponse JSON
+        try:
+            return response.json()
+        except ValueError as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Gateway error: {str(e)}"
+            )
+    
+    async def proxy_request(
+        self,
+        service_name: str,
+        path: str,
+        method: str = "GET",
+        headers: Optional[Dict[str, str]] = None,
+        query: str = "",
+        content: Optional[Union[bytes, AsyncIterator[bytes]]] = None,
+        timeout: Optional[float] = None,
+        long_lived: bool = False
+    ) -> StreamingResponse:
+        """
+        Transmet une requête en pass-through brut (mode stream)
         
-        # Préparer les headers
-        request_headers = headers or {}
+        Le body de la requête et celui de la réponse circulent sous forme de flux
+        d'octets, sans parsing JSON : le status, les headers et le contenu du
+        microservice sont renvoyés tels quels au client.
         
+        Args:
+            service_name: Nom du service (auth, projects, builds, monitor)
+            path: Chemin de l'endpoint (ex: /login, /health)
+            method: Méthode HTTP
+            headers: Headers HTTP à transmettre
+            query: Query string brute (sans le "?")
+            content: Body brut ou flux d'octets de la requête
+            timeout: Timeout de la route (SERVICE_TIMEOUT par défaut)
+            long_lived: Flux long (logs, SSE) : file bornée, heartbeats SSE
+            
+        Returns:
+            StreamingResponse relayant la réponse du microservice
+            
+        Raises:
+            HTTPException: Si le service est inaccessible
+        """
+        if query:
+            path = f"{path}?{query}"
+        
+        response = await self._send(
+            service_name,
+            method,
+            path,
+            headers=headers,
+            content=content,
+            timeout=timeout,
+            stream=True
+        )
+        
+        closed = False
+        
+        async def close_upstream():
+            # Libérer la connexion dans le pool une fois le flux consommé (une seule fois)
+            nonlocal closed
+            if closed:
+                return
+            closed = True
+            try:
+                await response.aclose()
+            finally:
+                self.pool.request_finished(service_name, error=response.status_code >= 500)
+        
+        raw_headers = upstream_headers(response)
+        if long_lived:
+            event_stream = is_event_stream(response.headers.get("content-type"))
+            body = relay_stream(response, settings.SSE_HEARTBEAT_INTERVAL if event_stream else None)
+            # Pas de bufferisation par un éventuel reverse proxy (nginx) devant la gateway
+            raw_headers.append((b"x-accel-buffering", b"no"))
+        else:
+            body = response.aiter_raw()
+        
+        async def relay_body():
+            # Fermeture garantie même si la lecture du body lève (upstream coupé, client parti)
+            try:
+                async for chunk in body:
+                    yield chunk
+            finally:
+                try:
+                    await body.aclose()
+                finally:
+                    await close_upstream()
+        
+        proxied = StreamingResponse(
+            relay_body(),
+            status_code=response.status_code,
+            background=BackgroundTask(close_upstream)
+        )
+        proxied.raw_headers = raw_headers
+        return proxied
+    
+    async def fetch(
+        self,
+        service_name: str,
+        path: str,
+        method: str = "GET",
+        headers: Optional[Dict[str, str]] = None,
+        query: str = "",
+        timeout: Optional[float] = None,
+        content: Optional[bytes] = None
+    ) -> UpstreamResponse:
+        """
+        Transmet une requête et lit entièrement la réponse brute
+        
+        Utilisé quand la réponse doit être conservée ou partagée (cache de
+        réponses, coalescing, batch) : le body n'est ni décodé ni parsé, status
+        et headers sont conservés.
+        
+        Les GET identiques (même service, chemin, query et headers - donc même
+        utilisateur) déjà en vol sont fusionnés : un seul appel au service,
+        la réponse est distribuée à toutes les requêtes en attente.
+        """
+        if query:
+            path = f"{path}?{query}"
+        
+        if not settings.COALESCE_REQUESTS or method not in ["GET", "HEAD"] or content is not None:
+            return await self._fetch(service_name, method, path, headers, timeout, content)
+        
+        key = (service_name, method, path, tuple(sorted((headers or {}).items())))
+        upstream_call = self.in_flight.get(key)
+        if upstream_call is not None:
+            self.coalesced_requests += 1
+            # L'attente de l'appel partagé compte comme temps upstream pour cette requête
+            wait_start = time.time()
+            try:
+                return await asyncio.shield(upstream_call)
+            finally:
+                add_upstream_time(time.time() - wait_start)
+        
+        # Appel dans une tâche séparée : l'annulation d'un client ne le coupe pas pour les autres
+        upstream_call = asyncio.ensure_future(
+            self._fetch(service_name, method, path, headers, timeout)
+        )
+        self.in_flight[key] = upstream_call
+        upstream_call.add_done_callback(lambda task: self._upstream_call_done(key, task))
+        
+        return await asyncio.shield(upstream_call)
+    
+    def _upstream_call_done(self, key: tuple, task: asyncio.Future):
+        self.in_flight.pop(key, None)
+        # Marquer l'exception comme lue si toutes les requêtes en attente ont abandonné
+        if not task.cancelled():
+            task.exception()
+    
+    async def _fetch(
+        self,
+        service_name: str,
+        method: str,
+        path: str,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        content: Optional[bytes] = None
+    ) -> UpstreamResponse:
+        response = await self._send(
+            service_name, method, path, headers=headers, content=content, timeout=timeout, stream=True
+        )
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                start_time = time.time()
-                
-                # Effectuer la requête selon la méthode
-                if method.upper() == "GET":
-                    response = await client.get(full_url, headers=request_headers, params=params)
-                elif method.upper() == "POST":
-                    response = await client.post(full_url, headers=request_headers, params=params, json=json_data)
-                elif method.upper() == "PUT":
-                    response = await client.put(full_url, headers=request_headers, params=params, json=json_data)
-                elif method.upper() == "DELETE":
-                    response = await client.delete(full_url, headers=request_headers, params=params)
-                else:
-                    raise HTTPException(status_code=405, detail=f"Method {method} not supported")
-                
-                response_time = (time.time() - start_time) * 1000  # en ms
-                
-                # Si le service retourne une erreur HTTP, on la propage
-                if response.status_code >= 400:
-                    raise HTTPException(
-                        status_code=response.status_code,
-                        detail=response.text or f"Error from {service_name} service"
-                    )
-                
-                # Retourner la réponse JSON
-                return response.json()
-                
-        except httpx.TimeoutException:
+            body = b"".join([chunk async for chunk in response.aiter_raw()])
+        except httpx.HTTPError:
+            raise HTTPException(
+                status_code=502,
+                detail=f"Service {service_name} returned an incomplete response"
+            )
+        finally:
+            await response.aclose()
+            self.pool.request_finished(service_name, error=response.status_code >= 500)
+        
+        return UpstreamResponse(
+            status_code=response.status_code,
+            headers=upstream_headers(response),
+            body=body
+        )
+    
+    def get_coalescing_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.COALESCE_REQUESTS,
+            "in_flight": len(self.in_flight),
+            "coalesced_requests": self.coalesced_requests
+        }
+    
+    async def _send(
+        self,
+        service_name: str,
+        method: str,
+        path: str,
+        headers: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        json_data: Optional[Dict[str, Any]] = None,
+        content: Optional[Union[bytes, AsyncIterator[bytes]]] = None,
+        timeout: Optional[float] = None,
+        stream: bool = False
+    ) -> httpx.Response:
+        """
+        Envoyer une requête au microservice via son pool et son circuit breaker
+        
+        Les méthodes idempotentes dont le body peut être rejoué sont retentées
+        (erreur de connexion, 502/503/504) dans la limite du budget global de
+        retries. Avec HEDGE_ENABLED, un GET lent est dupliqué après le p95 du
+        service et la première réponse l'emporte.
+        
+        Avec stream=True, la réponse n'est pas lue : l'appelant doit la fermer
+        puis appeler pool.request_finished().
+        """
+        
+        # Vérifier que le service est configuré
+        if service_name not in settings.SERVICE_ROUTES:
             raise HTTPException(
-                status_code=504,
-                detail=f"Service {service_name} timeout"
+                status_code=404, 
+                detail=f"Service {service_name} not configured"
             )
-        except httpx.ConnectError:
+        
+        # Construire la requête vers l'instance choisie (reconstruite à chaque essai)
+        def build_request(endpoint_url: str) -> httpx.Request:
+            return self.pool.get_client(service_name).build_request(
+                method,
+                f"{endpoint_url}{path}",
+                headers=headers or {},
+                params=params,
+                json=json_data,
+                content=content,
+                timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT
+            )
+        
+        # Un body en flux ne peut être envoyé qu'une fois
+        replayable = content is None or isinstance(content, bytes)
+        can_retry = settings.RETRY_ENABLED and method in IDEMPOTENT_METHODS and replayable
+        can_hedge = settings.HEDGE_ENABLED and method == "GET" and replayable
+        # Seules les lectures au timeout standard renseignent la latence de la limite
+        # adaptative : une écriture (déploiement, build) ou une route longue est lente
+        # par nature, pas signe de surcharge
+        latency_signal = method in ("GET", "HEAD") and (timeout is None or timeout <= settings.SERVICE_TIMEOUT)
+        self.retry_budget.deposit()
+        
+        attempt = 0
+        while True:
+            try:
+                if can_hedge:
+                    response = await self._send_hedged(service_name, build_request, stream, latency_signal)
+                else:
+                    response = await self._send_once(service_name, build_request, stream, latency_signal)
+            except HTTPException:
+                raise
+            except Exception as error:
+                status_code = self._error_status(error)
+                if not (
+                    can_retry
+                    and isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout))
+                    and self._retry_allowed(service_name, attempt, "connect_error")
+                ):
+                    raise self._gateway_error(service_name, status_code, error)
+            else:
+                if not (
+                    can_retry
+                    and response.status_code in settings.RETRY_STATUS_CODES
+                    and self._retry_allowed(service_name, attempt, str(response.status_code))
+                ):
+                    return response
+                # Réponse abandonnée : libérer la connexion avant de rejouer
+                if stream:
+                    await response.aclose()
+                    self.pool.request_finished(service_name, error=True)
+            
+            await asyncio.sleep(backoff_delay(attempt))
+            attempt += 1
+    
+    def _retry_allowed(self, service_name: str, attempt: int, reason: str) -> bool:
+        """Vérifier le nombre d'essais puis consommer le budget de retries"""
+        if attempt >= settings.RETRY_MAX_ATTEMPTS or not self.retry_budget.withdraw():
+            return False
+        UPSTREAM_RETRIES.labels(service_name, reason).inc()
+        return True
+    
+    async def _send_once(
+        self,
+        service_name: str,
+        build_request: Callable[[str], httpx.Request],
+        stream: bool,
+        latency_signal: bool = True
+    ) -> httpx.Response:
+        """Un essai : limite de concurrence, circuit breaker, choix de l'instance, envoi, comptabilisation (les erreurs httpx sont propagées)"""
+        
+        # Service saturé : attente brève d'une place puis rejet (503) sans le solliciter
+        limiter = self.limiters.get(service_name) if settings.ADAPTIVE_LIMIT_ENABLED else None
+        if limiter is not None:
+            await limiter.acquire()
+        
+        # Circuit ouvert : rejet immédiat sans toucher au service
+        breaker = self.breakers.get(service_name)
+        if not breaker.allow_request():
+            if limiter is not None:
+                limiter.release()
             raise HTTPException(
                 status_code=503,
-                detail=f"Service {service_name} unavailable"
+                detail=f"Service {service_name} unavailable (circuit open)",
+                headers={"Retry-After": str(breaker.retry_after())}
             )
-        except Exception as e:
-            if isinstance(e, HTTPException):
+        
+        balancer = self.balancers.get(service_name)
+        endpoint = None
+        try:
+            endpoint = balancer.pick()
+            upstream_request = build_request(endpoint.url)
+            client = self.pool.get_client(service_name)
+        except BaseException:
+            # Rien n'a été envoyé : rendre les places prises (dont l'essai half-open du breaker)
+            if endpoint is not None:
+                balancer.release(endpoint, failed=None)
+            breaker.release()
+            if limiter is not None:
+                limiter.release()
+            raise
+        self.pool.request_started(service_name)
+        start_time = time.time()
+        
+        # Span client par essai : son traceparent relie le span serveur du microservice
+        with tracer.span(
+            f"{upstream_request.method} {service_name}",
+            "client",
+            {"peer.service": service_name, "http.method": upstream_request.method, "http.url": str(upstream_request.url)}
+        ) as span:
+            try:
+                upstream_request.headers["traceparent"] = span.traceparent()
+                response = await client.send(upstream_request, stream=stream)
+            except (asyncio.CancelledError, HTTPException):
+                # Essai hedgé perdant, client parti ou body client refusé : ni succès ni échec du service
+                self.pool.request_finished(service_name, error=False)
+                balancer.release(endpoint, failed=None)
+                breaker.release()
+                if limiter is not None:
+                    limiter.release()
                 raise
-            raise HTTPException(
-                status_code=500,
-                detail=f"Gateway error: {str(e)}"
+            except Exception as e:
+                response_time = time.time() - start_time
+                breaker.record(True, response_time * 1000)
+                observe_upstream(service_name, upstream_request.method, str(self._error_status(e)), response_time)
+                self.pool.request_finished(service_name, error=True)
+                balancer.release(endpoint, failed=True)
+                if limiter is not None:
+                    limiter.release(overloaded=isinstance(e, httpx.TransportError))
+                raise
+            span.set_attribute("http.status_code", response.status_code)
+        
+        response_time = (time.time() - start_time) * 1000  # en ms
+        failed = response.status_code >= 500
+        breaker.record(failed, response_time)
+        balancer.release(endpoint, failed=failed)
+        if limiter is not None:
+            # Place rendue à la réception des headers : un flux long n'occupe pas la limite
+            limiter.release(
+                response_time if latency_signal else None,
+                overloaded=response.status_code in (429, 503, 504)
             )
+        observe_upstream(service_name, upstream_request.method, str(response.status_code), response_time / 1000)
+        if upstream_request.method == "GET" and not failed:
+            self.latencies(service_name).record(response_time)
+        
+        if not stream:
+            self.pool.request_finished(service_name, error=failed)
+        
+        return response
+    
+    async def _send_hedged(
+        self,
+        service_name: str,
+        build_request: Callable[[str], httpx.Request],
+        stream: bool,
+        latency_signal: bool = True
+    ) -> httpx.Response:
+        """Envoyer un GET, le dupliquer s'il dépasse le p95 du service ; la première réponse gagne"""
+        primary = asyncio.ensure_future(self._send_once(service_name, build_request, stream, latency_signal))
+        tasks = [primary]
+        winner = primary
+        try:
+            delay = self.latencies(service_name).hedge_delay()
+            if delay is None:
+                return await primary
+            
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done or not self.retry_budget.withdraw():
+                return await primary
+            
+            hedge = asyncio.ensure_future(self._send_once(service_name, build_request, stream, latency_signal))
+            tasks.append(hedge)
+            winner = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if not task.cancelled() and task.exception() is None:
+                        winner = task
+                        HEDGED_REQUESTS.labels(service_name, "primary" if task is primary else "hedge").inc()
+                        return task.result()
+            # Les deux essais ont échoué : propager l'erreur de la requête d'origine
+            winner = primary
+            return primary.result()
+        finally:
+            # Annuler l'essai perdant (ou fermer sa réponse s'il a abouti entre-temps)
+            for task in tasks:
+                if task is not winner:
+                    task.cancel()
+                    task.add_done_callback(
+                        lambda task: self._discard_hedge_loser(service_name, task, stream)
+                    )
+    
+    def _discard_hedge_loser(self, service_name: str, task: asyncio.Future, stream: bool):
+        """Fermer la réponse d'un essai hedgé perdant arrivée malgré l'annulation"""
+        if task.cancelled() or task.exception() is not None or not stream:
+            return
+        response = task.result()
+        
+        async def close_loser():
+            await response.aclose()
+            self.pool.request_finished(service_name, error=False)
+        
+        asyncio.ensure_future(close_loser())
+    
+    def latencies(self, service_name: str) -> LatencyTracker:
+        tracker = self.latency_trackers.get(service_name)
+        if tracker is None:
+            tracker = self.latency_trackers[service_name] = LatencyTracker(
+                settings.HEDGE_SAMPLE_SIZE, settings.HEDGE_MIN_SAMPLES
+            )
+        return tracker
+    
+    @staticmethod
+    def _error_status(error: Exception) -> int:
+        """Status renvoyé au client pour une requête sans réponse du service"""
+        if isinstance(error, httpx.TimeoutException):
+            return 504
+        if isinstance(error, httpx.ConnectError):
+            return 503
+        return 500
+    
+    @staticmethod
+    def _gateway_error(service_name: str, status_code: int, error: Exception) -> HTTPException:
+        if status_code == 504:
+            return HTTPException(status_code=504, detail=f"Service {service_name} timeout")
+        if status_code == 503:
+            return HTTPException(status_code=503, detail=f"Service {service_name} unavailable")
+        return HTTPException(status_code=500, detail=f"Gateway error: {str(error)}")
+    
+    def get_retry_stats(self) -> Dict[str, Any]:
+        return {
+            "retry_enabled": settings.RETRY_ENABLED,
+            "max_attempts": settings.RETRY_MAX_ATTEMPTS,
+            "budget": self.retry_budget.get_stats(),
+            "hedge_enabled": settings.HEDGE_ENABLED,
+            "hedge_delay_ms": {
+                service_name: round(delay * 1000, 2) if delay is not None else None
+                for service_name, delay in (
+                    (name, tracker.hedge_delay()) for name, tracker in self.latency_trackers.items()
+                )
+            }
+        }
     
     async def check_service_health(self, service_name: str) -> ServiceStatus:
-        """Vérifie la santé d'un microservice"""
+        """
+        Vérifie la santé d'un microservice sur chacune de ses instances
+        
+        Les instances sondées sont celles du balancer (pods d'un service headless
+        compris) : une instance morte apparaît même si les autres répondent.
+        """
         service_url = settings.SERVICE_ROUTES.get(service_name)
         if not service_url:
             return ServiceStatus(
@@ -108,38 +620,53 @@ class ServiceClient:
                 status="unconfigured"
             )
         
+        balancer_state = self.balancers.get(service_name).get_state()
+        endpoints = await asyncio.gather(*(
+            self._probe_endpoint(service_name, endpoint["url"], endpoint["ejected"])
+            for endpoint in balancer_state["endpoints"]
+        ))
+        
+        healthy = [endpoint for endpoint in endpoints if endpoint.status == "healthy"]
+        if len(healthy) == len(endpoints):
+            status = "healthy"
+        elif healthy:
+            status = "degraded"
+        elif len(endpoints) == 1:
+            status = endpoints[0].status
+        else:
+            status = "unhealthy"
+        
+        return ServiceStatus(
+            service=service_name,
+            url=service_url,
+            status=status,
+            response_time_ms=(
+                sum(endpoint.response_time_ms for endpoint in healthy) / len(healthy) if healthy else None
+            ),
+            endpoints=endpoints
+        )
+    
+    async def _probe_endpoint(self, service_name: str, endpoint_url: str, ejected: bool) -> EndpointHealth:
+        """Sonder le /health d'une instance"""
         try:
             start_time = time.time()
-            async with httpx.AsyncClient(timeout=5) as client:
-                response = await client.get(f"{service_url}/health")
-                response_time = (time.time() - start_time) * 1000
+            client = self.pool.get_client(service_name)
+            response = await client.get(f"{endpoint_url}/health", timeout=settings.HEALTH_CHECK_TIMEOUT)
+            response_time = (time.time() - start_time) * 1000
+            
+            if response.status_code == 200:
+                return EndpointHealth(
+                    url=endpoint_url,
+                    status="healthy",
+                    response_time_ms=response_time,
+                    ejected=ejected
+                )
+            return EndpointHealth(url=endpoint_url, status="unhealthy", ejected=ejected)
                 
-                if response.status_code == 200:
-                    return ServiceStatus(
-                        service=service_name,
-                        url=service_url,
-                        status="healthy",
-                        response_time_ms=response_time
-                    )
-                else:
-                    return ServiceStatus(
-                        service=service_name,
-                        url=service_url,
-                        status="unhealthy"
-                    )
-                    
         except httpx.TimeoutException:
-            return ServiceStatus(
-                service=service_name,
-                url=service_url,
-                status="timeout"
-            )
+            return EndpointHealth(url=endpoint_url, status="timeout", ejected=ejected)
         except Exception:
-            return ServiceStatus(
-                service=service_name,
-                url=service_url,
-                status="unhealthy"
-            )
+            return EndpointHealth(url=endpoint_url, status="unhealthy", ejected=ejected)
 
 # Instance globale du client
 service_client = ServiceClient()
\ No newline at end of file
@@ -0,0 +1,136 @@
+import time
+import zlib
+from typing import Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Receive, Scope, Send, Message
+from app.config import settings
+from app.metrics import COMPRESSION_SECONDS, COMPRESSION_BYTES
+
+try:
+    import brotli
+except ImportError:  # brotli optionnel : gzip seul
+    brotli = None
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Choisir l'encodage (br puis gzip) accepté par le client, en respectant q=0"""
+    accepted = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip()] = quality
+
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_quality = None, 0.0
+    for encoding in candidates:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+def is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type.startswith("text/") or media_type in settings.COMPRESSIBLE_CONTENT_TYPES
+
+class StreamEncoder:
+    """Encodeur incrémental : chaque chunk est compressé puis flushé (flux de logs lisibles au fil de l'eau)"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self.compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+        else:
+            self.compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def encode(self, chunk: bytes, final: bool) -> bytes:
+        start = time.perf_counter()
+        if self.encoding == "br":
+            data = self.compressor.process(chunk)
+            data += self.compressor.finish() if final else self.compressor.flush()
+        else:
+            data = self.compressor.compress(chunk)
+            data += self.compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+        COMPRESSION_SECONDS.labels(self.encoding).inc(time.perf_counter() - start)
+        COMPRESSION_BYTES.labels(self.encoding, "in").inc(len(chunk))
+        COMPRESSION_BYTES.labels(self.encoding, "out").inc(len(data))
+        return data
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI de compression négociée (Accept-Encoding : br, gzip)
+
+    Ne compresse que les types texte/JSON d'au moins COMPRESSION_MIN_SIZE octets ;
+    une réponse déjà encodée par le microservice (Content-Encoding) est relayée
+    telle quelle. Les réponses streamées sont compressées chunk par chunk.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not settings.COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        encoder: Optional[StreamEncoder] = None
+        passthrough = False
+
+        async def send_wrapper(message: Message):
+            nonlocal start_message, encoder, passthrough
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_length = headers.get("content-length")
+                if (
+                    "content-encoding" in headers
+                    or not is_compressible(headers.get("content-type", ""))
+                    or message["status"] in (204, 304)
+                    or (content_length is not None and int(content_length) < settings.COMPRESSION_MIN_SIZE)
+                ):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Décision reportée au premier chunk (taille inconnue des réponses streamées)
+                    start_message = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if encoder is None:
+                headers = MutableHeaders(scope=start_message)
+                if not more_body and len(body) < settings.COMPRESSION_MIN_SIZE:
+                    passthrough = True
+                    headers.add_vary_header("Accept-Encoding")
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                encoder = StreamEncoder(encoding)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                del headers["Content-Length"]
+                await send(start_message)
+
+            await send({
+                "type": "http.response.body",
+                "body": encoder.encode(body, final=not more_body),
+                "more_body": more_body
+            })
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,161 @@
+import asyncio
+import time
+from collections import deque
+from typing import Dict, Any, Deque, Optional
+from fastapi import HTTPException
+from app.config import settings
+from app.metrics import LOAD_SHED, CONCURRENCY_LIMIT
+
+class AdaptiveLimiter:
+    """
+    Limite de concurrence adaptative d'un microservice (AIMD)
+
+    - augmentation additive : +1 par réponse rapide tant que la limite est utilisée
+    - diminution multiplicative : x ADAPTIVE_LIMIT_BACKOFF (au plus une fois par
+      aller-retour) sur réponse lente (au-delà de ADAPTIVE_LIMIT_LATENCY_TOLERANCE
+      fois la latence de base), erreur réseau, 429, 503 ou 504
+    - au-delà de la limite : file d'attente FIFO bornée pendant
+      ADAPTIVE_LIMIT_QUEUE_TIMEOUT_MS, puis rejet immédiat (503)
+
+    La latence de base est la latence minimale observée sur une fenêtre de
+    ADAPTIVE_LIMIT_BASELINE_WINDOW réponses (service non chargé). Seules les
+    lectures au timeout standard l'alimentent : les écritures et routes longues
+    ne comptent que par leurs erreurs de surcharge.
+    """
+
+    def __init__(self, service_name: str):
+        self.service_name = service_name
+        self.limit = float(settings.ADAPTIVE_LIMIT_INITIAL)
+        self.in_flight = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.baseline_ms: Optional[float] = None
+        self.window_min_ms = float("inf")
+        self.window_samples = 0
+        self.last_decrease = 0.0
+        self.shed = 0
+        self.queued = 0
+        self.decreases = 0
+        CONCURRENCY_LIMIT.labels(service_name).set(int(self.limit))
+
+    async def acquire(self):
+        """Obtenir une place ; attendre brièvement si la limite est atteinte, sinon 503"""
+        if self.in_flight < int(self.limit) and not self.waiters:
+            self.in_flight += 1
+            return
+
+        if len(self.waiters) >= settings.ADAPTIVE_LIMIT_QUEUE_SIZE:
+            self._shed("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        self.queued += 1
+        try:
+            # La place est transmise par release() : in_flight déjà compté
+            await asyncio.wait_for(waiter, settings.ADAPTIVE_LIMIT_QUEUE_TIMEOUT_MS / 1000)
+        except asyncio.TimeoutError:
+            self._remove(waiter)
+            self._shed("queue_timeout")
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Place obtenue juste avant l'annulation : la rendre
+                self.release()
+            else:
+                self._remove(waiter)
+            raise
+
+    def release(self, latency_ms: Optional[float] = None, overloaded: bool = False):
+        """
+        Libérer une place et ajuster la limite
+
+        latency_ms : durée de l'appel (None si l'appel n'a pas abouti côté service)
+        overloaded : erreur réseau ou status de surcharge (429/503/504)
+        """
+        self.in_flight -= 1
+        if overloaded:
+            self._decrease()
+        elif latency_ms is not None:
+            self._observe(latency_ms)
+        self._wake()
+
+    def _observe(self, latency_ms: float):
+        self.window_min_ms = min(self.window_min_ms, latency_ms)
+        self.window_samples += 1
+        if self.baseline_ms is None or self.window_samples >= settings.ADAPTIVE_LIMIT_BASELINE_WINDOW:
+            self.baseline_ms = self.window_min_ms
+            self.window_min_ms = float("inf")
+            self.window_samples = 0
+
+        threshold = max(self.baseline_ms * settings.ADAPTIVE_LIMIT_LATENCY_TOLERANCE, settings.ADAPTIVE_LIMIT_SLOW_FLOOR_MS)
+        if latency_ms > threshold:
+            self._decrease(latency_ms / 1000)
+        elif self.in_flight * 2 >= int(self.limit):
+            # Limite effectivement utilisée : on peut sonder un cran plus haut
+            self._set_limit(self.limit + 1)
+
+    def _decrease(self, round_trip_s: float = 0.0):
+        now = time.monotonic()
+        # Une seule baisse par aller-retour : les réponses lentes d'une même vague comptent une fois
+        if now - self.last_decrease < max(round_trip_s, (self.baseline_ms or 0) / 1000):
+            return
+        self.last_decrease = now
+        self.decreases += 1
+        self._set_limit(self.limit * settings.ADAPTIVE_LIMIT_BACKOFF)
+
+    def _set_limit(self, limit: float):
+        limit = min(float(settings.ADAPTIVE_LIMIT_MAX), max(float(settings.ADAPTIVE_LIMIT_MIN), limit))
+        if int(limit) != int(self.limit):
+            CONCURRENCY_LIMIT.labels(self.service_name).set(int(limit))
+        self.limit = limit
+
+    def _wake(self):
+        """Transmettre les places libres aux requêtes en attente (ordre d'arrivée)"""
+        while self.waiters and self.in_flight < int(self.limit):
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def _remove(self, waiter: asyncio.Future):
+        try:
+            self.waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _shed(self, reason: str):
+        self.shed += 1
+        LOAD_SHED.labels(self.service_name, reason).inc()
+        raise HTTPException(
+            status_code=503,
+            detail=f"Service {self.service_name} overloaded (concurrency limit {int(self.limit)})",
+            headers={"Retry-After": "1"}
+        )
+
+    def get_state(self) -> Dict[str, Any]:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queue_depth": len(self.waiters),
+            "baseline_latency_ms": round(self.baseline_ms, 2) if self.baseline_ms is not None else None,
+            "queued": self.queued,
+            "shed": self.shed,
+            "decreases": self.decreases
+        }
+
+class LimiterRegistry:
+    """Une limite adaptative par entrée de SERVICE_ROUTES"""
+
+    def __init__(self):
+        self.limiters: Dict[str, AdaptiveLimiter] = {
+            service_name: AdaptiveLimiter(service_name)
+            for service_name in settings.SERVICE_ROUTES.keys()
+        }
+
+    def get(self, service_name: str) -> AdaptiveLimiter:
+        limiter = self.limiters.get(service_name)
+        if limiter is None:
+            limiter = AdaptiveLimiter(service_name)
+            self.limiters[service_name] = limiter
+        return limiter
+
+    def get_states(self) -> Dict[str, Dict[str, Any]]:
+        return {name: limiter.get_state() for name, limiter in self.limiters.items()}
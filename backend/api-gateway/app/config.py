@@ -1,5 +1,6 @@
 import os
-from typing import Dict
+import json
+from typing import Dict, Any, List
 
 class Settings:
     # Service discovery - URLs des microservices
@@ -17,10 +18,173 @@ class Settings:
     # Timeout pour les requêtes vers les microservices (en secondes)
     SERVICE_TIMEOUT: int = int(os.getenv("SERVICE_TIMEOUT", "30"))
     
+    # Pool de connexions persistantes vers chaque microservice
+    POOL_MAX_CONNECTIONS: int = int(os.getenv("POOL_MAX_CONNECTIONS", "100"))
+    POOL_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("POOL_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    POOL_KEEPALIVE_EXPIRY: float = float(os.getenv("POOL_KEEPALIVE_EXPIRY", "30"))
+    POOL_HTTP2: bool = os.getenv("POOL_HTTP2", "false").lower() == "true"
+    
+    # Répartition de charge entre les instances d'un service (sinon URL unique, répartie par kube-proxy)
+    # SERVICE_ENDPOINTS : {service: [urls]} ; SERVICE_DNS : {service: "http://service-headless:port"}
+    SERVICE_ENDPOINTS: Dict[str, List[str]] = json.loads(os.getenv("SERVICE_ENDPOINTS", "{}"))
+    SERVICE_DNS: Dict[str, str] = json.loads(os.getenv("SERVICE_DNS", "{}"))
+    DNS_REFRESH_INTERVAL: float = float(os.getenv("DNS_REFRESH_INTERVAL", "10"))
+    LB_STRATEGY: str = os.getenv("LB_STRATEGY", "p2c")  # "p2c" ou "least_outstanding"
+    EJECTION_CONSECUTIVE_FAILURES: int = int(os.getenv("EJECTION_CONSECUTIVE_FAILURES", "5"))
+    EJECTION_BASE_DURATION_S: float = float(os.getenv("EJECTION_BASE_DURATION_S", "30"))
+    EJECTION_MAX_PERCENT: float = float(os.getenv("EJECTION_MAX_PERCENT", "50"))
+    
+    # Circuit breaker par microservice (fast-fail quand un service est dégradé)
+    BREAKER_WINDOW_S: float = float(os.getenv("BREAKER_WINDOW_S", "30"))
+    BREAKER_MIN_CALLS: int = int(os.getenv("BREAKER_MIN_CALLS", "10"))
+    BREAKER_ERROR_RATE: float = float(os.getenv("BREAKER_ERROR_RATE", "0.5"))
+    BREAKER_SLOW_CALL_MS: float = float(os.getenv("BREAKER_SLOW_CALL_MS", "5000"))
+    BREAKER_SLOW_CALL_RATE: float = float(os.getenv("BREAKER_SLOW_CALL_RATE", "0.8"))
+    BREAKER_OPEN_DURATION_S: float = float(os.getenv("BREAKER_OPEN_DURATION_S", "15"))
+    BREAKER_HALF_OPEN_CALLS: int = int(os.getenv("BREAKER_HALF_OPEN_CALLS", "3"))
+    
+    # Limite de concurrence adaptative par microservice (AIMD sur la latence observée)
+    ADAPTIVE_LIMIT_ENABLED: bool = os.getenv("ADAPTIVE_LIMIT_ENABLED", "true").lower() == "true"
+    ADAPTIVE_LIMIT_INITIAL: int = int(os.getenv("ADAPTIVE_LIMIT_INITIAL", "20"))
+    ADAPTIVE_LIMIT_MIN: int = int(os.getenv("ADAPTIVE_LIMIT_MIN", "2"))
+    ADAPTIVE_LIMIT_MAX: int = int(os.getenv("ADAPTIVE_LIMIT_MAX", "200"))
+    ADAPTIVE_LIMIT_BACKOFF: float = float(os.getenv("ADAPTIVE_LIMIT_BACKOFF", "0.9"))
+    ADAPTIVE_LIMIT_LATENCY_TOLERANCE: float = float(os.getenv("ADAPTIVE_LIMIT_LATENCY_TOLERANCE", "2.0"))
+    ADAPTIVE_LIMIT_SLOW_FLOOR_MS: float = float(os.getenv("ADAPTIVE_LIMIT_SLOW_FLOOR_MS", "50"))
+    ADAPTIVE_LIMIT_BASELINE_WINDOW: int = int(os.getenv("ADAPTIVE_LIMIT_BASELINE_WINDOW", "250"))
+    ADAPTIVE_LIMIT_QUEUE_SIZE: int = int(os.getenv("ADAPTIVE_LIMIT_QUEUE_SIZE", "100"))
+    ADAPTIVE_LIMIT_QUEUE_TIMEOUT_MS: float = float(os.getenv("ADAPTIVE_LIMIT_QUEUE_TIMEOUT_MS", "50"))
+    
+    # Retries des méthodes idempotentes (backoff exponentiel avec jitter, budget global)
+    RETRY_ENABLED: bool = os.getenv("RETRY_ENABLED", "true").lower() == "true"
+    RETRY_MAX_ATTEMPTS: int = int(os.getenv("RETRY_MAX_ATTEMPTS", "2"))  # retries après le 1er essai
+    RETRY_BACKOFF_BASE_MS: float = float(os.getenv("RETRY_BACKOFF_BASE_MS", "50"))
+    RETRY_BACKOFF_MAX_MS: float = float(os.getenv("RETRY_BACKOFF_MAX_MS", "1000"))
+    RETRY_STATUS_CODES: tuple = (502, 503, 504)
+    RETRY_BUDGET_RATIO: float = float(os.getenv("RETRY_BUDGET_RATIO", "0.1"))
+    RETRY_BUDGET_MIN_PER_S: float = float(os.getenv("RETRY_BUDGET_MIN_PER_S", "5"))
+    RETRY_BUDGET_MAX_TOKENS: float = float(os.getenv("RETRY_BUDGET_MAX_TOKENS", "50"))
+    
+    # Hedging des GET : requête dupliquée après le p95 du service, la première réponse gagne
+    HEDGE_ENABLED: bool = os.getenv("HEDGE_ENABLED", "false").lower() == "true"
+    HEDGE_SAMPLE_SIZE: int = int(os.getenv("HEDGE_SAMPLE_SIZE", "200"))
+    HEDGE_MIN_SAMPLES: int = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+    HEDGE_MIN_DELAY_MS: float = float(os.getenv("HEDGE_MIN_DELAY_MS", "10"))
+    
+    # Cache de réponses des GET par utilisateur (TTL par préfixe de route, 0 = pas de cache)
+    CACHE_ENABLED: bool = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+    CACHE_MAX_BYTES: int = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    CACHE_MAX_ENTRY_BYTES: int = int(os.getenv("CACHE_MAX_ENTRY_BYTES", str(1024 * 1024)))
+    CACHE_ROUTE_TTLS: Dict[str, float] = json.loads(os.getenv(
+        "CACHE_ROUTE_TTLS",
+        '{"/projects": 10, "/builds": 2, "/monitor": 2}'
+    ))
+    
+    # Politiques par préfixe de route (relatif à API_V1_PREFIX, "*" = un segment quelconque)
+    # Champs : auth_required, timeout, cache_ttl, max_body_bytes, streaming, internal
+    MAX_BODY_BYTES: int = int(os.getenv("MAX_BODY_BYTES", str(10 * 1024 * 1024)))
+    ROUTE_POLICIES: Dict[str, Dict[str, Any]] = json.loads(os.getenv(
+        "ROUTE_POLICIES",
+        '{"/auth/login": {"auth_required": false}, '
+        '"/auth/register": {"auth_required": false}, '
+        '"/auth/refresh": {"auth_required": false}, '
+        '"/auth/logout": {"auth_required": false}, '
+        '"/auth/health": {"auth_required": false}, '
+        '"/auth": {"max_body_bytes": 65536}, '
+        '"/auth/revocations": {"internal": true}, '
+        '"/auth/stats": {"internal": true}, '
+        '"/auth/metrics": {"internal": true}, '
+        '"/auth/admin": {"internal": true}, '
+        '"/builds/builds/*/logs": {"streaming": true, "timeout": 300}, '
+        '"/monitor/deployments/*/events": {"streaming": true, "timeout": 300}}'
+    ))
+    
+    # Flux longs (SSE, logs, WebSocket) - le timeout de la route sert de timeout d'inactivité
+    SSE_HEARTBEAT_INTERVAL: float = float(os.getenv("SSE_HEARTBEAT_INTERVAL", "15"))
+    STREAM_QUEUE_CHUNKS: int = int(os.getenv("STREAM_QUEUE_CHUNKS", "16"))
+    WEBSOCKET_PING_INTERVAL: float = float(os.getenv("WEBSOCKET_PING_INTERVAL", "20"))
+    
+    # Fusion des GET identiques en vol (single-flight) vers un seul appel upstream
+    COALESCE_REQUESTS: bool = os.getenv("COALESCE_REQUESTS", "true").lower() == "true"
+    
+    # Endpoint batch : sous-requêtes exécutées en parallèle sous une seule vérification JWT
+    BATCH_MAX_REQUESTS: int = int(os.getenv("BATCH_MAX_REQUESTS", "20"))
+    BATCH_MAX_CONCURRENCY: int = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+    
+    # Limitation de débit par utilisateur (token bucket par préfixe de service)
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_SHARDS: int = int(os.getenv("RATE_LIMIT_SHARDS", "64"))
+    # {service: {"rate": requêtes/s, "burst": capacité du bucket}}
+    RATE_LIMITS: Dict[str, Dict[str, float]] = json.loads(os.getenv(
+        "RATE_LIMITS",
+        '{"auth": {"rate": 5, "burst": 20}, "projects": {"rate": 20, "burst": 40}, '
+        '"builds": {"rate": 5, "burst": 20}, "monitor": {"rate": 10, "burst": 20}}'
+    ))
+    # Requêtes simultanées max par utilisateur sur les routes coûteuses ("MÉTHODE regex du chemin gateway")
+    CONCURRENCY_LIMITS: Dict[str, int] = json.loads(os.getenv(
+        "CONCURRENCY_LIMITS",
+        '{"POST /builds/builds$": 2, "POST /monitor/deploy$": 2, '
+        '"POST /projects/projects/[^/]+/deploy$": 2}'
+    ))
+    
+    # Health checks des microservices (sondes concurrentes rafraîchies en arrière-plan)
+    HEALTH_CHECK_INTERVAL: float = float(os.getenv("HEALTH_CHECK_INTERVAL", "10"))
+    HEALTH_CHECK_TIMEOUT: float = float(os.getenv("HEALTH_CHECK_TIMEOUT", "5"))
+    HEALTH_HISTORY_SIZE: int = int(os.getenv("HEALTH_HISTORY_SIZE", "20"))
+    
+    # Compression des réponses négociée avec le client (brotli puis gzip)
+    COMPRESSION_ENABLED: bool = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    COMPRESSION_BROTLI_QUALITY: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+    COMPRESSIBLE_CONTENT_TYPES: tuple = (
+        "application/json",
+        "application/x-ndjson",
+        "application/javascript",
+        "application/xml",
+        "application/yaml"
+    )
+    
+    # Tracing distribué W3C (traceparent) : sink "file", "otlp" ou "none" (propagation seule)
+    TRACE_EXPORTER: str = os.getenv("TRACE_EXPORTER", "none")
+    TRACE_SAMPLE_RATIO: float = float(os.getenv("TRACE_SAMPLE_RATIO", "0.05"))
+    TRACE_FILE: str = os.getenv("TRACE_FILE", "/tmp/nokube-traces.jsonl")
+    OTLP_ENDPOINT: str = os.getenv("OTLP_ENDPOINT", "http://localhost:4318")
+    TRACE_EXPORT_INTERVAL: float = float(os.getenv("TRACE_EXPORT_INTERVAL", "5"))
+    TRACE_MAX_QUEUE: int = int(os.getenv("TRACE_MAX_QUEUE", "2048"))
+    # Suivre le flag "sampled" du traceparent reçu (uniquement si seuls des appelants internes joignent la gateway)
+    TRACE_TRUST_INBOUND_SAMPLED: bool = os.getenv("TRACE_TRUST_INBOUND_SAMPLED", "false").lower() == "true"
+    
+    # Mode de proxy : "stream" (pass-through brut des bodies) ou "json" (parse/re-sérialisation)
+    PROXY_MODE: str = os.getenv("PROXY_MODE", "stream")
+    
+    # Headers du client transmis tels quels aux microservices en mode stream
+    FORWARDED_REQUEST_HEADERS: tuple = (
+        "accept",
+        "accept-encoding",
+        "authorization",
+        "cache-control",
+        "content-length",
+        "content-type",
+        "last-event-id"
+    )
+    
     # JWT configuration - pour l'authentification centralisée
     JWT_SECRET: str = os.getenv("JWT_SECRET")
     JWT_ALGORITHM: str = "HS256"
     
+    # Cache des tokens déjà vérifiés (évite un décodage HMAC par requête)
+    JWT_CACHE_MAX_SIZE: int = int(os.getenv("JWT_CACHE_MAX_SIZE", "10000"))
+    JWT_CACHE_MAX_TTL: int = int(os.getenv("JWT_CACHE_MAX_TTL", "300"))  # tokens sans exp
+    JWT_CACHE_NEGATIVE_TTL: int = int(os.getenv("JWT_CACHE_NEGATIVE_TTL", "30"))
+    
+    # Révocation des access tokens : liste poussée par l'Auth Service (SSE), filtre de Bloom + ensemble exact
+    REVOCATION_STREAM_ENABLED: bool = os.getenv("REVOCATION_STREAM_ENABLED", "true").lower() == "true"
+    REVOCATION_STREAM_URL: str = os.getenv("REVOCATION_STREAM_URL", f"{AUTH_SERVICE_URL}/revocations/stream")
+    REVOCATION_STREAM_READ_TIMEOUT: float = float(os.getenv("REVOCATION_STREAM_READ_TIMEOUT", "45"))
+    REVOCATION_BLOOM_CAPACITY: int = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "10000"))
+    REVOCATION_BLOOM_FP_RATE: float = float(os.getenv("REVOCATION_BLOOM_FP_RATE", "0.001"))
+    
     # Configuration des routes - mapping des services
     SERVICE_ROUTES: Dict[str, str] = {
         "auth": AUTH_SERVICE_URL,
@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Deque
+from app.config import settings
+from app.schemas import ServiceStatus
+from app.client import service_client
+
+logger = logging.getLogger(__name__)
+
+class HealthMonitor:
+    """
+    Snapshot de santé des microservices rafraîchi en arrière-plan
+
+    Tous les services sont sondés en parallèle toutes les HEALTH_CHECK_INTERVAL
+    secondes : /ready et /services/status servent le dernier snapshot sans
+    attendre les backends.
+    """
+
+    def __init__(self, service_client):
+        self.service_client = service_client
+        self.snapshot: Dict[str, ServiceStatus] = {}
+        self.checked_at: Dict[str, float] = {}
+        self.history: Dict[str, Deque[float]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Lancer le rafraîchissement périodique (sans bloquer le démarrage)"""
+        self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"Health refresh failed: {e}")
+            await asyncio.sleep(settings.HEALTH_CHECK_INTERVAL)
+
+    async def _probe(self, service_name: str) -> ServiceStatus:
+        try:
+            return await self.service_client.check_service_health(service_name)
+        except Exception as e:
+            return ServiceStatus(
+                service=service_name,
+                url=settings.SERVICE_ROUTES.get(service_name, "unknown"),
+                status=f"error: {str(e)}"
+            )
+
+    async def refresh(self):
+        """Sonder tous les services en parallèle et mettre à jour le snapshot"""
+        service_names = list(settings.SERVICE_ROUTES.keys())
+        results = await asyncio.gather(*(self._probe(name) for name in service_names))
+
+        now = time.time()
+        for service_name, service_status in zip(service_names, results):
+            history = self.history.setdefault(
+                service_name, deque(maxlen=settings.HEALTH_HISTORY_SIZE)
+            )
+            if service_status.response_time_ms is not None:
+                history.append(round(service_status.response_time_ms, 2))
+
+            self.snapshot[service_name] = service_status
+            self.checked_at[service_name] = now
+
+    async def get_statuses(self) -> List[ServiceStatus]:
+        """Statut de chaque service depuis le snapshot (sondage immédiat s'il est vide)"""
+        if not self.snapshot:
+            await self.refresh()
+
+        now = time.time()
+        statuses = []
+        for service_name in settings.SERVICE_ROUTES.keys():
+            service_status = self.snapshot.get(service_name)
+            if service_status is None:
+                continue
+
+            checked_at = self.checked_at[service_name]
+            statuses.append(service_status.model_copy(update={
+                "checked_at": datetime.fromtimestamp(checked_at),
+                "staleness_s": round(now - checked_at, 3),
+                "latency_history_ms": list(self.history.get(service_name, []))
+            }))
+
+        return statuses
+
+# Instance globale du moniteur de santé
+health_monitor = HealthMonitor(service_client)
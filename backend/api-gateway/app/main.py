@@ -1,25 +1,61 @@
 from fastapi import FastAPI
+from fastapi.responses import Response, JSONResponse
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 from datetime import datetime
 from app.config import settings
 from app.schemas import HealthResponse, ReadyResponse, ServiceStatus
 from app.client import service_client
+from app.auth import token_cache
+from app.revocation import revocation_subscriber
+from app.health import health_monitor
+from app.cache import response_cache
+from app.ratelimit import rate_limiter
 from app.middleware import LoggingMiddleware, CORSMiddleware
+from app.metrics import MetricsMiddleware, registry
+from app.compression import CompressionMiddleware
+from app.tracing import TracingMiddleware, tracer
+from app.responses import FastJSONResponse
 from app.routes import services_router
+from app.batch import batch_router
+from app.router import route_table
 
 # Création de l'application FastAPI
 app = FastAPI(
     title=settings.TITLE,
     description=settings.DESCRIPTION,
-    version=settings.VERSION
+    version=settings.VERSION,
+    default_response_class=FastJSONResponse
 )
 
 # Ajout des middlewares
 app.add_middleware(LoggingMiddleware)
 app.add_middleware(CORSMiddleware)
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(TracingMiddleware)
+# En dernier : le plus externe, mesure la durée complète vue par le client
+app.add_middleware(MetricsMiddleware)
 
-# Inclusion des routes des services
+# Inclusion de l'endpoint batch puis des routes des services (proxy générique en dernier)
+app.include_router(batch_router, prefix=settings.API_V1_PREFIX)
 app.include_router(services_router, prefix=settings.API_V1_PREFIX)
 
+# Events de cycle de vie
+@app.on_event("startup")
+async def startup():
+    """Ouvrir les pools de connexions, lancer les health checks, l'abonnement aux révocations et l'export des traces en arrière-plan"""
+    await service_client.start()
+    await health_monitor.start()
+    await revocation_subscriber.start()
+    await tracer.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Arrêter les health checks et l'abonnement aux révocations, fermer les pools de connexions et exporter les derniers spans"""
+    await health_monitor.stop()
+    await revocation_subscriber.stop()
+    await service_client.close()
+    await tracer.stop()
+
 @app.get("/")
 async def root():
     """Endpoint racine de l'API Gateway"""
@@ -31,6 +67,7 @@ async def root():
         "endpoints": {
             "health": "/health",
             "ready": "/ready",
+            "metrics": "/metrics",
             "docs": "/docs",
             "api": settings.API_V1_PREFIX
         }
@@ -47,17 +84,12 @@ async def health_check():
 
 @app.get("/ready", response_model=ReadyResponse)
 async def readiness_check():
-    """Readiness check - vérifie la disponibilité des services backend"""
+    """Readiness check - disponibilité des services backend (snapshot en mémoire)"""
     
-    services_status = {}
-    
-    # Vérifier chaque service backend
-    for service_name in settings.SERVICE_ROUTES.keys():
-        try:
-            service_status = await service_client.check_service_health(service_name)
-            services_status[service_name] = service_status.status
-        except Exception as e:
-            services_status[service_name] = f"error: {str(e)}"
+    services_status = {
+        service_status.service: service_status.status
+        for service_status in await health_monitor.get_statuses()
+    }
     
     return ReadyResponse(
         status="ready",
@@ -68,19 +100,16 @@ async def readiness_check():
 async def services_status():
     """Endpoint pour obtenir le statut détaillé de tous les services"""
     
-    services = []
-    
-    for service_name in settings.SERVICE_ROUTES.keys():
-        try:
-            service_status = await service_client.check_service_health(service_name)
-            services.append(service_status.dict())
-        except Exception as e:
-            services.append({
-                "service": service_name,
-                "url": settings.SERVICE_ROUTES.get(service_name, "unknown"),
-                "status": "error",
-                "error": str(e)
-            })
+    circuits = service_client.breakers.get_states()
+    limits = service_client.limiters.get_states()
+    services = [
+        {
+            **service_status.dict(),
+            "circuit": circuits.get(service_status.service),
+            "concurrency": limits.get(service_status.service)
+        }
+        for service_status in await health_monitor.get_statuses()
+    ]
     
     return {
         "gateway": "api-gateway",
@@ -88,22 +117,128 @@ async def services_status():
         "services": services
     }
 
+@app.get("/gateway/pools")
+async def pools_status():
+    """Statistiques des pools de connexions vers les microservices"""
+    return {
+        "gateway": "api-gateway",
+        "timestamp": datetime.now(),
+        **service_client.pool.get_stats()
+    }
+
+@app.get("/gateway/auth-cache")
+async def auth_cache_status():
+    """Statistiques du cache de vérification des JWT"""
+    return {
+        "gateway": "api-gateway",
+        "timestamp": datetime.now(),
+        **token_cache.get_stats()
+    }
+
+@app.get("/gateway/revocations")
+async def revocations_status():
+    """État de la liste de révocation des access tokens (flux de l'Auth Service, filtre de Bloom)"""
+    return {
+        "gateway": "api-gateway",
+        "timestamp": datetime.now(),
+        **revocation_subscriber.get_stats()
+    }
+
+@app.get("/gateway/cache")
+async def response_cache_status():
+    """Statistiques du cache de réponses (taux de hit, mémoire, invalidations)"""
+    return {
+        "gateway": "api-gateway",
+        "timestamp": datetime.now(),
+        **response_cache.get_stats()
+    }
+
+@app.get("/gateway/coalescing")
+async def coalescing_status():
+    """Statistiques de fusion des GET identiques en vol"""
+    return {
+        "gateway": "api-gateway",
+        "timestamp": datetime.now(),
+        **service_client.get_coalescing_stats()
+    }
+
+@app.get("/gateway/routes")
+async def routes_status():
+    """Table de routage : politique par service et surcharges par préfixe"""
+    return {
+        "gateway": "api-gateway",
+        "timestamp": datetime.now(),
+        **route_table.get_routes()
+    }
+
+@app.get("/gateway/retries")
+async def retries_status():
+    """Budget de retries et délais de hedging par service"""
+    return {
+        "gateway": "api-gateway",
+        "timestamp": datetime.now(),
+        **service_client.get_retry_stats()
+    }
+
+@app.get("/gateway/endpoints")
+async def endpoints_status():
+    """Instances de chaque service : charge, erreurs et éjections"""
+    return {
+        "gateway": "api-gateway",
+        "timestamp": datetime.now(),
+        "services": service_client.balancers.get_states()
+    }
+
+@app.get("/gateway/tracing")
+async def tracing_status():
+    """Échantillonnage et export des spans"""
+    return {
+        "gateway": "api-gateway",
+        "timestamp": datetime.now(),
+        **tracer.get_stats()
+    }
+
+@app.get("/gateway/rate-limits")
+async def rate_limits_status():
+    """État du limiteur de débit par utilisateur (buckets actifs, rejets, limites)"""
+    return {
+        "gateway": "api-gateway",
+        "timestamp": datetime.now(),
+        **rate_limiter.get_stats()
+    }
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Métriques Prometheus de la gateway (requêtes, latences, temps upstream)"""
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
 # Gestion des erreurs globales
 @app.exception_handler(404)
 async def not_found_handler(request, exc):
-    return {
+    return JSONResponse(status_code=404, content={
         "error": "Endpoint not found",
         "message": f"The endpoint {request.url.path} does not exist",
         "available_endpoints": [
             "/health",
             "/ready", 
+            "/metrics",
             "/services/status",
+            "/gateway/pools",
+            "/gateway/endpoints",
+            "/gateway/auth-cache",
+            "/gateway/cache",
+            "/gateway/coalescing",
+            "/gateway/routes",
+            "/gateway/retries",
+            "/gateway/rate-limits",
+            "/gateway/tracing",
+            f"{settings.API_V1_PREFIX}/batch",
             f"{settings.API_V1_PREFIX}/auth/*",
             f"{settings.API_V1_PREFIX}/projects/*",
             f"{settings.API_V1_PREFIX}/builds/*",
             f"{settings.API_V1_PREFIX}/monitor/*"
         ]
-    }
+    })
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,183 @@
+import time
+from contextvars import ContextVar
+from typing import List, Optional
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+from starlette.types import ASGIApp, Receive, Scope, Send, Message
+from app.config import settings
+
+# Registre dédié à la gateway (exposé sur /metrics)
+registry = CollectorRegistry()
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+REQUESTS_TOTAL = Counter(
+    "gateway_requests_total",
+    "Requêtes traitées par la gateway",
+    ["service", "method", "status"],
+    registry=registry
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "gateway_requests_in_flight",
+    "Requêtes en cours de traitement",
+    ["service"],
+    registry=registry
+)
+REQUEST_DURATION = Histogram(
+    "gateway_request_duration_seconds",
+    "Durée totale des requêtes vue par le client",
+    ["service", "method", "status"],
+    buckets=LATENCY_BUCKETS,
+    registry=registry
+)
+UPSTREAM_DURATION = Histogram(
+    "gateway_upstream_duration_seconds",
+    "Durée des appels aux microservices (jusqu'à réception des headers)",
+    ["service", "method", "status"],
+    buckets=LATENCY_BUCKETS,
+    registry=registry
+)
+OVERHEAD_DURATION = Histogram(
+    "gateway_overhead_duration_seconds",
+    "Temps passé dans la gateway hors appels aux microservices",
+    ["service", "method"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+    registry=registry
+)
+RATE_LIMITED = Counter(
+    "gateway_rate_limited_total",
+    "Requêtes rejetées (429) par le limiteur de débit",
+    ["service", "reason"],
+    registry=registry
+)
+UPSTREAM_RETRIES = Counter(
+    "gateway_upstream_retries_total",
+    "Requêtes rejouées vers un microservice",
+    ["service", "reason"],
+    registry=registry
+)
+HEDGED_REQUESTS = Counter(
+    "gateway_hedged_requests_total",
+    "GET dupliqués (hedging) et requête gagnante",
+    ["service", "winner"],
+    registry=registry
+)
+LOAD_SHED = Counter(
+    "gateway_load_shed_total",
+    "Requêtes rejetées (503) par la limite de concurrence adaptative",
+    ["service", "reason"],
+    registry=registry
+)
+CONCURRENCY_LIMIT = Gauge(
+    "gateway_concurrency_limit",
+    "Limite de concurrence adaptative courante par service",
+    ["service"],
+    registry=registry
+)
+ENDPOINT_EJECTIONS = Counter(
+    "gateway_endpoint_ejections_total",
+    "Instances écartées de la répartition après des échecs consécutifs",
+    ["service"],
+    registry=registry
+)
+COMPRESSION_SECONDS = Counter(
+    "gateway_compression_seconds_total",
+    "Temps CPU passé à compresser les réponses",
+    ["encoding"],
+    registry=registry
+)
+COMPRESSION_BYTES = Counter(
+    "gateway_compression_bytes_total",
+    "Octets avant (in) et après (out) compression",
+    ["encoding", "direction"],
+    registry=registry
+)
+STREAMS_ACTIVE = Gauge(
+    "gateway_streams_active",
+    "Flux longs ouverts (logs, SSE, WebSocket)",
+    ["kind"],
+    registry=registry
+)
+REVOKED_TOKENS_REJECTED = Counter(
+    "gateway_revoked_tokens_rejected_total",
+    "Requêtes rejetées (401) avec un access token révoqué",
+    registry=registry
+)
+REVOCATION_LIST_SIZE = Gauge(
+    "gateway_revocation_list_size",
+    "Access tokens révoqués non expirés connus de la gateway",
+    registry=registry
+)
+REVOCATION_STREAM_CONNECTED = Gauge(
+    "gateway_revocation_stream_connected",
+    "1 si le flux de révocations de l'Auth Service est connecté",
+    registry=registry
+)
+
+# Méthodes HTTP gardées telles quelles en label ; toute autre devient "other" (séries bornées)
+STANDARD_METHODS = frozenset({"GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"})
+
+# Temps upstream cumulé de la requête en cours (liste partagée avec les tâches filles)
+upstream_time: ContextVar[Optional[List[float]]] = ContextVar("upstream_time", default=None)
+
+def service_label(path: str) -> str:
+    """Préfixe de service d'un chemin (/api/v1/<service>/...), "gateway" sinon"""
+    prefix = settings.API_V1_PREFIX + "/"
+    if path.startswith(prefix):
+        service_name = path[len(prefix):].split("/", 1)[0]
+        if service_name in settings.SERVICE_ROUTES:
+            return service_name
+    return "gateway"
+
+def method_label(method: str) -> str:
+    """Label de méthode : verbe standard ou "other" (un client ne crée pas de séries à volonté)"""
+    return method if method in STANDARD_METHODS else "other"
+
+def observe_upstream(service_name: str, method: str, status: str, duration: float):
+    """Enregistrer un appel à un microservice"""
+    UPSTREAM_DURATION.labels(service_name, method, status).observe(duration)
+    add_upstream_time(duration)
+
+def add_upstream_time(duration: float):
+    """Ajouter du temps d'attente upstream à la requête en cours"""
+    accumulator = upstream_time.get()
+    if accumulator is not None:
+        accumulator[0] += duration
+
+class MetricsMiddleware:
+    """Middleware ASGI : compteurs, requêtes en cours et histogrammes de latence"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        service = service_label(scope["path"])
+        method = method_label(scope["method"])
+        status_code = 500
+        accumulator = [0.0]
+        token = upstream_time.set(accumulator)
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_flight = REQUESTS_IN_FLIGHT.labels(service)
+        in_flight.inc()
+        start_time = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start_time
+            in_flight.dec()
+            upstream_time.reset(token)
+
+            status = str(status_code)
+            REQUESTS_TOTAL.labels(service, method, status).inc()
+            REQUEST_DURATION.labels(service, method, status).observe(duration)
+            if service != "gateway":
+                OVERHEAD_DURATION.labels(service, method).observe(max(0.0, duration - accumulator[0]))
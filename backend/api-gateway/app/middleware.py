@@ -1,47 +1,88 @@
 import time
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Receive, Scope, Send, Message
 import logging
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware pour logger les requêtes"""
-    
-    async def dispatch(self, request: Request, call_next):
+class LoggingMiddleware:
+    """Middleware ASGI pour logger les requêtes (sans bufferiser les réponses streamées)"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         start_time = time.time()
-        
+        method = scope["method"]
+        path = scope["path"]
+        status_code = 500
+
         # Logger la requête entrante
-        logger.info(f"Incoming request: {request.method} {request.url}")
-        
-        # Traiter la requête
-        response = await call_next(request)
-        
-        # Calculer le temps de traitement
-        process_time = time.time() - start_time
-        
-        # Logger la réponse
-        logger.info(
-            f"Request processed: {request.method} {request.url} "
-            f"- Status: {response.status_code} - Time: {process_time:.3f}s"
-        )
-        
-        # Ajouter le temps de traitement dans les headers
-        response.headers["X-Process-Time"] = str(process_time)
-        
-        return response
-
-class CORSMiddleware(BaseHTTPMiddleware):
-    """Middleware CORS simple pour le développement"""
-    
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        
-        # Ajouter les headers CORS
-        response.headers["Access-Control-Allow-Origin"] = "*"
-        response.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, DELETE, OPTIONS"
-        response.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization"
-        
-        return response
\ No newline at end of file
+        logger.info(f"Incoming request: {method} {path}")
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # Ajouter le temps de traitement dans les headers
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Process-Time", str(time.time() - start_time))
+            await send(message)
+
+        try:
+            # Traiter la requête
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Calculer le temps de traitement et logger la réponse
+            process_time = time.time() - start_time
+            logger.info(
+                f"Request processed: {method} {path} "
+                f"- Status: {status_code} - Time: {process_time:.3f}s"
+            )
+
+class CORSMiddleware:
+    """Middleware CORS ASGI simple pour le développement (preflight OPTIONS répondu directement)"""
+
+    CORS_HEADERS = {
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
+        "Access-Control-Allow-Headers": "Content-Type, Authorization"
+    }
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.preflight_headers = [
+            (key.lower().encode("latin-1"), value.encode("latin-1"))
+            for key, value in self.CORS_HEADERS.items()
+        ] + [(b"access-control-max-age", b"600"), (b"content-length", b"0")]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Preflight : réponse immédiate sans passer par les routes
+        if scope["method"] == "OPTIONS":
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": self.preflight_headers
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                # Ajouter les headers CORS
+                headers = MutableHeaders(scope=message)
+                for key, value in self.CORS_HEADERS.items():
+                    headers[key] = value
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
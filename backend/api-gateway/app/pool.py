@@ -0,0 +1,101 @@
+import time
+import httpx
+from typing import Dict, Any, Optional
+from app.config import settings
+
+class ServicePool:
+    """Pool de clients HTTP persistants (keep-alive) par microservice"""
+
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        # Transport injectable (tests) - sinon transport réseau httpx par défaut
+        self.transport = transport
+        self.clients: Dict[str, httpx.AsyncClient] = {}
+        self.stats: Dict[str, Dict[str, Any]] = {}
+
+    def _create_client(self, service_name: str) -> httpx.AsyncClient:
+        """Créer le client d'un service avec les limites du pool"""
+        limits = httpx.Limits(
+            max_connections=settings.POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.POOL_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.POOL_KEEPALIVE_EXPIRY
+        )
+        self.stats[service_name] = {
+            "created_at": time.time(),
+            "requests": 0,
+            "in_flight": 0,
+            "errors": 0
+        }
+        return httpx.AsyncClient(
+            timeout=settings.SERVICE_TIMEOUT,
+            limits=limits,
+            http2=settings.POOL_HTTP2,
+            transport=self.transport
+        )
+
+    async def start(self):
+        """Ouvrir un client par service au démarrage de la gateway"""
+        for service_name in settings.SERVICE_ROUTES.keys():
+            if service_name not in self.clients:
+                self.clients[service_name] = self._create_client(service_name)
+
+    async def close(self):
+        """Fermer toutes les connexions à l'arrêt de la gateway"""
+        for client in self.clients.values():
+            await client.aclose()
+        self.clients.clear()
+
+    def get_client(self, service_name: str) -> httpx.AsyncClient:
+        """Récupérer le client du service (création paresseuse si besoin)"""
+        client = self.clients.get(service_name)
+        if client is None or client.is_closed:
+            client = self._create_client(service_name)
+            self.clients[service_name] = client
+        return client
+
+    def request_started(self, service_name: str):
+        stats = self.stats.get(service_name)
+        if stats is not None:
+            stats["requests"] += 1
+            stats["in_flight"] += 1
+
+    def request_finished(self, service_name: str, error: bool = False):
+        stats = self.stats.get(service_name)
+        if stats is not None:
+            stats["in_flight"] -= 1
+            if error:
+                stats["errors"] += 1
+
+    def _connection_stats(self, client: httpx.AsyncClient) -> Dict[str, int]:
+        """Compter les connexions ouvertes/inactives du pool httpcore sous-jacent"""
+        pool = getattr(getattr(client, "_transport", None), "_pool", None)
+        connections = getattr(pool, "connections", None)
+        if connections is None:
+            return {"open": 0, "idle": 0}
+
+        idle = sum(1 for conn in connections if conn.is_idle())
+        return {"open": len(connections), "idle": idle}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Statistiques des pools par service"""
+        pools = {}
+        for service_name, client in self.clients.items():
+            stats = self.stats.get(service_name, {})
+            pools[service_name] = {
+                "url": settings.SERVICE_ROUTES.get(service_name, "unknown"),
+                "closed": client.is_closed,
+                "requests": stats.get("requests", 0),
+                "in_flight": stats.get("in_flight", 0),
+                "errors": stats.get("errors", 0),
+                "uptime_s": round(time.time() - stats.get("created_at", time.time()), 1),
+                "connections": self._connection_stats(client)
+            }
+
+        return {
+            "limits": {
+                "max_connections": settings.POOL_MAX_CONNECTIONS,
+                "max_keepalive_connections": settings.POOL_MAX_KEEPALIVE_CONNECTIONS,
+                "keepalive_expiry_s": settings.POOL_KEEPALIVE_EXPIRY,
+                "http2": settings.POOL_HTTP2
+            },
+            "pools": pools
+        }
@@ -0,0 +1,166 @@
+import math
+import re
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Optional, Tuple
+from fastapi import HTTPException
+from app.config import settings
+from app.metrics import RATE_LIMITED
+
+# Nombre d'appels entre deux nettoyages d'un shard (buckets pleins = inutiles)
+SWEEP_EVERY = 1024
+
+class RateLimiter:
+    """
+    Limiteur de débit par utilisateur, en mémoire du processus
+
+    - token bucket par (utilisateur, service) : "rate" jetons/s, capacité "burst"
+    - plafond de requêtes simultanées par utilisateur sur les routes coûteuses
+
+    Les buckets sont répartis en shards selon le hash du username : un bucket
+    redevenu plein équivaut à un bucket absent, les shards sont donc nettoyés
+    un par un au fil des appels, sans jamais parcourir tous les utilisateurs.
+    """
+
+    def __init__(
+        self,
+        limits: Dict[str, Dict[str, float]],
+        concurrency_limits: Dict[str, int],
+        shards: int
+    ):
+        self.limits = {
+            service: (float(limit["rate"]), float(limit["burst"]))
+            for service, limit in limits.items()
+        }
+        self.shards: List[Dict[Tuple[str, str], List[float]]] = [{} for _ in range(max(1, shards))]
+        self.concurrency_rules = []
+        for rule, limit in concurrency_limits.items():
+            method, pattern = rule.split(" ", 1)
+            self.concurrency_rules.append((rule, method.upper(), re.compile(pattern), limit))
+        self.in_flight: Dict[Tuple[str, str], int] = {}
+        self.calls = 0
+        self.sweep_index = 0
+        self.rejected_rate = 0
+        self.rejected_concurrency = 0
+
+    def _shard(self, username: str) -> Dict[Tuple[str, str], List[float]]:
+        return self.shards[hash(username) % len(self.shards)]
+
+    def consume(self, username: str, service_name: str) -> Optional[float]:
+        """Consommer un jeton ; retourne le délai avant le prochain jeton si le bucket est vide"""
+        limit = self.limits.get(service_name)
+        if limit is None:
+            return None
+        rate, burst = limit
+        now = time.monotonic()
+
+        self.calls += 1
+        if self.calls % SWEEP_EVERY == 0:
+            self._sweep(now)
+
+        shard = self._shard(username)
+        key = (username, service_name)
+        bucket = shard.get(key)
+        if bucket is None:
+            bucket = shard[key] = [burst, now]
+        else:
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+
+        if bucket[0] < 1:
+            return (1 - bucket[0]) / rate
+        bucket[0] -= 1
+        return None
+
+    def _sweep(self, now: float):
+        """Supprimer les buckets pleins d'un shard (recréés à l'identique au besoin)"""
+        shard = self.shards[self.sweep_index]
+        self.sweep_index = (self.sweep_index + 1) % len(self.shards)
+        for key in [
+            key for key, (tokens, updated_at) in shard.items()
+            if tokens + (now - updated_at) * self.limits[key[1]][0] >= self.limits[key[1]][1]
+        ]:
+            del shard[key]
+
+    def concurrency_rule(self, method: str, gateway_path: str) -> Optional[Tuple[str, int]]:
+        """Règle de concurrence applicable à la requête (nom, limite)"""
+        for rule, rule_method, pattern, limit in self.concurrency_rules:
+            if method == rule_method and pattern.search(gateway_path):
+                return rule, limit
+        return None
+
+    @asynccontextmanager
+    async def limit(self, username: str, service_name: str, method: str, gateway_path: str):
+        """
+        Appliquer débit et concurrence à une requête d'un utilisateur
+
+        La concurrence est vérifiée avant le débit : une requête refusée
+        faute de place ne consomme pas de jeton.
+
+        Raises:
+            HTTPException: 429 avec Retry-After si une limite est atteinte
+        """
+        rule = self.concurrency_rule(method, gateway_path)
+        key = None
+        if rule is not None:
+            rule_name, max_concurrent = rule
+            key = (username, rule_name)
+            if self.in_flight.get(key, 0) >= max_concurrent:
+                self.rejected_concurrency += 1
+                RATE_LIMITED.labels(service_name, "concurrency").inc()
+                raise HTTPException(
+                    status_code=429,
+                    detail=f"Too many concurrent requests ({max_concurrent} max)",
+                    headers={"Retry-After": "1"}
+                )
+
+        retry_after = self.consume(username, service_name)
+        if retry_after is not None:
+            self.rejected_rate += 1
+            RATE_LIMITED.labels(service_name, "rate").inc()
+            raise HTTPException(
+                status_code=429,
+                detail=f"Rate limit exceeded for {service_name}",
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+
+        if key is None:
+            yield
+            return
+
+        self.in_flight[key] = self.in_flight.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            remaining = self.in_flight[key] - 1
+            if remaining:
+                self.in_flight[key] = remaining
+            else:
+                del self.in_flight[key]
+
+    def clear(self):
+        for shard in self.shards:
+            shard.clear()
+        self.in_flight.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.RATE_LIMIT_ENABLED,
+            "shards": len(self.shards),
+            "buckets": sum(len(shard) for shard in self.shards),
+            "in_flight": len(self.in_flight),
+            "rejected_rate": self.rejected_rate,
+            "rejected_concurrency": self.rejected_concurrency,
+            "limits": {
+                service: {"rate": rate, "burst": burst}
+                for service, (rate, burst) in self.limits.items()
+            },
+            "concurrency_limits": {rule: limit for rule, _, _, limit in self.concurrency_rules}
+        }
+
+# Instance globale du limiteur de débit
+rate_limiter = RateLimiter(
+    limits=settings.RATE_LIMITS,
+    concurrency_limits=settings.CONCURRENCY_LIMITS,
+    shards=settings.RATE_LIMIT_SHARDS
+)
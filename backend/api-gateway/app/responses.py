@@ -0,0 +1,31 @@
+from decimal import Decimal
+from typing import Any
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+def _default(value: Any) -> Any:
+    """Types non gérés nativement par orjson (datetime, date, UUID, Enum et dataclasses le sont)"""
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type {type(value).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    """Encoder en JSON (UTF-8) avec orjson"""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+class FastJSONResponse(JSONResponse):
+    """
+    Réponse JSON encodée par orjson (classe de réponse par défaut de l'application)
+
+    Une route qui retourne directement une FastJSONResponse évite aussi le
+    passage par jsonable_encoder et la validation du response_model (conservé
+    pour la documentation OpenAPI).
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,83 @@
+import math
+import random
+import time
+from collections import deque
+from typing import Dict, Any, Deque, Optional
+from app.config import settings
+
+# Méthodes sans effet de bord supplémentaire si la requête est rejouée
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+def backoff_delay(attempt: int) -> float:
+    """Délai avant le retry n° attempt (backoff exponentiel, full jitter), en secondes"""
+    ceiling = min(settings.RETRY_BACKOFF_MAX_MS, settings.RETRY_BACKOFF_BASE_MS * 2 ** attempt)
+    return random.uniform(0, ceiling) / 1000
+
+class RetryBudget:
+    """
+    Budget global de retries (et de requêtes hedgées)
+
+    Chaque requête d'origine dépose RETRY_BUDGET_RATIO jeton, chaque retry en
+    consomme un : les retries restent une fraction du trafic et ne peuvent pas
+    amplifier une panne. Un débit plancher (RETRY_BUDGET_MIN_PER_S) garde des
+    retries possibles à faible trafic.
+    """
+
+    def __init__(self, ratio: float, min_per_s: float, max_tokens: float):
+        self.ratio = ratio
+        self.min_per_s = min_per_s
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self.updated_at = time.monotonic()
+        self.retries = 0
+        self.exhausted = 0
+
+    def deposit(self):
+        """Comptabiliser une requête d'origine"""
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        """Consommer un jeton pour un retry ; False si le budget est épuisé"""
+        now = time.monotonic()
+        self.tokens = min(self.max_tokens, self.tokens + (now - self.updated_at) * self.min_per_s)
+        self.updated_at = now
+        if self.tokens < 1:
+            self.exhausted += 1
+            return False
+        self.tokens -= 1
+        self.retries += 1
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "tokens": round(self.tokens, 2),
+            "max_tokens": self.max_tokens,
+            "ratio": self.ratio,
+            "min_per_s": self.min_per_s,
+            "retries": self.retries,
+            "exhausted": self.exhausted
+        }
+
+class LatencyTracker:
+    """Latences récentes des GET réussis d'un service, pour le délai de hedging (p95)"""
+
+    def __init__(self, size: int, min_samples: int):
+        self.samples: Deque[float] = deque(maxlen=size)
+        self.min_samples = min_samples
+        self.new_samples = 0
+        self.p95_ms: Optional[float] = None
+
+    def record(self, latency_ms: float):
+        self.samples.append(latency_ms)
+        self.new_samples += 1
+
+    def hedge_delay(self) -> Optional[float]:
+        """Délai avant l'envoi d'un GET dupliqué (en secondes), None sans historique suffisant"""
+        if len(self.samples) < self.min_samples:
+            return None
+        # p95 recalculé par lots : tri de quelques centaines de valeurs au plus
+        if self.p95_ms is None or self.new_samples >= self.min_samples:
+            ordered = sorted(self.samples)
+            self.p95_ms = ordered[min(len(ordered) - 1, math.ceil(0.95 * len(ordered)) - 1)]
+            self.new_samples = 0
+        return max(self.p95_ms, settings.HEDGE_MIN_DELAY_MS) / 1000
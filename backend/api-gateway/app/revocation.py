@@ -0,0 +1,225 @@
+import json
+import math
+import time
+import asyncio
+import hashlib
+import logging
+import httpx
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Sequence
+from app.config import settings
+from app.metrics import REVOCATION_LIST_SIZE, REVOCATION_STREAM_CONNECTED
+
+logger = logging.getLogger(__name__)
+
+# Fréquence de purge des révocations expirées (reconstruction du filtre)
+PRUNE_INTERVAL = 60
+
+class BloomFilter:
+    """
+    Filtre de Bloom sur les jti des tokens révoqués
+
+    Dimensionné pour `capacity` éléments au taux de faux positifs demandé.
+    Les k positions sont dérivées d'un seul digest BLAKE2b de 128 bits
+    (double hachage) : un test coûte un hachage et k accès au bitset.
+    """
+
+    __slots__ = ("size", "hashes", "bits")
+
+    def __init__(self, capacity: int, false_positive_rate: float):
+        capacity = max(1, capacity)
+        self.size = max(8, math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+class RevocationList:
+    """
+    Access tokens révoqués connus de la gateway (jti -> exp)
+
+    Le filtre de Bloom répond en O(1) pour le cas courant (token non révoqué,
+    aucun faux négatif possible) ; l'ensemble exact tranche les réponses
+    positives, un faux positif ne rejette donc jamais un token valide. Une
+    révocation ne sert que jusqu'à l'exp du token : les entrées expirées sont
+    purgées et le filtre reconstruit (capacité doublée si nécessaire).
+    """
+
+    def __init__(self, capacity: int, false_positive_rate: float):
+        self.capacity = capacity
+        self.false_positive_rate = false_positive_rate
+        self.exact: Dict[str, float] = {}
+        self.bloom = BloomFilter(capacity, false_positive_rate)
+        self.bloom_hits = 0
+        self.false_positives = 0
+        self.rejected = 0
+
+    def replace(self, entries: Iterable[Sequence[Any]]):
+        """Remplacer toute la liste (snapshot de l'Auth Service) : [(jti, exp), ...]"""
+        now = time.time()
+        self.exact = {jti: exp for jti, exp in entries if exp > now}
+        self._rebuild()
+
+    def add(self, jti: str, exp: float):
+        if exp <= time.time():
+            return
+        self.exact[jti] = exp
+        if len(self.exact) > self.capacity:
+            self.prune()
+        else:
+            self.bloom.add(jti)
+            REVOCATION_LIST_SIZE.set(len(self.exact))
+
+    def prune(self):
+        """Retirer les révocations de tokens expirés (un filtre de Bloom ne supporte pas la suppression)"""
+        now = time.time()
+        self.exact = {jti: exp for jti, exp in self.exact.items() if exp > now}
+        self._rebuild()
+
+    def _rebuild(self):
+        while len(self.exact) > self.capacity:
+            self.capacity *= 2
+        bloom = BloomFilter(self.capacity, self.false_positive_rate)
+        for jti in self.exact:
+            bloom.add(jti)
+        self.bloom = bloom
+        REVOCATION_LIST_SIZE.set(len(self.exact))
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        """True si le token (jti) est révoqué et pas encore expiré"""
+        if jti is None or jti not in self.bloom:
+            return False
+        self.bloom_hits += 1
+        exp = self.exact.get(jti)
+        if exp is None:
+            self.false_positives += 1
+            return False
+        if exp <= time.time():
+            return False
+        self.rejected += 1
+        return True
+
+    def clear(self):
+        self.replace([])
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "revoked": len(self.exact),
+            "capacity": self.capacity,
+            "bloom_bytes": len(self.bloom.bits),
+            "bloom_hashes": self.bloom.hashes,
+            "bloom_hits": self.bloom_hits,
+            "false_positives": self.false_positives,
+            "rejected": self.rejected
+        }
+
+class RevocationSubscriber:
+    """
+    Abonnement au flux de révocations de l'Auth Service (server-sent events)
+
+    Événements : "snapshot" (liste complète, à chaque connexion) puis
+    "revoked" (un token) ; des commentaires de heartbeat maintiennent la
+    connexion. Reconnexion avec backoff exponentiel ; tant que le flux n'a
+    jamais été reçu, aucun token n'est considéré révoqué (tokens de courte
+    durée), la dernière liste reçue reste appliquée pendant une coupure.
+    """
+
+    def __init__(self, revocations: RevocationList, url: str):
+        self.revocations = revocations
+        self.url = url
+        self.connected = False
+        self.connections = 0
+        self.events = 0
+        self.last_event_at: Optional[float] = None
+        self._pruned_at = time.monotonic()
+        self._delay = 1.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if settings.REVOCATION_STREAM_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        timeout = httpx.Timeout(10.0, read=settings.REVOCATION_STREAM_READ_TIMEOUT)
+        while True:
+            try:
+                async with httpx.AsyncClient(timeout=timeout) as client:
+                    async with client.stream("GET", self.url, headers={"Accept": "text/event-stream"}) as response:
+                        response.raise_for_status()
+                        await self.consume(response.aiter_lines())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Flux de révocations interrompu ({self.url}): {e}")
+            self._set_connected(False)
+            await asyncio.sleep(self._delay)
+            self._delay = min(self._delay * 2, 30.0)
+
+    async def consume(self, lines: AsyncIterator[str]):
+        """Appliquer les événements SSE d'un flux (lignes sans le saut de ligne)"""
+        event, data = None, []
+        async for line in lines:
+            if line == "":
+                if data:
+                    self.handle(event or "message", "\n".join(data))
+                event, data = None, []
+            elif line.startswith(":"):
+                # Heartbeat : occasion de purger les révocations expirées
+                if time.monotonic() - self._pruned_at > PRUNE_INTERVAL:
+                    self._pruned_at = time.monotonic()
+                    self.revocations.prune()
+            elif line.startswith("event:"):
+                event = line[6:].strip()
+            elif line.startswith("data:"):
+                data.append(line[5:].lstrip())
+
+    def handle(self, event: str, data: str):
+        payload = json.loads(data)
+        self.events += 1
+        self.last_event_at = time.time()
+        if event == "snapshot":
+            self.revocations.replace(payload["revoked"])
+            self._pruned_at = time.monotonic()
+            self.connections += 1
+            self._delay = 1.0
+            self._set_connected(True)
+        elif event == "revoked":
+            self.revocations.add(payload["jti"], payload["exp"])
+
+    def _set_connected(self, connected: bool):
+        self.connected = connected
+        REVOCATION_STREAM_CONNECTED.set(1 if connected else 0)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.REVOCATION_STREAM_ENABLED,
+            "url": self.url,
+            "connected": self.connected,
+            "connections": self.connections,
+            "events": self.events,
+            "last_event_at": self.last_event_at,
+            **self.revocations.get_stats()
+        }
+
+# Instances globales : liste de révocation et abonnement à l'Auth Service
+revocation_list = RevocationList(settings.REVOCATION_BLOOM_CAPACITY, settings.REVOCATION_BLOOM_FP_RATE)
+revocation_subscriber = RevocationSubscriber(revocation_list, settings.REVOCATION_STREAM_URL)
@@ -0,0 +1,134 @@
+from dataclasses import dataclass, asdict, replace
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import unquote
+from app.config import settings
+
+# Segment joker : correspond à n'importe quel segment de chemin (ex: un id)
+WILDCARD = "*"
+
+@dataclass(frozen=True)
+class RoutePolicy:
+    """Politique appliquée aux requêtes d'une route de la gateway"""
+    service: str
+    auth_required: bool = True
+    timeout: float = settings.SERVICE_TIMEOUT
+    cache_ttl: float = 0  # 0 = pas de cache de réponses
+    max_body_bytes: int = settings.MAX_BODY_BYTES
+    streaming: bool = False  # réponse continue (logs, événements) : jamais bufferisée
+    internal: bool = False  # endpoint réservé aux appels internes (gateways, opérateurs) : jamais exposé
+
+class RouteNode:
+    """Noeud du trie : un segment de chemin et la politique effective à ce niveau"""
+
+    __slots__ = ("children", "wildcard", "policy")
+
+    def __init__(self, policy: RoutePolicy):
+        self.children: Dict[str, "RouteNode"] = {}
+        self.wildcard: Optional["RouteNode"] = None
+        self.policy = policy
+
+class RouteTable:
+    """
+    Table de routage précompilée en trie de segments
+
+    Racine : un noeud par service de SERVICE_ROUTES. Chaque surcharge de
+    politique crée un chemin dans le trie ; les noeuds héritent de la politique
+    de leur parent. Une requête est résolue en parcourant ses segments (le
+    noeud le plus profond gagne, un segment exact avant le joker) : le coût
+    dépend de la profondeur du chemin, pas du nombre de routes ou de services.
+    """
+
+    def __init__(self, services: Dict[str, str], overrides: Dict[str, Dict[str, Any]]):
+        self.root: Dict[str, RouteNode] = {
+            service_name: RouteNode(RoutePolicy(service=service_name))
+            for service_name in services
+        }
+        self.overrides = overrides
+        # Parents avant enfants : chaque noeud hérite de la politique déjà surchargée
+        for prefix, values in sorted(overrides.items(), key=lambda item: len(self._segments(item[0]))):
+            self.add(prefix, values)
+
+    @staticmethod
+    def _segments(path: str) -> List[str]:
+        return [segment for segment in path.split("/") if segment]
+
+    def add(self, prefix: str, values: Dict[str, Any]):
+        """Surcharger la politique d'un préfixe (et des chemins en dessous)"""
+        segments = self._segments(prefix)
+        if not segments or segments[0] not in self.root:
+            raise ValueError(f"Route policy {prefix} does not target a configured service")
+
+        node = self.root[segments[0]]
+        for segment in segments[1:]:
+            if segment == WILDCARD:
+                if node.wildcard is None:
+                    node.wildcard = RouteNode(node.policy)
+                node = node.wildcard
+            else:
+                if segment not in node.children:
+                    node.children[segment] = RouteNode(node.policy)
+                node = node.children[segment]
+        node.policy = replace(node.policy, **values)
+
+    def resolve(self, gateway_path: str) -> Optional[Tuple[RoutePolicy, str]]:
+        """
+        Résoudre un chemin relatif au préfixe d'API (/projects/projects/1)
+
+        Returns:
+            (politique, chemin à transmettre au service), None si le service est
+            inconnu, la route interne ou le chemin ambigu (404 pour le client)
+        """
+        service_name, _, service_path = gateway_path.lstrip("/").partition("/")
+        node = self.root.get(service_name)
+        if node is None or self._ambiguous(service_path):
+            return None
+
+        segments = self._segments(service_path)
+        _, deepest = self._match(node, segments, 0)
+        if deepest.policy.internal:
+            return None
+        return deepest.policy, f"/{service_path}"
+
+    @staticmethod
+    def _ambiguous(service_path: str) -> bool:
+        """
+        Segment vide, "." ou ".." (même encodé en %2e) : httpx normalise ces
+        chemins avant l'appel, le service recevrait une autre route que celle
+        dont la politique a été appliquée (ex: /auth/login/../stats)
+        """
+        segments = service_path.split("/")
+        if segments[-1] == "":
+            segments.pop()  # slash final
+        return any(unquote(segment) in ("", ".", "..") for segment in segments)
+
+    def _match(self, node: RouteNode, segments: List[str], index: int) -> Tuple[int, RouteNode]:
+        best = (index, node)
+        if index == len(segments):
+            return best
+        child = node.children.get(segments[index])
+        if child is not None:
+            best = self._match(child, segments, index + 1)
+        if node.wildcard is not None:
+            candidate = self._match(node.wildcard, segments, index + 1)
+            if candidate[0] > best[0]:
+                best = candidate
+        return best
+
+    def get_routes(self) -> Dict[str, Dict[str, Any]]:
+        """Politiques par service et surcharges configurées (endpoint de diagnostic)"""
+        return {
+            "services": {name: asdict(node.policy) for name, node in self.root.items()},
+            "overrides": self.overrides
+        }
+
+def build_route_table() -> RouteTable:
+    """Construire la table depuis SERVICE_ROUTES, CACHE_ROUTE_TTLS et ROUTE_POLICIES"""
+    overrides: Dict[str, Dict[str, Any]] = {}
+    for prefix, ttl in settings.CACHE_ROUTE_TTLS.items():
+        overrides.setdefault(prefix, {})["cache_ttl"] = ttl
+    for prefix, values in settings.ROUTE_POLICIES.items():
+        overrides.setdefault(prefix, {}).update(values)
+    return RouteTable(settings.SERVICE_ROUTES, overrides)
+
+# Table de routage globale
+route_table = build_route_table()
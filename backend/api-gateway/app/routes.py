@@ -1,134 +1,254 @@
-from fastapi import APIRouter, Request, HTTPException, Header
-from typing import Dict, Any, Optional
+from fastapi import APIRouter, Request, HTTPException, WebSocket, Response
+from typing import Dict, AsyncIterator
 from app.client import service_client
-from app.schemas import ServiceStatus
-from app.auth import verify_jwt_token, is_public_endpoint
-import json
+from app.auth import verify_jwt_token
+from app.config import settings
+from app.cache import response_cache
+from app.ratelimit import rate_limiter
+from app.router import RoutePolicy, route_table
+from app.streaming import relay_websocket
+from urllib.parse import urlencode
 
 # Router pour les routes des microservices
 services_router = APIRouter()
 
-@services_router.api_route("/auth/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
-async def proxy_auth(path: str, request: Request, authorization: Optional[str] = Header(None)):
-    """Proxy vers le service d'authentification"""
-    
-    # Récupérer les données de la requête
-    method = request.method
-    params = dict(request.query_params)
-    
-    # Vérifier si l'endpoint nécessite une authentification
-    full_path = f"/auth/{path}"
+@services_router.api_route("/{gateway_path:path}", methods=["GET", "POST", "PUT", "DELETE"])
+async def proxy(gateway_path: str, request: Request):
+    """
+    Proxy unique vers les microservices, piloté par la table de routage
+
+    Le premier segment désigne le service (/auth, /projects, /builds, /monitor),
+    la politique de la route décide de l'authentification, du timeout, du cache,
+    de la taille max du body et du streaming.
+    """
+    resolved = route_table.resolve(gateway_path)
+    if resolved is None:
+        raise HTTPException(status_code=404, detail="Service not found")
+    policy, service_path = resolved
+
     headers = {}
-    
-    if not is_public_endpoint(full_path):
-        # Endpoint protégé - vérifier JWT et ajouter X-User
-        username = verify_jwt_token(authorization)
+    if policy.auth_required:
+        # Endpoint protégé - vérifier JWT et transmettre le username au service
+        username = verify_jwt_token(request.headers.get("authorization"))
         headers["X-User"] = username
-    
-    # Pour POST/PUT, récupérer le body JSON
-    json_data = None
-    if method in ["POST", "PUT"]:
+
+    return await forward_to_service(policy, service_path, request, headers)
+
+@services_router.websocket("/{gateway_path:path}")
+async def proxy_websocket(websocket: WebSocket, gateway_path: str):
+    """
+    Pass-through WebSocket vers les microservices
+
+    Les navigateurs ne pouvant pas envoyer de header Authorization sur un
+    WebSocket, le JWT est aussi accepté dans le paramètre access_token
+    (retiré avant transmission au service).
+    """
+    resolved = route_table.resolve(gateway_path)
+    if resolved is None:
+        await websocket.close(code=4404)
+        return
+    policy, service_path = resolved
+
+    headers = {}
+    if policy.auth_required:
+        authorization = websocket.headers.get("authorization")
+        token = websocket.query_params.get("access_token")
+        if authorization is None and token:
+            authorization = f"Bearer {token}"
         try:
-            json_data = await request.json()
-        except Exception:
-            pass  # Pas de JSON body
-    
-    # Transmettre la requête au service auth
-    return await service_client.forward_request(
-        service_name="auth",
-        path=f"/{path}",
-        method=method,
-        headers=headers,
-        params=params,
-        json_data=json_data
-    )
+            headers["X-User"] = verify_jwt_token(authorization)
+        except HTTPException:
+            await websocket.close(code=4401)
+            return
+
+    query = urlencode([
+        (key, value) for key, value in websocket.query_params.multi_items()
+        if key != "access_token"
+    ])
+    await relay_websocket(websocket, service_client.balancers.get(policy.service), service_path, query, headers, policy.timeout)
+
+async def forward_to_service(
+    policy: RoutePolicy,
+    service_path: str,
+    request: Request,
+    headers: Dict[str, str]
+):
+    """
+    Transmettre la requête au microservice après application des limites de l'utilisateur
 
-@services_router.api_route("/projects/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
-async def proxy_projects(path: str, request: Request, authorization: Optional[str] = Header(None)):
-    """Proxy vers le service de gestion des projets (authentification requise)"""
-    
-    # Tous les endpoints projects nécessitent une authentification
-    username = verify_jwt_token(authorization)
-    
+    Raises:
+        HTTPException: 429 si l'utilisateur dépasse son débit ou sa concurrence autorisés
+    """
+    username = headers.get("X-User")
+    if not username or not settings.RATE_LIMIT_ENABLED:
+        return await dispatch_request(policy, service_path, request, headers)
+
+    gateway_path = request.url.path[len(settings.API_V1_PREFIX):]
+    async with rate_limiter.limit(username, policy.service, request.method, gateway_path):
+        return await dispatch_request(policy, service_path, request, headers)
+
+async def dispatch_request(
+    policy: RoutePolicy,
+    service_path: str,
+    request: Request,
+    headers: Dict[str, str]
+):
+    """
+    Transmettre la requête au microservice (avec ou sans cache)
+
+    Les GET authentifiés des routes avec un TTL passent par le cache de réponses,
+    les écritures réussies invalident le cache de l'utilisateur pour ce service.
+    """
     method = request.method
-    params = dict(request.query_params)
-    headers = {"X-User": username}  # Transmettre le username au service
-    
-    json_data = None
-    if method in ["POST", "PUT"]:
-        try:
-            json_data = await request.json()
-        except Exception:
-            pass
-    
-    # Router directement le path vers le service (enlever le préfixe projects/)
-    service_path = f"/" if not path else f"/{path}"
-    
-    return await service_client.forward_request(
-        service_name="projects",
-        path=service_path,
-        method=method,
-        headers=headers,
-        params=params,
-        json_data=json_data
-    )
+    username = headers.get("X-User")
+    cache_enabled = bool(username) and settings.CACHE_ENABLED
+
+    if cache_enabled and method == "GET" and policy.cache_ttl > 0 and not policy.streaming:
+        return await fetch_cached(policy, service_path, request, headers, username)
+
+    response = await forward_uncached(policy, service_path, request, headers)
+
+    if cache_enabled and method != "GET":
+        # Mode json : forward_request lève sur un status >= 400, un dict retourné est donc un succès
+        status_code = response.status_code if isinstance(response, Response) else 200
+        # Écriture appliquée : les GET en cache de cet utilisateur sur ce service sont périmés
+        response_cache.write_completed(username, policy.service, status_code)
+
+    return response
+
+def check_content_length(policy: RoutePolicy, request: Request):
+    """Rejeter d'emblée un body annoncé plus grand que la limite de la route"""
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > policy.max_body_bytes:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Request body too large ({policy.max_body_bytes} bytes max)"
+        )
+
+async def limited_body(policy: RoutePolicy, request: Request) -> AsyncIterator[bytes]:
+    """Relayer le body en flux en coupant au-delà de la limite (bodies chunked sans Content-Length)"""
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > policy.max_body_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Request body too large ({policy.max_body_bytes} bytes max)"
+            )
+        yield chunk
 
-@services_router.api_route("/builds/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
-async def proxy_builds(path: str, request: Request, authorization: Optional[str] = Header(None)):
-    """Proxy vers le service de build (authentification requise)"""
-    
-    # Tous les endpoints builds nécessitent une authentification
-    username = verify_jwt_token(authorization)
-    
+async def forward_uncached(
+    policy: RoutePolicy,
+    service_path: str,
+    request: Request,
+    headers: Dict[str, str]
+):
+    """
+    Transmettre la requête au microservice selon le mode de proxy configuré
+
+    - "stream" : bodies relayés en flux d'octets, status et headers d'origine conservés
+    - "json"   : body parsé puis ré-sérialisé, seules les réponses JSON sont supportées
+    """
     method = request.method
+    has_body = method in ["POST", "PUT"]
+    if has_body:
+        check_content_length(policy, request)
+
+    # Headers utiles du client (Authorization pour /auth/logout...) + headers ajoutés par la gateway (X-User)
+    forwarded_headers = {
+        key: value for key, value in request.headers.items()
+        if key in settings.FORWARDED_REQUEST_HEADERS
+    }
+    forwarded_headers.update(headers)
+
+    if settings.PROXY_MODE == "stream":
+        if (
+            method == "GET"
+            and "X-User" in headers
+            and settings.COALESCE_REQUESTS
+            and not policy.streaming
+        ):
+            # GET identiques en vol du même utilisateur fusionnés en un seul appel
+            upstream = await service_client.fetch(
+                service_name=policy.service,
+                path=service_path,
+                headers=forwarded_headers,
+                query=request.url.query,
+                timeout=policy.timeout
+            )
+            return upstream.to_response()
+
+        return await service_client.proxy_request(
+            service_name=policy.service,
+            path=service_path,
+            method=method,
+            headers=forwarded_headers,
+            query=request.url.query,
+            content=limited_body(policy, request) if has_body else None,
+            timeout=policy.timeout,
+            long_lived=policy.streaming
+        )
+
     params = dict(request.query_params)
-    headers = {"X-User": username}  # Transmettre le username au service
-    
+    # Body ré-sérialisé par httpx : ses headers de cadrage d'origine ne s'appliquent plus
+    for key in ("content-length", "content-type"):
+        forwarded_headers.pop(key, None)
+
+    # Pour POST/PUT, récupérer le body JSON
     json_data = None
-    if method in ["POST", "PUT"]:
+    if has_body:
+        body = await request.body()
+        if len(body) > policy.max_body_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Request body too large ({policy.max_body_bytes} bytes max)"
+            )
         try:
             json_data = await request.json()
         except Exception:
-            pass
-    
-    # Router directement le path vers le service (enlever le préfixe builds/)
-    service_path = f"/" if not path else f"/{path}"
-    
+            pass  # Pas de JSON body
+
     return await service_client.forward_request(
-        service_name="builds",
+        service_name=policy.service,
         path=service_path,
         method=method,
-        headers=headers,
+        headers=forwarded_headers,
         params=params,
-        json_data=json_data
+        json_data=json_data,
+        timeout=policy.timeout
     )
 
-@services_router.api_route("/monitor/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
-async def proxy_monitor(path: str, request: Request, authorization: Optional[str] = Header(None)):
-    """Proxy vers le service de monitoring (authentification requise)"""
-    
-    # Tous les endpoints monitor nécessitent une authentification
-    username = verify_jwt_token(authorization)
-    
-    method = request.method
-    params = dict(request.query_params)
-    headers = {"X-User": username}  # Transmettre le username au service
-    
-    json_data = None
-    if method in ["POST", "PUT"]:
-        try:
-            json_data = await request.json()
-        except Exception:
-            pass
-    
-    # Router directement le path vers le service (enlever le préfixe monitor/)
-    service_path = f"/" if not path else f"/{path}"
-    
-    return await service_client.forward_request(
-        service_name="monitor",
+async def fetch_cached(
+    policy: RoutePolicy,
+    service_path: str,
+    request: Request,
+    headers: Dict[str, str],
+    username: str
+):
+    """Servir un GET depuis le cache de réponses, ou l'y stocker après appel au service"""
+    cache_key = response_cache.make_key(
+        username, policy.service, service_path, request.query_params.multi_items()
+    )
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached.to_response({"X-Cache": "HIT"})
+
+    # Relevée avant l'appel : une écriture concurrente rend la réponse non stockable
+    generation = response_cache.generation(username, policy.service)
+
+    # Sans Accept-Encoding : le body stocké est servable à tous les clients
+    forwarded_headers = {
+        key: value for key, value in request.headers.items()
+        if key in settings.FORWARDED_REQUEST_HEADERS and key != "accept-encoding"
+    }
+    forwarded_headers.update(headers)
+
+    upstream = await service_client.fetch(
+        service_name=policy.service,
         path=service_path,
-        method=method,
-        headers=headers,
-        params=params,
-        json_data=json_data
-    )
\ No newline at end of file
+        headers=forwarded_headers,
+        query=request.url.query,
+        timeout=policy.timeout
+    )
+    response_cache.set(cache_key, upstream, policy.cache_ttl, generation)
+    return upstream.to_response({"X-Cache": "MISS"})
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 class HealthResponse(BaseModel):
     status: str
@@ -17,8 +17,35 @@ class GatewayError(BaseModel):
     timestamp: datetime
     details: Optional[str] = None
     
+class EndpointHealth(BaseModel):
+    url: str
+    status: str  # "healthy", "unhealthy", "timeout"
+    response_time_ms: Optional[float] = None
+    ejected: bool = False  # Écartée par le balancer (échecs consécutifs)
+
 class ServiceStatus(BaseModel):
     service: str
     url: str
-    status: str  # "healthy", "unhealthy", "timeout"
-    response_time_ms: Optional[float] = None
\ No newline at end of file
+    status: str  # "healthy", "degraded" (une partie des instances), "unhealthy", "timeout"
+    response_time_ms: Optional[float] = None
+    endpoints: List[EndpointHealth] = []  # Instances sondées (celles du balancer)
+    checked_at: Optional[datetime] = None
+    staleness_s: Optional[float] = None  # Âge du snapshot servi
+    latency_history_ms: List[float] = []
+
+class BatchSubRequest(BaseModel):
+    id: Optional[str] = None  # Identifiant libre renvoyé dans le résultat
+    method: str = "GET"
+    path: str  # Relatif à /api/v1 (ex: /projects/projects?limit=10)
+    body: Optional[Any] = None
+
+class BatchRequest(BaseModel):
+    requests: List[BatchSubRequest]
+
+class BatchSubResponse(BaseModel):
+    id: Optional[str] = None
+    status: int
+    body: Optional[Any] = None
+
+class BatchResponse(BaseModel):
+    responses: List[BatchSubResponse]  # Même ordre que les sous-requêtes
\ No newline at end of file
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import time
+from typing import AsyncIterator, Dict, Optional
+import httpx
+from fastapi import WebSocket
+from starlette.websockets import WebSocketDisconnect
+from websockets.asyncio.client import connect
+from websockets.exceptions import ConnectionClosed, InvalidHandshake
+from app.config import settings
+from app.metrics import STREAMS_ACTIVE
+from app.balancer import ServiceBalancer
+from app.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# Commentaire SSE ignoré par EventSource : garde la connexion ouverte à travers les proxies
+SSE_HEARTBEAT = b": keep-alive\n\n"
+
+# Fin du flux upstream (placée dans la file après le dernier chunk)
+END_OF_STREAM = object()
+
+def is_event_stream(content_type: Optional[str]) -> bool:
+    return (content_type or "").split(";", 1)[0].strip().lower() == "text/event-stream"
+
+async def relay_stream(response: httpx.Response, heartbeat_interval: Optional[float]) -> AsyncIterator[bytes]:
+    """
+    Relayer une réponse longue (logs, SSE) chunk par chunk
+
+    - backpressure : une tâche lit l'upstream dans une file bornée ; si le
+      client lit lentement, la file se remplit et la lecture upstream s'arrête
+    - heartbeat : sans donnée depuis heartbeat_interval, un commentaire SSE
+      est envoyé au client (flux text/event-stream uniquement)
+    - idle timeout : le read timeout de la route coupe proprement un upstream muet
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=settings.STREAM_QUEUE_CHUNKS)
+
+    async def pump():
+        try:
+            async for chunk in response.aiter_raw():
+                await queue.put(chunk)
+        except httpx.ReadTimeout:
+            logger.info(f"Stream idle timeout: {response.request.url}")
+        except httpx.HTTPError as e:
+            logger.warning(f"Stream interrupted: {response.request.url} - {e}")
+        except Exception as e:
+            # Erreur inattendue (décodage, transport...) : le client ne doit pas attendre indéfiniment
+            logger.error(f"Stream failed: {response.request.url} - {e!r}")
+        # Pas de marqueur de fin après une annulation : plus personne ne lit la file
+        await queue.put(END_OF_STREAM)
+
+    reader = asyncio.ensure_future(pump())
+    STREAMS_ACTIVE.labels("sse" if heartbeat_interval else "stream").inc()
+    try:
+        while True:
+            if heartbeat_interval:
+                try:
+                    chunk = await asyncio.wait_for(queue.get(), heartbeat_interval)
+                except asyncio.TimeoutError:
+                    yield SSE_HEARTBEAT
+                    continue
+            else:
+                chunk = await queue.get()
+
+            if chunk is END_OF_STREAM:
+                break
+            yield chunk
+    finally:
+        # Client parti ou flux terminé : arrêter la lecture avant la fermeture de la réponse
+        reader.cancel()
+        STREAMS_ACTIVE.labels("sse" if heartbeat_interval else "stream").dec()
+
+async def relay_websocket(
+    websocket: WebSocket,
+    balancer: ServiceBalancer,
+    path: str,
+    query: str,
+    headers: Dict[str, str],
+    idle_timeout: float
+):
+    """
+    Relayer une connexion WebSocket entre le client et un microservice
+
+    Les messages sont relayés un par un dans chaque sens (envoi attendu avant la
+    lecture suivante, file de réception upstream bornée) ; la connexion upstream
+    est maintenue par des pings, et fermée des deux côtés après idle_timeout
+    secondes sans message. Les pings côté client sont gérés par le serveur ASGI.
+    L'instance reste comptée comme occupée par le répartiteur pendant toute la connexion.
+    """
+    endpoint = balancer.pick()
+    upstream_url = "ws" + endpoint.url[len("http"):] + path
+    if query:
+        upstream_url = f"{upstream_url}?{query}"
+
+    headers = dict(headers)
+    tracer.inject(headers)
+    try:
+        upstream = await connect(
+            upstream_url,
+            additional_headers=headers,
+            open_timeout=settings.SERVICE_TIMEOUT,
+            ping_interval=settings.WEBSOCKET_PING_INTERVAL,
+            ping_timeout=settings.WEBSOCKET_PING_INTERVAL,
+            max_queue=settings.STREAM_QUEUE_CHUNKS
+        )
+    except (OSError, InvalidHandshake, asyncio.TimeoutError) as e:
+        logger.warning(f"WebSocket upstream unavailable: {upstream_url} - {e}")
+        balancer.release(endpoint, failed=True)
+        await websocket.close(code=1011)
+        return
+    except asyncio.CancelledError:
+        balancer.release(endpoint, failed=None)
+        raise
+
+    await websocket.accept()
+    last_activity = time.monotonic()
+
+    async def client_to_upstream():
+        nonlocal last_activity
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            last_activity = time.monotonic()
+            if message.get("text") is not None:
+                await upstream.send(message["text"])
+            elif message.get("bytes") is not None:
+                await upstream.send(message["bytes"])
+
+    async def upstream_to_client():
+        nonlocal last_activity
+        async for message in upstream:
+            last_activity = time.monotonic()
+            if isinstance(message, str):
+                await websocket.send_text(message)
+            else:
+                await websocket.send_bytes(message)
+
+    async def idle_watchdog():
+        while True:
+            remaining = idle_timeout - (time.monotonic() - last_activity)
+            if remaining <= 0:
+                logger.info(f"WebSocket idle timeout: {upstream_url}")
+                return
+            await asyncio.sleep(remaining)
+
+    STREAMS_ACTIVE.labels("websocket").inc()
+    tasks = [
+        asyncio.ensure_future(client_to_upstream()),
+        asyncio.ensure_future(upstream_to_client()),
+        asyncio.ensure_future(idle_watchdog())
+    ]
+    try:
+        # Le premier côté qui se termine (fermeture, erreur, inactivité) ferme l'autre
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            except (ConnectionClosed, WebSocketDisconnect, RuntimeError) as e:
+                logger.info(f"WebSocket closed: {upstream_url} - {e!r}")
+        STREAMS_ACTIVE.labels("websocket").dec()
+        balancer.release(endpoint)
+        await upstream.close()
+        try:
+            await websocket.close()
+        except RuntimeError:
+            pass  # Déjà fermée par le client
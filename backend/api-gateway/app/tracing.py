@@ -0,0 +1,358 @@
+import asyncio
+import json
+import logging
+import random
+import time
+import urllib.request
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from starlette.types import ASGIApp, Receive, Scope, Send, Message
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Codes OTLP des types de span
+SPAN_KINDS = {"internal": 1, "server": 2, "client": 3}
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """(trace_id, parent_id, sampled) d'un header traceparent W3C valide, None sinon"""
+    if not value:
+        return None
+    parts = value.strip().lower().split("-")
+    if len(parts) < 4:
+        return None
+    version, trace_id, parent_id, flags = parts[:4]
+    if (
+        len(version) != 2 or version == "ff"
+        or (version == "00" and len(parts) != 4)
+        or len(trace_id) != 32 or trace_id == "0" * 32
+        or len(parent_id) != 16 or parent_id == "0" * 16
+        or len(flags) != 2
+    ):
+        return None
+    try:
+        int(trace_id, 16)
+        int(parent_id, 16)
+        sampled = bool(int(flags, 16) & 1)
+    except ValueError:
+        return None
+    return trace_id, parent_id, sampled
+
+class Span:
+    """Opération chronométrée d'une trace (rien n'est enregistré si la trace n'est pas échantillonnée)"""
+
+    __slots__ = (
+        "trace_id", "span_id", "parent_id", "sampled", "name", "kind",
+        "attributes", "start_ns", "end_ns", "error"
+    )
+
+    def __init__(
+        self,
+        trace_id: str,
+        parent_id: Optional[str],
+        sampled: bool,
+        name: str,
+        kind: str,
+        attributes: Optional[Dict[str, Any]]
+    ):
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64) or 1:016x}"
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes if sampled and attributes else {}
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any):
+        if self.sampled:
+            self.attributes[key] = value
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def to_dict(self, service_name: str) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "service": service_name,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": (self.end_ns - self.start_ns) / 1_000_000,
+            "attributes": self.attributes,
+            "error": self.error
+        }
+
+# Span en cours de la requête (hérité par les tâches filles)
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+class FileExporter:
+    """Spans écrits en JSON, un par ligne (lisibles avec jq)"""
+
+    def __init__(self, path: str, service_name: str):
+        self.path = path
+        self.service_name = service_name
+
+    def export(self, spans: List[Span]):
+        lines = "".join(json.dumps(span.to_dict(self.service_name), default=str) + "\n" for span in spans)
+        with open(self.path, "a") as f:
+            f.write(lines)
+
+class OTLPExporter:
+    """Spans envoyés en OTLP/HTTP (JSON) à un collecteur local"""
+
+    def __init__(self, endpoint: str, service_name: str, timeout: float = 5.0):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        self.timeout = timeout
+
+    @staticmethod
+    def _value(value: Any) -> Dict[str, Any]:
+        if isinstance(value, bool):
+            return {"boolValue": value}
+        if isinstance(value, int):
+            return {"intValue": str(value)}
+        if isinstance(value, float):
+            return {"doubleValue": value}
+        return {"stringValue": str(value)}
+
+    def _span(self, span: Span) -> Dict[str, Any]:
+        otlp_span = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": SPAN_KINDS.get(span.kind, 1),
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [{"key": key, "value": self._value(value)} for key, value in span.attributes.items()],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1}
+        }
+        if span.parent_id:
+            otlp_span["parentSpanId"] = span.parent_id
+        return otlp_span
+
+    def export(self, spans: List[Span]):
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+                "scopeSpans": [{"scope": {"name": "nokube"}, "spans": [self._span(span) for span in spans]}]
+            }]
+        }
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(payload, default=str).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+def build_exporter(kind: str, service_name: str):
+    """Sink configuré par TRACE_EXPORTER : "file", "otlp" ou "none" (propagation seule)"""
+    if kind == "file":
+        return FileExporter(settings.TRACE_FILE, service_name)
+    if kind == "otlp":
+        return OTLPExporter(settings.OTLP_ENDPOINT, service_name)
+    return None
+
+class Tracer:
+    """
+    Tracing W3C trace-context minimal
+
+    L'échantillonnage est décidé à la racine de la trace (TRACE_SAMPLE_RATIO) puis
+    suivi par tous les services via le flag du header traceparent : une requête
+    non échantillonnée ne coûte que la propagation des identifiants. Les spans
+    terminés sont mis en file (bornée, les plus anciens perdus) et exportés par
+    lots en arrière-plan, hors de l'event loop.
+    """
+
+    def __init__(self, service_name: str, exporter, sample_ratio: float, max_queue: int, export_interval: float):
+        self.service_name = service_name
+        self.exporter = exporter
+        self.sample_ratio = sample_ratio if exporter is not None else 0.0
+        self.export_interval = export_interval
+        self.pending: deque = deque(maxlen=max_queue)
+        self.exported = 0
+        self.dropped = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        kind: str = "internal",
+        attributes: Optional[Dict[str, Any]] = None,
+        traceparent: Optional[str] = None,
+        trust_sampled: bool = True
+    ) -> Iterator[Span]:
+        """
+        Chronométrer un bloc de code comme span enfant du span en cours
+
+        traceparent : header reçu d'un autre service (spans serveur uniquement)
+        trust_sampled : False pour un appelant externe, son flag d'échantillonnage
+        est ignoré et la décision reprise ici (les identifiants restent corrélés)
+        """
+        remote = parse_traceparent(traceparent) if traceparent else None
+        parent = current_span.get()
+        if remote is not None:
+            sampled = remote[2] if trust_sampled else self._sample()
+            span = Span(remote[0], remote[1], sampled, name, kind, attributes)
+        elif parent is not None:
+            span = Span(parent.trace_id, parent.span_id, parent.sampled, name, kind, attributes)
+        else:
+            span = Span(f"{random.getrandbits(128) or 1:032x}", None, self._sample(), name, kind, attributes)
+
+        token = current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            if span.sampled and span.error is None:
+                span.error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+            raise
+        finally:
+            current_span.reset(token)
+            self._finish(span)
+
+    def _sample(self) -> bool:
+        """Décision d'échantillonnage d'une nouvelle racine (TRACE_SAMPLE_RATIO)"""
+        return self.sample_ratio > 0 and random.random() < self.sample_ratio
+
+    def record_span(
+        self,
+        name: str,
+        kind: str,
+        start_ns: int,
+        end_ns: int,
+        attributes: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None
+    ):
+        """Enregistrer après coup un span déjà chronométré (ex: requête asyncpg)"""
+        parent = current_span.get()
+        if parent is None or not parent.sampled or self.exporter is None:
+            return
+        span = Span(parent.trace_id, parent.span_id, True, name, kind, attributes)
+        span.start_ns = start_ns
+        span.error = error
+        self._finish(span, end_ns)
+
+    def inject(self, headers: Dict[str, str]):
+        """Ajouter le traceparent du span en cours aux headers d'un appel sortant"""
+        span = current_span.get()
+        if span is not None:
+            headers["traceparent"] = span.traceparent()
+
+    def _finish(self, span: Span, end_ns: Optional[int] = None):
+        # Sans sink, le flag d'échantillonnage reçu est seulement relayé
+        if not span.sampled or self.exporter is None:
+            return
+        span.end_ns = end_ns or time.time_ns()
+        if len(self.pending) == self.pending.maxlen:
+            self.dropped += 1
+        self.pending.append(span)
+
+    async def start(self):
+        """Lancer l'export périodique des spans"""
+        if self.exporter is not None and self._task is None:
+            self._task = asyncio.create_task(self._export_loop())
+
+    async def stop(self):
+        """Arrêter l'export périodique et envoyer les derniers spans"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def flush(self):
+        if self.exporter is None or not self.pending:
+            return
+        batch = list(self.pending)
+        self.pending.clear()
+        try:
+            # Écriture fichier ou appel HTTP bloquants : exécutés dans un thread
+            await asyncio.to_thread(self.exporter.export, batch)
+            self.exported += len(batch)
+        except Exception as e:
+            self.dropped += len(batch)
+            logger.warning(f"Trace export failed ({len(batch)} spans): {e}")
+
+    async def _export_loop(self):
+        while True:
+            await asyncio.sleep(self.export_interval)
+            await self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "exporter": type(self.exporter).__name__ if self.exporter is not None else None,
+            "sample_ratio": self.sample_ratio,
+            "pending": len(self.pending),
+            "exported": self.exported,
+            "dropped": self.dropped
+        }
+
+class TracingMiddleware:
+    """
+    Middleware ASGI : span serveur par requête (ou connexion WebSocket), rattaché au traceparent reçu
+
+    La gateway est le point d'entrée des clients : le flag d'échantillonnage
+    de leur traceparent n'est pas suivi (sinon un client forcerait l'export de
+    toutes ses requêtes), sauf TRACE_TRUST_INBOUND_SAMPLED pour un appelant interne.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for key, value in scope["headers"]:
+            if key == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+
+        method = scope.get("method", "WEBSOCKET")
+        path = scope["path"]
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        with tracer.span(
+            f"{method} {path}",
+            "server",
+            {"http.method": method, "http.target": path},
+            traceparent=traceparent,
+            trust_sampled=settings.TRACE_TRUST_INBOUND_SAMPLED
+        ) as span:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                if scope["type"] == "http":
+                    span.set_attribute("http.status_code", status_code)
+                    if status_code >= 500 and span.sampled:
+                        span.error = span.error or f"HTTP {status_code}"
+
+# Instance globale du tracer
+tracer = Tracer(
+    "api-gateway",
+    build_exporter(settings.TRACE_EXPORTER, "api-gateway"),
+    settings.TRACE_SAMPLE_RATIO,
+    settings.TRACE_MAX_QUEUE,
+    settings.TRACE_EXPORT_INTERVAL
+)
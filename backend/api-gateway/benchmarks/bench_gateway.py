@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+Benchmark de bout en bout de la gateway (débit, latence, CPU et mémoire)
+
+La gateway est lancée dans un processus uvicorn dédié, branchée sur des
+versions simulées des quatre microservices (auth, projects, builds, monitor)
+servies en mémoire dans ce même processus : chaque appel attend --latency-ms
+puis renvoie un JSON de --payload-bytes octets. Le générateur de charge
+(processus parent) envoie des GET authentifiés à débit fixe (--rps, boucle
+ouverte) en tournant sur les quatre services : la latence est mesurée depuis
+l'instant d'envoi prévu, un retard du générateur n'est donc pas masqué.
+
+Mesures :
+    - latence p50/p95/p99/max et débit effectivement servi
+    - temps CPU de la gateway par requête et mémoire (RSS, pic RSS), via /proc
+    - surcoût interne de la gateway (verify_jwt_token + forward_request,
+      hors attente des services) lu sur /metrics
+
+Les résultats sont enregistrés en JSON (--output) et peuvent être comparés à
+un run précédent (--compare).
+
+Usage:
+    python benchmarks/bench_gateway.py [--rps 500] [--duration 20] \\
+        [--latency-ms 20] [--payload-bytes 2048] [--output results.json] \\
+        [--compare previous.json]
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import logging
+import argparse
+import platform
+import statistics
+import subprocess
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+import jwt
+
+# Ajouter le module app au path
+sys.path.append(str(Path(__file__).parent.parent))
+
+BENCH_SECRET = "bench-secret"
+
+# GET authentifiés envoyés à tour de rôle (un par microservice)
+TARGET_PATHS = [
+    "/api/v1/auth/me",
+    "/api/v1/projects/projects",
+    "/api/v1/builds/builds",
+    "/api/v1/monitor/deployments",
+]
+
+# ---------------------------------------------------------------------------
+# Processus gateway (--serve)
+# ---------------------------------------------------------------------------
+
+def make_stub_handler(latency_s: float, payload_bytes: int):
+    """Microservices simulés : latence fixe puis JSON de la taille demandée"""
+    item = {"id": 0, "name": "item", "status": "running", "owner": "bench"}
+    item_size = len(json.dumps(item)) + 2
+    payload = json.dumps({"items": [item] * max(1, payload_bytes // item_size)}).encode()
+    health = b'{"status": "healthy"}'
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/health":
+            body = health
+        else:
+            if latency_s:
+                await asyncio.sleep(latency_s)
+            body = payload
+
+        async def stream():
+            yield body
+        return httpx.Response(200, content=stream(), headers={"content-type": "application/json"})
+
+    return handler
+
+def serve(args):
+    """Lancer la gateway (uvicorn) sur les microservices simulés"""
+    import uvicorn
+    from app.config import settings
+    from app.client import service_client
+    from app.pool import ServicePool
+    from app.main import app
+
+    settings.JWT_SECRET = BENCH_SECRET
+    settings.CACHE_ENABLED = args.cache
+    settings.RATE_LIMIT_ENABLED = args.rate_limit
+    service_client.pool = ServicePool(httpx.MockTransport(
+        make_stub_handler(args.latency_ms / 1000, args.payload_bytes)
+    ))
+
+    # Les logs par requête ne doivent pas dominer la mesure
+    logging.disable(logging.CRITICAL)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning", access_log=False)
+
+# ---------------------------------------------------------------------------
+# Mesures du processus gateway
+# ---------------------------------------------------------------------------
+
+def process_cpu_seconds(pid: int) -> Optional[float]:
+    """Temps CPU (user + system) d'un processus, None hors Linux"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # Le nom du processus (2e champ) peut contenir des espaces
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    ticks = os.sysconf("SC_CLK_TCK")
+    return (int(fields[11]) + int(fields[12])) / ticks
+
+def process_memory_mb(pid: int) -> Dict[str, Optional[float]]:
+    """RSS courant et pic de RSS d'un processus en Mo, None hors Linux"""
+    memory = {"rss_mb": None, "peak_rss_mb": None}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    memory["rss_mb"] = int(line.split()[1]) / 1024
+                elif line.startswith("VmHWM:"):
+                    memory["peak_rss_mb"] = int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return memory
+
+async def scrape_overhead(client: httpx.AsyncClient) -> Dict[str, float]:
+    """Somme et nombre de gateway_overhead_duration_seconds (tous services)"""
+    from prometheus_client.parser import text_string_to_metric_families
+
+    response = await client.get("/metrics")
+    totals = {"sum": 0.0, "count": 0.0}
+    for family in text_string_to_metric_families(response.text):
+        if family.name != "gateway_overhead_duration_seconds":
+            continue
+        for sample in family.samples:
+            if sample.name.endswith("_sum"):
+                totals["sum"] += sample.value
+            elif sample.name.endswith("_count"):
+                totals["count"] += sample.value
+    return totals
+
+# ---------------------------------------------------------------------------
+# Générateur de charge
+# ---------------------------------------------------------------------------
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def make_tokens(users: int) -> List[str]:
+    exp = int(time.time()) + 3600
+    return [
+        jwt.encode({"sub": f"bench-user-{i}", "exp": exp}, BENCH_SECRET, algorithm="HS256")
+        for i in range(users)
+    ]
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+async def wait_ready(client: httpx.AsyncClient, process: subprocess.Popen, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("La gateway s'est arrêtée au démarrage")
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("La gateway n'a pas démarré à temps")
+
+async def drive(client: httpx.AsyncClient, tokens: List[str], rps: float, duration: float, concurrency: int) -> Dict:
+    """Envoyer rps requêtes/s pendant duration secondes (boucle ouverte)"""
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    dropped = 0
+    in_flight = 0
+    tasks = set()
+
+    async def one(index: int, scheduled: float):
+        nonlocal in_flight
+        path = TARGET_PATHS[index % len(TARGET_PATHS)]
+        headers = {"Authorization": f"Bearer {tokens[index % len(tokens)]}"}
+        try:
+            response = await client.get(path, headers=headers)
+            status = str(response.status_code)
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        latencies.append(time.perf_counter() - scheduled)
+        statuses[status] = statuses.get(status, 0) + 1
+        in_flight -= 1
+
+    total = int(rps * duration)
+    start = time.perf_counter()
+    for index in range(total):
+        scheduled = start + index / rps
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if in_flight >= concurrency:
+            # Gateway saturée : la requête est comptée comme perdue plutôt que retardée
+            dropped += 1
+            continue
+        in_flight += 1
+        task = asyncio.ensure_future(one(index, scheduled))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    if tasks:
+        await asyncio.wait(tasks)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "sent": total - dropped,
+        "dropped": dropped,
+        "statuses": statuses,
+        "elapsed_s": elapsed,
+        "latencies": latencies,
+    }
+
+async def run_benchmark(args, process: subprocess.Popen, base_url: str) -> Dict:
+    pid = process.pid
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    timeout = httpx.Timeout(30.0)
+    tokens = make_tokens(args.users)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        await wait_ready(client, process)
+
+        if args.warmup > 0:
+            print(f"   Échauffement {args.warmup:.0f}s...")
+            await drive(client, tokens, args.rps, args.warmup, args.concurrency)
+
+        overhead_before = await scrape_overhead(client)
+        cpu_before = process_cpu_seconds(pid)
+
+        print(f"   Mesure {args.duration:.0f}s à {args.rps:.0f} req/s...")
+        run = await drive(client, tokens, args.rps, args.duration, args.concurrency)
+
+        cpu_after = process_cpu_seconds(pid)
+        overhead_after = await scrape_overhead(client)
+        memory = process_memory_mb(pid)
+
+    latencies = run["latencies"]
+    completed = len(latencies)
+    ok = sum(count for status, count in run["statuses"].items() if status.startswith("2"))
+    overhead_count = overhead_after["count"] - overhead_before["count"]
+
+    cpu_ms_per_request = None
+    if cpu_before is not None and cpu_after is not None and completed:
+        cpu_ms_per_request = (cpu_after - cpu_before) / completed * 1000
+
+    return {
+        "requests": completed,
+        "ok": ok,
+        "dropped": run["dropped"],
+        "statuses": run["statuses"],
+        "throughput_rps": completed / run["elapsed_s"] if run["elapsed_s"] else 0.0,
+        "latency_ms": {
+            "p50": percentile(latencies, 50) * 1000,
+            "p95": percentile(latencies, 95) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+            "max": (latencies[-1] if latencies else 0.0) * 1000,
+            "mean": (statistics.fmean(latencies) if latencies else 0.0) * 1000,
+        },
+        "gateway_overhead_ms": (
+            (overhead_after["sum"] - overhead_before["sum"]) / overhead_count * 1000
+            if overhead_count else None
+        ),
+        "cpu_ms_per_request": cpu_ms_per_request,
+        "memory": memory,
+    }
+
+# ---------------------------------------------------------------------------
+# Rapport
+# ---------------------------------------------------------------------------
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def format_value(value: Optional[float], unit: str) -> str:
+    return "n/a" if value is None else f"{value:.2f} {unit}"
+
+def print_report(results: Dict):
+    latency = results["latency_ms"]
+    print(f"\n📊 Résultats ({results['requests']} requêtes, {results['ok']} en 2xx, {results['dropped']} perdues)")
+    print(f"   Débit servi          {results['throughput_rps']:10.1f} req/s")
+    print(f"   Latence p50          {latency['p50']:10.2f} ms")
+    print(f"   Latence p95          {latency['p95']:10.2f} ms")
+    print(f"   Latence p99          {latency['p99']:10.2f} ms")
+    print(f"   Latence max          {latency['max']:10.2f} ms")
+    print(f"   Surcoût gateway      {format_value(results['gateway_overhead_ms'], 'ms'):>13}")
+    print(f"   CPU par requête      {format_value(results['cpu_ms_per_request'], 'ms'):>13}")
+    print(f"   RSS / pic RSS        {format_value(results['memory']['rss_mb'], 'Mo'):>13} / "
+          f"{format_value(results['memory']['peak_rss_mb'], 'Mo')}")
+    if set(results["statuses"]) - {"200"}:
+        print(f"   Status               {results['statuses']}")
+
+def print_comparison(current: Dict, previous_path: Path):
+    """Écarts avec un run précédent (négatif = mieux, sauf pour le débit)"""
+    previous = json.loads(previous_path.read_text())
+    print(f"\n🔁 Comparaison avec {previous_path} (commit {previous.get('commit') or '?'})")
+
+    metrics = [
+        ("Débit servi", lambda r: r["throughput_rps"], "req/s"),
+        ("Latence p50", lambda r: r["latency_ms"]["p50"], "ms"),
+        ("Latence p95", lambda r: r["latency_ms"]["p95"], "ms"),
+        ("Latence p99", lambda r: r["latency_ms"]["p99"], "ms"),
+        ("Surcoût gateway", lambda r: r["gateway_overhead_ms"], "ms"),
+        ("CPU par requête", lambda r: r["cpu_ms_per_request"], "ms"),
+        ("Pic RSS", lambda r: r["memory"]["peak_rss_mb"], "Mo"),
+    ]
+    for name, getter, unit in metrics:
+        before, after = getter(previous["results"]), getter(current["results"])
+        if before is None or after is None:
+            continue
+        change = (after - before) / before * 100 if before else 0.0
+        print(f"   {name:<20} {before:10.2f} -> {after:10.2f} {unit:<6} ({change:+.1f}%)")
+
+    if previous.get("config") != current["config"]:
+        print("   ⚠️  Configuration différente entre les deux runs")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rps", type=float, default=500, help="débit cible (requêtes/s)")
+    parser.add_argument("--duration", type=float, default=20, help="durée de la mesure (s)")
+    parser.add_argument("--warmup", type=float, default=3, help="durée de l'échauffement (s)")
+    parser.add_argument("--concurrency", type=int, default=256, help="requêtes en vol max côté client")
+    parser.add_argument("--users", type=int, default=50, help="nombre d'utilisateurs (JWT distincts)")
+    parser.add_argument("--latency-ms", type=float, default=20, help="latence des services simulés")
+    parser.add_argument("--payload-bytes", type=int, default=2048, help="taille des réponses des services")
+    parser.add_argument("--cache", action="store_true", help="activer le cache de réponses")
+    parser.add_argument("--rate-limit", action="store_true", help="activer le limiteur de débit")
+    parser.add_argument("--output", type=Path, help="fichier JSON des résultats")
+    parser.add_argument("--compare", type=Path, help="résultats JSON d'un run précédent")
+    parser.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    config = {
+        "rps": args.rps,
+        "duration_s": args.duration,
+        "concurrency": args.concurrency,
+        "users": args.users,
+        "latency_ms": args.latency_ms,
+        "payload_bytes": args.payload_bytes,
+        "cache": args.cache,
+        "rate_limit": args.rate_limit,
+    }
+
+    port = args.port or free_port()
+    command = [
+        sys.executable, __file__, "--serve", "--port", str(port),
+        "--latency-ms", str(args.latency_ms), "--payload-bytes", str(args.payload_bytes),
+    ]
+    if args.cache:
+        command.append("--cache")
+    if args.rate_limit:
+        command.append("--rate-limit")
+
+    print(f"🚀 Benchmark gateway - {args.rps:.0f} req/s, services à {args.latency_ms:.0f} ms, "
+          f"réponses de {args.payload_bytes} octets\n")
+
+    process = subprocess.Popen(command)
+    try:
+        results = asyncio.run(run_benchmark(args, process, f"http://127.0.0.1:{port}"))
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "config": config,
+        "results": results,
+    }
+    print_report(results)
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"\n💾 Résultats enregistrés dans {args.output}")
+    if args.compare:
+        print_comparison(report, args.compare)
+
+if __name__ == "__main__":
+    main()
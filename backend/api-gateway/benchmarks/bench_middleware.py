@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark du coût par requête des middlewares de la gateway
+
+Compare les anciens middlewares BaseHTTPMiddleware aux middlewares ASGI purs
+(LoggingMiddleware + CORSMiddleware) sur une route JSON minimale, appelée
+directement en ASGI (sans réseau ni serveur) pour isoler le surcoût.
+
+Usage:
+    python benchmarks/bench_middleware.py [--requests 5000]
+"""
+
+import sys
+import time
+import asyncio
+import logging
+import argparse
+from pathlib import Path
+
+# Ajouter le module app au path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from fastapi import FastAPI, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+from app.middleware import LoggingMiddleware, CORSMiddleware
+
+class LegacyLoggingMiddleware(BaseHTTPMiddleware):
+    """Ancien middleware de logging (BaseHTTPMiddleware) - référence"""
+
+    async def dispatch(self, request: Request, call_next):
+        start_time = time.time()
+        logging.getLogger("app.middleware").info(f"Incoming request: {request.method} {request.url}")
+        response = await call_next(request)
+        process_time = time.time() - start_time
+        logging.getLogger("app.middleware").info(
+            f"Request processed: {request.method} {request.url} "
+            f"- Status: {response.status_code} - Time: {process_time:.3f}s"
+        )
+        response.headers["X-Process-Time"] = str(process_time)
+        return response
+
+class LegacyCORSMiddleware(BaseHTTPMiddleware):
+    """Ancien middleware CORS (BaseHTTPMiddleware) - référence"""
+
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        response.headers["Access-Control-Allow-Origin"] = "*"
+        response.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, DELETE, OPTIONS"
+        response.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization"
+        return response
+
+def build_app(middlewares) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"status": "ok"}
+
+    for middleware in middlewares:
+        app.add_middleware(middleware)
+    return app
+
+async def call(app, method: str = "GET", path: str = "/ping") -> int:
+    """Appeler l'application ASGI directement et retourner le status"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"gateway")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("gateway", 80),
+    }
+    status = {}
+    body_received = False
+    response_complete = asyncio.Event()
+
+    async def receive():
+        # Comme uvicorn : le body, puis http.disconnect une fois la réponse terminée
+        nonlocal body_received
+        if not body_received:
+            body_received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await response_complete.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status["code"] = message["status"]
+        elif message["type"] == "http.response.body" and not message.get("more_body", False):
+            response_complete.set()
+
+    await app(scope, receive, send)
+    return status["code"]
+
+async def measure(app, requests: int, method: str = "GET") -> float:
+    """Temps moyen par requête en microsecondes"""
+    for _ in range(200):  # échauffement
+        await call(app, method)
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await call(app, method)
+    return (time.perf_counter() - start) / requests * 1_000_000
+
+async def run(requests: int):
+    # Les logs ne doivent pas dominer la mesure
+    logging.disable(logging.CRITICAL)
+
+    scenarios = [
+        ("sans middleware", build_app([])),
+        ("BaseHTTPMiddleware (avant)", build_app([LegacyLoggingMiddleware, LegacyCORSMiddleware])),
+        ("ASGI pur (après)", build_app([LoggingMiddleware, CORSMiddleware])),
+    ]
+
+    print(f"🚀 Surcoût des middlewares - {requests} requêtes GET /ping\n")
+    results = {}
+    for name, app in scenarios:
+        results[name] = await measure(app, requests)
+
+    baseline = results["sans middleware"]
+    for name, per_request in results.items():
+        overhead = per_request - baseline
+        print(f"   {name:<28} {per_request:8.1f} µs/req   (+{overhead:6.1f} µs middlewares)")
+
+    preflight = await measure(build_app([LoggingMiddleware, CORSMiddleware]), requests, "OPTIONS")
+    print(f"\n   Preflight OPTIONS (ASGI pur)  {preflight:8.1f} µs/req")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests))
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test du cache de vérification des JWT de l'API Gateway
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import jwt
+from fastapi import HTTPException
+
+# Ajouter le module app au path
+sys.path.append(str(Path(__file__).parent))
+
+from app.config import settings
+from app.auth import verify_jwt_token, token_cache
+
+settings.JWT_SECRET = "test-secret"
+
+def make_token(username: str, expires_in: int = 3600) -> str:
+    """Générer un token signé comme le ferait l'Auth Service"""
+    payload = {"sub": username, "exp": int(time.time()) + expires_in}
+    return jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+
+def test_valid_token_cached():
+    """Test d'un token valide servi depuis le cache au second appel"""
+    print("🧪 Test Cache JWT - token valide")
+    token_cache.clear()
+    hits_before = token_cache.hits
+
+    token = make_token("testuser")
+    assert verify_jwt_token(f"Bearer {token}") == "testuser"
+    assert verify_jwt_token(f"Bearer {token}") == "testuser"
+
+    assert token_cache.hits == hits_before + 1
+    print("   ✅ Second appel servi sans décodage")
+
+def test_invalid_token_negative_cache():
+    """Test du cache négatif pour les tokens invalides"""
+    print("\n🧪 Test Cache JWT - token invalide")
+    token_cache.clear()
+
+    for _ in range(2):
+        try:
+            verify_jwt_token("Bearer not-a-jwt")
+            assert False, "Token invalide accepté"
+        except HTTPException as e:
+            assert e.status_code == 401
+            assert e.detail == "Could not validate credentials"
+
+    assert len(token_cache.entries) == 1
+    print("   ✅ Token invalide rejeté depuis le cache")
+
+def test_expired_entry_not_served():
+    """Test qu'une entrée expirée n'est jamais renvoyée"""
+    print("\n🧪 Test Cache JWT - expiration")
+    token_cache.clear()
+
+    key = token_cache.digest("some-token")
+    token_cache.set_valid(key, "testuser", time.time() - 1)
+    assert token_cache.get(key) is None
+    print("   ✅ Entrée expirée ignorée")
+
+def test_cache_size_bounded():
+    """Test de l'éviction LRU quand le cache est plein"""
+    print("\n🧪 Test Cache JWT - taille bornée")
+    token_cache.clear()
+    max_size = token_cache.max_size
+    token_cache.max_size = 3
+    try:
+        for i in range(5):
+            verify_jwt_token(f"Bearer {make_token(f'user{i}')}")
+        assert len(token_cache.entries) == 3
+    finally:
+        token_cache.max_size = max_size
+    print("   ✅ Cache limité à 3 entrées")
+
+def main():
+    """Exécuter tous les tests du cache JWT"""
+    print("🚀 Tests Cache JWT - NoKube API Gateway\n")
+
+    try:
+        test_valid_token_cached()
+        test_invalid_token_negative_cache()
+        test_expired_entry_not_served()
+        test_cache_size_bounded()
+
+        print(f"\n✅ TOUS LES TESTS CACHE JWT RÉUSSIS!")
+
+    except Exception as e:
+        print(f"\n❌ ÉCHEC DU TEST CACHE JWT: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Test de la répartition de charge entre les instances d'un microservice
+Test sans microservices réels grâce à un transport httpx simulé
+"""
+
+import sys
+import asyncio
+from collections import Counter
+from pathlib import Path
+
+import httpx
+
+# Ajouter le module app au path
+sys.path.append(str(Path(__file__).parent))
+
+from fastapi.testclient import TestClient
+from app.config import settings
+from app.client import ServiceClient
+from app.balancer import ServiceBalancer
+from app.main import app
+
+ENDPOINTS = ["http://10.0.0.1:8000", "http://10.0.0.2:8000", "http://10.0.0.3:8000"]
+
+async def upstream_body(data: bytes):
+    """Body simulé lu en flux comme depuis une vraie connexion"""
+    yield data
+
+def make_client(handler, urls) -> ServiceClient:
+    """ServiceClient dont le service projects a plusieurs instances simulées"""
+    service_client = ServiceClient(transport=httpx.MockTransport(handler))
+    service_client.balancers.get("projects").set_urls(urls)
+    return service_client
+
+def test_least_outstanding_spreads_load():
+    """Test least outstanding : requêtes concurrentes réparties également entre les instances"""
+    print("🧪 Test Répartition - least outstanding")
+
+    hits = Counter()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        hits[request.url.host] += 1
+        await asyncio.sleep(0.1)
+        return httpx.Response(200, content=upstream_body(b'{"projects": []}'))
+
+    async def scenario():
+        service_client = make_client(handler, ENDPOINTS)
+        await asyncio.gather(*[
+            service_client.forward_request("projects", "/projects", method="POST") for _ in range(9)
+        ])
+        state = service_client.balancers.get("projects").get_state()
+        assert all(endpoint["in_flight"] == 0 for endpoint in state["endpoints"])
+
+    original = settings.LB_STRATEGY
+    settings.LB_STRATEGY = "least_outstanding"
+    try:
+        asyncio.run(scenario())
+    finally:
+        settings.LB_STRATEGY = original
+
+    assert sorted(hits.values()) == [3, 3, 3]
+    print(f"   ✅ 9 requêtes réparties {dict(hits)}")
+
+def test_p2c_avoids_busy_endpoint():
+    """Test power-of-two-choices : l'instance la plus chargée des deux tirées n'est jamais choisie"""
+    print("\n🧪 Test Répartition - power of two choices")
+
+    balancer = ServiceBalancer("projects", ENDPOINTS)
+    busy = balancer.endpoints[ENDPOINTS[0]]
+    busy.in_flight = 10  # flux longs en cours sur cette instance
+    picks = Counter(balancer.pick().url for _ in range(12))
+    assert busy.url not in picks
+    assert sum(picks.values()) == 12
+    print(f"   ✅ Instance occupée évitée : {dict(picks)}")
+
+def test_failing_endpoint_ejected():
+    """Test de l'éjection passive d'une instance après des 5xx consécutifs"""
+    print("\n🧪 Test Répartition - éjection passive")
+
+    hits = Counter()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        hits[request.url.host] += 1
+        if request.url.host == "10.0.0.1":
+            return httpx.Response(502, content=upstream_body(b'{"detail": "bad gateway"}'))
+        return httpx.Response(201, content=upstream_body(b'{"created": true}'))
+
+    async def scenario():
+        service_client = make_client(handler, ENDPOINTS[:2])
+        balancer = service_client.balancers.get("projects")
+        failing = balancer.endpoints[ENDPOINTS[0]]
+
+        while not failing.ejections:
+            try:
+                await service_client.forward_request("projects", "/projects", method="POST")
+            except Exception:
+                pass
+        assert failing.errors == settings.EJECTION_CONSECUTIVE_FAILURES
+
+        hits.clear()
+        for _ in range(10):
+            await service_client.forward_request("projects", "/projects", method="POST")
+        assert hits == {"10.0.0.2": 10}
+
+        state = balancer.get_state()["endpoints"][0]
+        assert state["ejected"] and state["ejected_for_s"] > 0
+
+        # Instance unique restante : jamais éjectée, le circuit breaker prend le relais
+        for _ in range(settings.EJECTION_CONSECUTIVE_FAILURES):
+            healthy = balancer.pick()
+            balancer.release(healthy, failed=True)
+        assert not balancer.get_state()["endpoints"][1]["ejected"]
+
+    original = settings.BREAKER_MIN_CALLS
+    settings.BREAKER_MIN_CALLS = 1000
+    try:
+        asyncio.run(scenario())
+    finally:
+        settings.BREAKER_MIN_CALLS = original
+    print("   ✅ Instance en erreur écartée, trafic reporté sur l'instance saine")
+
+def test_headless_dns_resolution():
+    """Test de la résolution d'un nom headless en une instance par adresse"""
+    print("\n🧪 Test Répartition - résolution DNS")
+
+    balancer = ServiceBalancer("projects", ["http://project-service:8000"])
+    asyncio.run(balancer.resolve("http://localhost:8000"))
+    assert "http://127.0.0.1:8000" in balancer.endpoints
+    assert "http://project-service:8000" not in balancer.endpoints
+
+    with TestClient(app) as client:
+        response = client.get("/gateway/endpoints")
+    assert response.status_code == 200
+    assert set(response.json()["services"].keys()) == {"auth", "projects", "builds", "monitor"}
+    print(f"   ✅ localhost résolu en {len(balancer.endpoints)} instance(s)")
+
+def main():
+    """Exécuter tous les tests de répartition de charge"""
+    print("🚀 Tests Répartition de charge - NoKube API Gateway\n")
+
+    try:
+        test_least_outstanding_spreads_load()
+        test_p2c_avoids_busy_endpoint()
+        test_failing_endpoint_ejected()
+        test_headless_dns_resolution()
+
+        print(f"\n✅ TOUS LES TESTS DE RÉPARTITION RÉUSSIS!")
+
+    except Exception as e:
+        print(f"\n❌ ÉCHEC DU TEST DE RÉPARTITION: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
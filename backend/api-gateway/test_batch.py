@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Test de l'endpoint batch de l'API Gateway
+Test sans microservices réels grâce à un transport httpx simulé
+"""
+
+import sys
+import json
+import time
+import asyncio
+from pathlib import Path
+
+import httpx
+import jwt
+
+# Ajouter le module app au path
+sys.path.append(str(Path(__file__).parent))
+
+from fastapi.testclient import TestClient
+from app.config import settings
+from app.client import service_client
+from app.pool import ServicePool
+from app.cache import response_cache
+from app.main import app
+
+settings.JWT_SECRET = "test-secret"
+
+def auth_headers(username: str) -> dict:
+    """Headers Authorization avec un token signé comme par l'Auth Service"""
+    payload = {"sub": username, "exp": int(time.time()) + 3600}
+    token = jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    return {"Authorization": f"Bearer {token}"}
+
+def json_response(status_code: int, payload) -> httpx.Response:
+    """Réponse JSON simulée lue en flux comme depuis une vraie connexion"""
+    async def stream():
+        yield json.dumps(payload).encode()
+    return httpx.Response(status_code, content=stream(), headers={"Content-Type": "application/json"})
+
+def run_batch(handler, payload: dict, headers: dict) -> httpx.Response:
+    """POST /api/v1/batch contre la gateway branchée sur un backend simulé"""
+    original_pool = service_client.pool
+    service_client.pool = ServicePool(httpx.MockTransport(handler))
+    response_cache.clear()
+    try:
+        with TestClient(app) as client:
+            return client.post("/api/v1/batch", json=payload, headers=headers)
+    finally:
+        service_client.pool = original_pool
+        response_cache.clear()
+
+def test_batch_concurrent_in_order():
+    """Test d'un batch : exécution concurrente, résultats dans l'ordre, status par sous-requête"""
+    print("🧪 Test Batch - sous-requêtes concurrentes")
+
+    in_flight = {"current": 0, "max": 0}
+    received = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/health":
+            return json_response(200, {"status": "healthy"})
+        received.append((request.method, request.url.path, request.headers.get("x-user")))
+        in_flight["current"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["current"])
+        await asyncio.sleep(0.05)
+        in_flight["current"] -= 1
+        if request.url.path == "/projects/missing":
+            return json_response(404, {"detail": "Project not found"})
+        if request.method == "POST":
+            return json_response(201, {"created": json.loads(await request.aread())})
+        return json_response(200, {"path": request.url.path})
+
+    payload = {"requests": [
+        {"id": "projects", "path": "/projects/projects"},
+        {"id": "builds", "path": "/api/v1/builds/projects/1/builds?limit=5"},
+        {"id": "missing", "path": "/projects/projects/missing"},
+        {"id": "create", "method": "POST", "path": "/projects/projects", "body": {"name": "app"}},
+        {"id": "unknown", "path": "/unknown/things"}
+    ]}
+    response = run_batch(handler, payload, auth_headers("alice"))
+
+    assert response.status_code == 200
+    results = response.json()["responses"]
+    assert [r["id"] for r in results] == ["projects", "builds", "missing", "create", "unknown"]
+    assert [r["status"] for r in results] == [200, 200, 404, 201, 404]
+    assert results[1]["body"] == {"path": "/projects/1/builds"}
+    assert results[3]["body"] == {"created": {"name": "app"}}
+    assert all(user == "alice" for _, _, user in received)
+    assert in_flight["max"] > 1
+    print(f"   ✅ 5 sous-requêtes, {in_flight['max']} en parallèle, résultats dans l'ordre")
+
+def test_batch_requires_jwt_and_cap():
+    """Test du JWT obligatoire et de la taille max du batch"""
+    print("\n🧪 Test Batch - JWT et taille max")
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return json_response(200, {})
+
+    unauthenticated = run_batch(handler, {"requests": [{"path": "/projects/projects"}]}, {})
+    assert unauthenticated.status_code == 401
+
+    too_large = {"requests": [{"path": "/projects/projects"}] * (settings.BATCH_MAX_REQUESTS + 1)}
+    response = run_batch(handler, too_large, auth_headers("alice"))
+    assert response.status_code == 413
+    print("   ✅ 401 sans token, 413 au-delà de BATCH_MAX_REQUESTS")
+
+def test_batch_cache_consistency():
+    """Test du cache via le batch : écriture en échec sans invalidation, GET concurrent d'une écriture non stocké"""
+    print("\n🧪 Test Batch - cache et écritures")
+
+    calls = {"get": 0}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/health":
+            return json_response(200, {"status": "healthy"})
+        if request.method == "POST":
+            return json_response(422, {"detail": "invalid"})
+        calls["get"] += 1
+        if calls["get"] == 1:
+            # Un POST du même utilisateur aboutit pendant que ce GET est chez le service
+            response_cache.invalidate("alice", "projects")
+        return json_response(200, {"version": calls["get"]})
+
+    get = {"requests": [{"id": "list", "path": "/projects/projects"}]}
+    post = {"requests": [{"id": "create", "method": "POST", "path": "/projects/projects", "body": {}}]}
+
+    original_pool = service_client.pool
+    service_client.pool = ServicePool(httpx.MockTransport(handler))
+    response_cache.clear()
+    try:
+        with TestClient(app) as client:
+            bodies = []
+            for payload in (get, get, post, get):
+                response = client.post("/api/v1/batch", json=payload, headers=auth_headers("alice"))
+                bodies.append(response.json()["responses"][0])
+    finally:
+        service_client.pool = original_pool
+        response_cache.clear()
+
+    first, second, rejected, third = bodies
+    assert first["body"] == {"version": 1}
+    assert second["body"] == {"version": 2}  # réponse du GET concurrent non stockée
+    assert rejected["status"] == 422
+    assert third["body"] == {"version": 2}  # cache conservé après l'écriture en échec
+    assert calls["get"] == 2
+    print("   ✅ GET concurrent non caché, cache conservé après un POST en 422")
+
+def main():
+    """Exécuter tous les tests de l'endpoint batch"""
+    print("🚀 Tests Batch - NoKube API Gateway\n")
+
+    try:
+        test_batch_concurrent_in_order()
+        test_batch_requires_jwt_and_cap()
+        test_batch_cache_consistency()
+
+        print(f"\n✅ TOUS LES TESTS BATCH RÉUSSIS!")
+
+    except Exception as e:
+        print(f"\n❌ ÉCHEC DU TEST BATCH: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
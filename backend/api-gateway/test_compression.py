@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test de la compression négociée des réponses de l'API Gateway
+Test sans microservices réels grâce à un transport httpx simulé
+"""
+
+import sys
+import gzip
+import json
+import time
+from pathlib import Path
+
+import brotli
+import httpx
+import jwt
+
+# Ajouter le module app au path
+sys.path.append(str(Path(__file__).parent))
+
+from fastapi.testclient import TestClient
+from app.config import settings
+from app.client import service_client
+from app.pool import ServicePool
+from app.cache import response_cache
+from app.compression import negotiate_encoding
+from app.metrics import registry
+from app.main import app
+
+settings.JWT_SECRET = "test-secret"
+
+PROJECTS = json.dumps({"projects": [{"id": i, "name": f"project-{i}"} for i in range(200)]}).encode()
+
+def auth_headers(username: str, accept_encoding: str) -> dict:
+    """Headers Authorization et Accept-Encoding d'un navigateur"""
+    payload = {"sub": username, "exp": int(time.time()) + 3600}
+    token = jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    return {"Authorization": f"Bearer {token}", "Accept-Encoding": accept_encoding}
+
+def upstream_response(body: bytes, headers: dict) -> httpx.Response:
+    """Réponse simulée lue en flux comme depuis une vraie connexion"""
+    async def stream():
+        yield body
+    return httpx.Response(200, content=stream(), headers=headers)
+
+def get_raw(handler, path: str, accept_encoding: str) -> httpx.Response:
+    """GET via la gateway sans décompression côté client"""
+    original_pool = service_client.pool
+    service_client.pool = ServicePool(httpx.MockTransport(handler))
+    response_cache.clear()
+    try:
+        with TestClient(app) as client:
+            with client.stream("GET", path, headers=auth_headers("alice", accept_encoding)) as response:
+                response.raw_body = b"".join(response.iter_raw())
+                return response
+    finally:
+        service_client.pool = original_pool
+        response_cache.clear()
+
+def test_negotiation():
+    """Test du choix de l'encodage selon Accept-Encoding"""
+    print("🧪 Test Compression - négociation")
+
+    assert negotiate_encoding("gzip, deflate, br") == "br"
+    assert negotiate_encoding("gzip, br;q=0") == "gzip"
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("") is None
+    print("   ✅ br préféré, q=0 respecté, identity sans compression")
+
+def test_json_list_compressed():
+    """Test de la compression d'une liste JSON volumineuse (gzip et brotli)"""
+    print("\n🧪 Test Compression - liste de projets")
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return upstream_response(PROJECTS, {"Content-Type": "application/json"})
+
+    before = registry.get_sample_value("gateway_compression_seconds_total", {"encoding": "gzip"}) or 0.0
+
+    gzipped = get_raw(handler, "/api/v1/monitor/deployments", "gzip")
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in gzipped.headers["vary"].lower()
+    assert gzip.decompress(gzipped.raw_body) == PROJECTS
+
+    brotlied = get_raw(handler, "/api/v1/monitor/deployments", "br")
+    assert brotlied.headers["content-encoding"] == "br"
+    assert brotli.decompress(brotlied.raw_body) == PROJECTS
+
+    after = registry.get_sample_value("gateway_compression_seconds_total", {"encoding": "gzip"})
+    assert after > before
+    print(f"   ✅ {len(PROJECTS)} octets -> gzip {len(gzipped.raw_body)}, br {len(brotlied.raw_body)}")
+
+def test_small_and_precompressed_untouched():
+    """Test des réponses relayées telles quelles : trop petites ou déjà compressées"""
+    print("\n🧪 Test Compression - pass-through")
+
+    precompressed = gzip.compress(PROJECTS)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/small":
+            return upstream_response(b'{"ok": true}', {"Content-Type": "application/json"})
+        return upstream_response(
+            precompressed,
+            {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+        )
+
+    small = get_raw(handler, "/api/v1/monitor/small", "gzip, br")
+    assert "content-encoding" not in small.headers
+    assert small.raw_body == b'{"ok": true}'
+
+    upstream_gzip = get_raw(handler, "/api/v1/monitor/deployments", "gzip, br")
+    assert upstream_gzip.headers["content-encoding"] == "gzip"
+    assert upstream_gzip.raw_body == precompressed
+    print("   ✅ Petite réponse non compressée, gzip du service relayé sans recompression")
+
+def main():
+    """Exécuter tous les tests de compression"""
+    print("🚀 Tests Compression - NoKube API Gateway\n")
+
+    try:
+        test_negotiation()
+        test_json_list_compressed()
+        test_small_and_precompressed_untouched()
+
+        print(f"\n✅ TOUS LES TESTS COMPRESSION RÉUSSIS!")
+
+    except Exception as e:
+        print(f"\n❌ ÉCHEC DU TEST COMPRESSION: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test du limiteur de débit par utilisateur de l'API Gateway
+Test sans microservices réels grâce à un transport httpx simulé
+"""
+
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+import httpx
+import jwt
+
+# Ajouter le module app au path
+sys.path.append(str(Path(__file__).parent))
+
+from fastapi.testclient import TestClient
+from fastapi import HTTPException
+from app.config import settings
+from app.client import service_client
+from app.pool import ServicePool
+from app.ratelimit import RateLimiter, rate_limiter
+from app.main import app
+
+settings.JWT_SECRET = "test-secret"
+
+def auth_headers(username: str) -> dict:
+    """Headers Authorization avec un token signé comme par l'Auth Service"""
+    payload = {"sub": username, "exp": int(time.time()) + 3600}
+    token = jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    return {"Authorization": f"Bearer {token}"}
+
+async def upstream_body(data: bytes):
+    """Body simulé lu en flux comme depuis une vraie connexion"""
+    yield data
+
+def test_bucket_exhausted_returns_429():
+    """Test du rejet 429 avec Retry-After une fois le burst consommé"""
+    print("🧪 Test Rate Limit - token bucket par utilisateur")
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=upstream_body(b'{"status": "ok"}'))
+
+    original_limits = rate_limiter.limits
+    rate_limiter.limits = {"monitor": (1.0, 3.0)}
+    rate_limiter.clear()
+    original_pool = service_client.pool
+    service_client.pool = ServicePool(httpx.MockTransport(handler))
+    try:
+        with TestClient(app) as client:
+            statuses = [
+                client.get("/api/v1/monitor/status", headers=auth_headers("alice")).status_code
+                for _ in range(3)
+            ]
+            limited = client.get("/api/v1/monitor/status", headers=auth_headers("alice"))
+            other = client.get("/api/v1/monitor/status", headers=auth_headers("bob"))
+    finally:
+        service_client.pool = original_pool
+        rate_limiter.limits = original_limits
+        rate_limiter.clear()
+
+    assert statuses == [200, 200, 200]
+    assert limited.status_code == 429
+    assert limited.headers["retry-after"] == "1"
+    assert other.status_code == 200
+    print("   ✅ 4e requête rejetée avec Retry-After, autre utilisateur non impacté")
+
+def test_concurrency_cap():
+    """Test du plafond de builds simultanés par utilisateur"""
+    print("\n🧪 Test Rate Limit - concurrence sur POST /builds")
+
+    # Burst de 3 jetons sans recharge : le 3e build, rejeté faute de place, ne doit pas en consommer
+    limiter = RateLimiter(
+        limits={"builds": {"rate": 0.001, "burst": 3}},
+        concurrency_limits={"POST /builds/builds$": 2},
+        shards=4
+    )
+
+    async def scenario():
+        release = asyncio.Event()
+        results = []
+
+        async def submit():
+            try:
+                async with limiter.limit("alice", "builds", "POST", "/builds/builds"):
+                    await release.wait()
+                results.append(200)
+            except HTTPException as e:
+                results.append(e.status_code)
+
+        tasks = [asyncio.create_task(submit()) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        release.set()
+        await asyncio.gather(*tasks)
+
+        # Les slots sont libérés une fois les requêtes terminées, le jeton restant est utilisable
+        async with limiter.limit("alice", "builds", "POST", "/builds/builds"):
+            pass
+        return results
+
+    results = asyncio.run(scenario())
+
+    assert sorted(results) == [200, 200, 429]
+    assert limiter.in_flight == {}
+    print("   ✅ 2 builds simultanés acceptés, le 3e rejeté sans consommer de jeton")
+
+def test_full_buckets_swept():
+    """Test du nettoyage des buckets redevenus pleins"""
+    print("\n🧪 Test Rate Limit - nettoyage des shards")
+
+    limiter = RateLimiter(limits={"projects": {"rate": 1000, "burst": 10}}, concurrency_limits={}, shards=1)
+    for i in range(500):
+        assert limiter.consume(f"user{i}", "projects") is None
+    assert limiter.get_stats()["buckets"] == 500
+
+    time.sleep(0.02)  # 20 jetons regagnés : tous les buckets sont pleins
+    limiter._sweep(time.monotonic())
+
+    assert limiter.get_stats()["buckets"] == 0
+    print("   ✅ 500 buckets inactifs supprimés")
+
+def main():
+    """Exécuter tous les tests du limiteur de débit"""
+    print("🚀 Tests Rate Limit - NoKube API Gateway\n")
+
+    try:
+        test_bucket_exhausted_returns_429()
+        test_concurrency_cap()
+        test_full_buckets_swept()
+
+        print(f"\n✅ TOUS LES TESTS RATE LIMIT RÉUSSIS!")
+
+    except Exception as e:
+        print(f"\n❌ ÉCHEC DU TEST RATE LIMIT: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Test du cache de réponses GET de l'API Gateway
+Test sans microservices réels grâce à un transport httpx simulé
+"""
+
+import sys
+import json
+import time
+from pathlib import Path
+
+import httpx
+import jwt
+
+# Ajouter le module app au path
+sys.path.append(str(Path(__file__).parent))
+
+from fastapi.testclient import TestClient
+from app.config import settings
+from app.client import service_client
+from app.pool import ServicePool
+from app.cache import response_cache
+from app.main import app
+
+settings.JWT_SECRET = "test-secret"
+
+def auth_headers(username: str) -> dict:
+    """Headers Authorization avec un token signé comme par l'Auth Service"""
+    payload = {"sub": username, "exp": int(time.time()) + 3600}
+    token = jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    return {"Authorization": f"Bearer {token}"}
+
+def upstream_response(status_code: int, body: bytes, headers: dict = None) -> httpx.Response:
+    """Réponse simulée lue en flux comme depuis une vraie connexion"""
+    async def stream():
+        yield body
+    return httpx.Response(status_code, content=stream(), headers=headers or {})
+
+def json_response(payload: dict) -> httpx.Response:
+    return upstream_response(
+        200, json.dumps(payload).encode(), {"Content-Type": "application/json"}
+    )
+
+def run_with_backend(handler, scenario):
+    """Exécuter un scénario contre la gateway branchée sur un backend simulé"""
+    original_pool = service_client.pool
+    service_client.pool = ServicePool(httpx.MockTransport(handler))
+    response_cache.clear()
+    try:
+        with TestClient(app) as client:
+            return scenario(client)
+    finally:
+        service_client.pool = original_pool
+        response_cache.clear()
+
+def test_get_cached_per_user():
+    """Test d'un GET servi depuis le cache, isolé par utilisateur"""
+    print("🧪 Test Cache Réponses - GET par utilisateur")
+
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/health":
+            return json_response({"status": "healthy"})
+        calls.append(request.headers["x-user"])
+        return json_response({"projects": [], "owner": request.headers["x-user"]})
+
+    def scenario(client):
+        first = client.get("/api/v1/projects/projects", headers=auth_headers("alice"))
+        second = client.get("/api/v1/projects/projects", headers=auth_headers("alice"))
+        other = client.get("/api/v1/projects/projects", headers=auth_headers("bob"))
+        return first, second, other
+
+    first, second, other = run_with_backend(handler, scenario)
+
+    assert first.headers["x-cache"] == "MISS"
+    assert second.headers["x-cache"] == "HIT"
+    assert second.json() == first.json()
+    assert other.json()["owner"] == "bob"
+    assert calls == ["alice", "bob"]
+    print("   ✅ 2 appels backend pour 3 requêtes, pas de fuite entre utilisateurs")
+
+def test_write_invalidates_user_cache():
+    """Test de l'invalidation du cache après un POST du même utilisateur"""
+    print("\n🧪 Test Cache Réponses - invalidation")
+
+    calls = {"get": 0}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/health":
+            return json_response({"status": "healthy"})
+        if request.method == "GET":
+            calls["get"] += 1
+            return json_response({"version": calls["get"]})
+        return json_response({"created": True})
+
+    def scenario(client):
+        headers = auth_headers("alice")
+        client.get("/api/v1/projects/projects", headers=headers)
+        client.post("/api/v1/projects/projects", json={"name": "app"}, headers=headers)
+        return client.get("/api/v1/projects/projects", headers=headers)
+
+    response = run_with_backend(handler, scenario)
+
+    assert response.headers["x-cache"] == "MISS"
+    assert response.json() == {"version": 2}
+    print("   ✅ GET rechargé depuis le service après le POST")
+
+def test_failed_write_keeps_cache():
+    """Test qu'une écriture rejetée par le service (4xx) n'invalide pas le cache"""
+    print("\n🧪 Test Cache Réponses - écriture en échec")
+
+    calls = {"get": 0}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/health":
+            return json_response({"status": "healthy"})
+        if request.method == "GET":
+            calls["get"] += 1
+            return json_response({"version": calls["get"]})
+        return upstream_response(422, b'{"detail": "invalid"}', {"Content-Type": "application/json"})
+
+    def scenario(client):
+        headers = auth_headers("alice")
+        client.get("/api/v1/projects/projects", headers=headers)
+        rejected = client.post("/api/v1/projects/projects", json={}, headers=headers)
+        return rejected, client.get("/api/v1/projects/projects", headers=headers)
+
+    rejected, response = run_with_backend(handler, scenario)
+
+    assert rejected.status_code == 422
+    assert response.headers["x-cache"] == "HIT"
+    assert calls["get"] == 1
+    print("   ✅ Cache conservé après un POST en 422")
+
+def test_json_mode_write_invalidates_cache():
+    """Test d'une écriture en mode json (réponse parsée en dict) : succès et invalidation"""
+    print("\n🧪 Test Cache Réponses - écriture en mode json")
+
+    calls = {"get": 0}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/health":
+            return json_response({"status": "healthy"})
+        if request.method == "GET":
+            calls["get"] += 1
+            return json_response({"version": calls["get"]})
+        return json_response({"created": True})
+
+    def scenario(client):
+        headers = auth_headers("alice")
+        client.get("/api/v1/projects/projects", headers=headers)
+        original_mode = settings.PROXY_MODE
+        settings.PROXY_MODE = "json"
+        try:
+            created = client.post("/api/v1/projects/projects", json={"name": "app"}, headers=headers)
+        finally:
+            settings.PROXY_MODE = original_mode
+        return created, client.get("/api/v1/projects/projects", headers=headers)
+
+    created, response = run_with_backend(handler, scenario)
+
+    assert created.status_code == 200
+    assert created.json() == {"created": True}
+    assert response.headers["x-cache"] == "MISS"
+    assert response.json() == {"version": 2}
+    print("   ✅ POST json relayé et cache de l'utilisateur invalidé")
+
+def test_write_during_get_not_cached():
+    """Test d'une écriture terminée pendant un GET en vol : la réponse du GET n'est pas stockée"""
+    print("\n🧪 Test Cache Réponses - écriture concurrente")
+
+    calls = {"get": 0}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/health":
+            return json_response({"status": "healthy"})
+        calls["get"] += 1
+        if calls["get"] == 1:
+            # Un POST du même utilisateur aboutit pendant que ce GET est chez le service
+            response_cache.invalidate("alice", "projects")
+        return json_response({"version": calls["get"]})
+
+    def scenario(client):
+        headers = auth_headers("alice")
+        first = client.get("/api/v1/projects/projects", headers=headers)
+        return first, client.get("/api/v1/projects/projects", headers=headers)
+
+    first, second = run_with_backend(handler, scenario)
+
+    assert first.json() == {"version": 1}
+    assert second.headers["x-cache"] == "MISS"
+    assert second.json() == {"version": 2}
+    print("   ✅ Réponse antérieure à l'écriture jamais servie depuis le cache")
+
+def test_no_store_not_cached():
+    """Test qu'une réponse marquée no-cache n'est jamais stockée"""
+    print("\n🧪 Test Cache Réponses - Cache-Control respecté")
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return upstream_response(200, b'{"status": "building"}', {"Cache-Control": "no-cache"})
+
+    def scenario(client):
+        client.get("/api/v1/builds/builds/abc", headers=auth_headers("alice"))
+        return client.get("/api/v1/builds/builds/abc", headers=auth_headers("alice"))
+
+    response = run_with_backend(handler, scenario)
+
+    assert response.headers["x-cache"] == "MISS"
+    print("   ✅ Réponse no-cache non stockée")
+
+def test_streaming_route_bypasses_cache():
+    """Test qu'une route de logs est relayée en flux, jamais bufferisée"""
+    print("\n🧪 Test Cache Réponses - routes de streaming")
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return upstream_response(200, b"data: log\n\n", {"Content-Type": "text/plain"})
+
+    def scenario(client):
+        return client.get("/api/v1/builds/builds/abc/logs", headers=auth_headers("alice"))
+
+    response = run_with_backend(handler, scenario)
+
+    assert "x-cache" not in response.headers
+    assert response.content == b"data: log\n\n"
+    print("   ✅ Logs relayés sans passer par le cache")
+
+def main():
+    """Exécuter tous les tests du cache de réponses"""
+    print("🚀 Tests Cache Réponses - NoKube API Gateway\n")
+
+    try:
+        test_get_cached_per_user()
+        test_write_invalidates_user_cache()
+        test_failed_write_keeps_cache()
+        test_json_mode_write_invalidates_cache()
+        test_write_during_get_not_cached()
+        test_no_store_not_cached()
+        test_streaming_route_bypasses_cache()
+
+        print(f"\n✅ TOUS LES TESTS CACHE RÉPONSES RÉUSSIS!")
+
+    except Exception as e:
+        print(f"\n❌ ÉCHEC DU TEST CACHE RÉPONSES: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Test de la liste de révocation des access tokens de l'API Gateway
+"""
+
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+import jwt
+from fastapi import HTTPException
+
+# Ajouter le module app au path
+sys.path.append(str(Path(__file__).parent))
+
+from app.config import settings
+from app.auth import verify_jwt_token, token_cache
+from app.revocation import BloomFilter, RevocationList, RevocationSubscriber, revocation_list
+
+settings.JWT_SECRET = "test-secret"
+
+def make_token(username: str, jti: str, expires_in: int = 900) -> str:
+    """Générer un access token comme le ferait l'Auth Service"""
+    payload = {"sub": username, "user_id": 1, "jti": jti, "exp": int(time.time()) + expires_in}
+    return jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+
+def test_bloom_filter():
+    """Test du filtre de Bloom : aucun faux négatif, faux positifs au taux attendu"""
+    print("🧪 Test Révocation - filtre de Bloom")
+    bloom = BloomFilter(1000, 0.01)
+    revoked = [f"revoked-{i}" for i in range(1000)]
+    for jti in revoked:
+        bloom.add(jti)
+
+    assert all(jti in bloom for jti in revoked)
+    false_positives = sum(1 for i in range(10000) if f"valid-{i}" in bloom)
+    assert false_positives < 300, f"{false_positives} faux positifs sur 10000"
+    print(f"   ✅ Aucun faux négatif, {false_positives / 100:.2f}% de faux positifs ({len(bloom.bits)} octets)")
+
+def test_revoked_token_rejected_from_cache():
+    """Test qu'un token déjà en cache est rejeté dès sa révocation"""
+    print("\n🧪 Test Révocation - token en cache révoqué")
+    token_cache.clear()
+    revocation_list.clear()
+
+    token = make_token("testuser", "a1b2c3")
+    assert verify_jwt_token(f"Bearer {token}") == "testuser"
+
+    revocation_list.add("a1b2c3", time.time() + 900)
+    try:
+        verify_jwt_token(f"Bearer {token}")
+        assert False, "Token révoqué accepté"
+    except HTTPException as e:
+        assert e.status_code == 401
+        assert e.detail == "Token has been revoked"
+
+    # Les autres tokens de l'utilisateur restent valides
+    assert verify_jwt_token(f"Bearer {make_token('testuser', 'd4e5f6')}") == "testuser"
+    revocation_list.clear()
+    print("   ✅ Token révoqué rejeté sans nouveau décodage")
+
+def test_expired_revocations_pruned():
+    """Test de la purge des révocations de tokens expirés et de la croissance de capacité"""
+    print("\n🧪 Test Révocation - purge et capacité")
+    revocations = RevocationList(capacity=4, false_positive_rate=0.01)
+    now = time.time()
+    revocations.replace([("old", now - 1), ("soon", now + 0.05), ("live", now + 900)])
+    assert set(revocations.exact) == {"soon", "live"}
+
+    time.sleep(0.1)
+    assert not revocations.is_revoked("soon")
+    revocations.prune()
+    assert set(revocations.exact) == {"live"}
+
+    for i in range(10):
+        revocations.add(f"jti-{i}", now + 900)
+    assert revocations.capacity >= 11
+    assert all(revocations.is_revoked(f"jti-{i}") for i in range(10))
+    print(f"   ✅ Révocations expirées purgées, capacité portée à {revocations.capacity}")
+
+def test_subscriber_applies_stream():
+    """Test de l'application du flux SSE de l'Auth Service (snapshot, révocations, heartbeat)"""
+    print("\n🧪 Test Révocation - flux SSE")
+    revocations = RevocationList(capacity=100, false_positive_rate=0.01)
+    subscriber = RevocationSubscriber(revocations, "http://auth-service:8000/revocations/stream")
+    exp = int(time.time()) + 900
+
+    async def lines():
+        for line in [
+            "event: snapshot", f'data: {{"revoked":[["jti-1",{exp}],["jti-2",{exp}]]}}', "",
+            ": keepalive", "",
+            "event: revoked", f'data: {{"jti":"jti-3","exp":{exp}}}', ""
+        ]:
+            yield line
+
+    asyncio.run(subscriber.consume(lines()))
+    assert subscriber.connected
+    assert all(revocations.is_revoked(jti) for jti in ("jti-1", "jti-2", "jti-3"))
+    assert not revocations.is_revoked("jti-4")
+    assert subscriber.events == 2
+    print("   ✅ Snapshot et révocation appliqués")
+
+def main():
+    """Exécuter tous les tests de révocation"""
+    print("🚀 Tests Révocation - NoKube API Gateway\n")
+
+    try:
+        test_bloom_filter()
+        test_revoked_token_rejected_from_cache()
+        test_expired_revocations_pruned()
+        test_subscriber_applies_stream()
+
+        print(f"\n✅ TOUS LES TESTS RÉVOCATION RÉUSSIS!")
+
+    except Exception as e:
+        print(f"\n❌ ÉCHEC DU TEST RÉVOCATION: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Test de la table de routage déclarative de l'API Gateway
+Test sans microservices réels grâce à un transport httpx simulé
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import jwt
+
+# Ajouter le module app au path
+sys.path.append(str(Path(__file__).parent))
+
+from fastapi.testclient import TestClient
+from app.client import service_client
+from app.config import settings
+from app.pool import ServicePool
+from app.router import RouteTable
+from app.main import app
+
+settings.JWT_SECRET = "test-secret"
+
+SERVICES = {"auth": "http://auth", "builds": "http://builds"}
+
+async def upstream_body(data: bytes):
+    """Body simulé lu en flux comme depuis une vraie connexion"""
+    yield data
+
+def test_trie_resolution():
+    """Test de la résolution des politiques : préfixe le plus profond, exact avant joker"""
+    print("🧪 Test Router - résolution dans le trie")
+
+    table = RouteTable(SERVICES, {
+        "/auth/login": {"auth_required": False},
+        "/builds": {"cache_ttl": 2},
+        "/builds/builds/*/logs": {"streaming": True, "timeout": 300},
+        "/builds/builds/latest": {"cache_ttl": 0},
+        "/auth/revocations": {"internal": True}
+    })
+
+    policy, service_path = table.resolve("/auth/login")
+    assert not policy.auth_required and service_path == "/login"
+    assert table.resolve("/auth/me")[0].auth_required
+
+    logs, service_path = table.resolve("/builds/builds/abc/logs")
+    assert logs.streaming and logs.timeout == 300 and logs.cache_ttl == 2
+    assert service_path == "/builds/abc/logs"
+
+    assert table.resolve("/builds/builds/abc")[0].cache_ttl == 2
+    assert table.resolve("/builds/builds/latest")[0].cache_ttl == 0
+    assert not table.resolve("/builds/builds/latest")[0].streaming
+    assert table.resolve("/unknown/path") is None
+    assert table.resolve("/auth/revocations/stream") is None
+    assert table.resolve("/builds/builds/")[0].cache_ttl == 2
+    for ambiguous in ("/auth/login/../revocations/stream", "/auth/./login", "/auth//login", "/auth/x/%2E%2e/login"):
+        assert table.resolve(ambiguous) is None, ambiguous
+
+    try:
+        RouteTable(SERVICES, {"/unknown": {"timeout": 1}})
+        assert False, "Politique acceptée pour un service inconnu"
+    except ValueError:
+        pass
+    print("   ✅ Politiques héritées et surchargées comme attendu")
+
+def test_single_proxy_routes_services():
+    """Test du proxy unique : endpoint public sans token, endpoint protégé en 401"""
+    print("\n🧪 Test Router - proxy unique")
+
+    received = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        received.append(request.url.path)
+        return httpx.Response(200, content=upstream_body(b'{"access_token": "abc"}'))
+
+    original_pool = service_client.pool
+    service_client.pool = ServicePool(httpx.MockTransport(handler))
+    try:
+        with TestClient(app) as client:
+            login = client.post("/api/v1/auth/login", json={"username": "alice"})
+            protected = client.get("/api/v1/builds/builds")
+            unknown = client.get("/api/v1/unknown/things")
+            internal = [
+                client.get(f"/api/v1/auth/{path}", headers={"Authorization": "Bearer x"})
+                for path in ("revocations/stream", "stats", "metrics")
+            ]
+    finally:
+        service_client.pool = original_pool
+
+    assert login.status_code == 200
+    assert "/login" in received
+    assert protected.status_code == 401
+    assert unknown.status_code == 404
+    assert all(response.status_code == 404 for response in internal)
+    assert not any(path in received for path in ("/revocations/stream", "/stats", "/metrics"))
+    print("   ✅ Login relayé sans token, builds protégé, service inconnu et routes internes en 404")
+
+def test_dot_segments_rejected():
+    """Test du contournement par segments "..": ni route interne ni route protégée atteinte"""
+    print("\n🧪 Test Router - segments . et ..")
+
+    received = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        received.append(request.url.path)
+        return httpx.Response(200, content=upstream_body(b'{"ok": true}'))
+
+    original_pool = service_client.pool
+    service_client.pool = ServicePool(httpx.MockTransport(handler))
+    try:
+        with TestClient(app) as client:
+            # %2e%2e : non normalisé par le client de test, décodé en ".." par la gateway
+            proxied = [
+                client.get("/api/v1/auth/login/%2e%2e/stats"),
+                client.get("/api/v1/auth/login/%2e%2e/me"),
+            ]
+            token = jwt.encode(
+                {"sub": "alice", "exp": int(time.time()) + 3600},
+                settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM
+            )
+            batch = client.post(
+                "/api/v1/batch",
+                json={"requests": [{"id": "stats", "path": "/auth/login/../stats"}]},
+                headers={"Authorization": f"Bearer {token}"}
+            )
+    finally:
+        service_client.pool = original_pool
+
+    assert all(response.status_code == 404 for response in proxied)
+    assert batch.status_code == 200
+    assert batch.json()["responses"][0]["status"] == 404
+    assert not any(path in received for path in ("/stats", "/me"))
+    print("   ✅ Chemins avec .. rejetés en 404 sans appel au service")
+
+def test_body_size_limit():
+    """Test du rejet 413 d'un body dépassant la limite de la route"""
+    print("\n🧪 Test Router - taille max du body")
+
+    calls = {"count": 0}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path != "/health":
+            calls["count"] += 1
+        return httpx.Response(200, content=upstream_body(b"{}"))
+
+    original_pool = service_client.pool
+    service_client.pool = ServicePool(httpx.MockTransport(handler))
+    try:
+        with TestClient(app) as client:
+            response = client.post(
+                "/api/v1/auth/register",
+                content=b"x" * (64 * 1024 + 1),
+                headers={"Content-Type": "application/json"}
+            )
+    finally:
+        service_client.pool = original_pool
+
+    assert response.status_code == 413
+    assert calls["count"] == 0
+    print("   ✅ Body de 64 Ko + 1 rejeté sans appel au service")
+
+def test_json_mode_forwards_authorization():
+    """Test du mode json : le header Authorization du client atteint le service (logout)"""
+    print("\n🧪 Test Router - headers transmis en mode json")
+
+    received = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/logout":
+            received.update(request.headers)
+        return httpx.Response(200, json={"message": "Logged out"})
+
+    original_pool, original_mode = service_client.pool, settings.PROXY_MODE
+    service_client.pool = ServicePool(httpx.MockTransport(handler))
+    settings.PROXY_MODE = "json"
+    try:
+        with TestClient(app) as client:
+            response = client.post(
+                "/api/v1/auth/logout",
+                json={"refresh_token": "r"},
+                headers={"Authorization": "Bearer abc"}
+            )
+    finally:
+        service_client.pool, settings.PROXY_MODE = original_pool, original_mode
+
+    assert response.status_code == 200
+    assert received.get("authorization") == "Bearer abc"
+    assert received.get("content-type") == "application/json"
+    print("   ✅ Authorization relayé au service avec le body ré-sérialisé")
+
+def main():
+    """Exécuter tous les tests de la table de routage"""
+    print("🚀 Tests Router - NoKube API Gateway\n")
+
+    try:
+        test_trie_resolution()
+        test_single_proxy_routes_services()
+        test_dot_segments_rejected()
+        test_body_size_limit()
+        test_json_mode_forwards_authorization()
+
+        print(f"\n✅ TOUS LES TESTS ROUTER RÉUSSIS!")
+
+    except Exception as e:
+        print(f"\n❌ ÉCHEC DU TEST ROUTER: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,611 @@
+#!/usr/bin/env python3
+"""
+Test du ServiceClient de l'API Gateway
+Test sans microservices réels grâce à un transport httpx simulé
+"""
+
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+import httpx
+
+# Ajouter le module app au path
+sys.path.append(str(Path(__file__).parent))
+
+from fastapi.testclient import TestClient
+from fastapi import HTTPException
+from app.config import settings
+from app.client import ServiceClient, service_client
+from app.breaker import CircuitBreaker
+from app.pool import ServicePool
+from app.health import HealthMonitor
+from app.metrics import registry
+from app.main import app
+
+async def upstream_body(data: bytes):
+    """Body simulé lu en flux comme depuis une vraie connexion"""
+    yield data
+
+def make_client(handler) -> ServiceClient:
+    """Créer un ServiceClient branché sur un backend simulé"""
+    return ServiceClient(transport=httpx.MockTransport(handler))
+
+def test_pool_reuses_clients():
+    """Test de la réutilisation du client keep-alive entre les requêtes"""
+    print("🧪 Test Pool - réutilisation des connexions")
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"path": request.url.path})
+
+    async def scenario():
+        service_client = make_client(handler)
+        await service_client.start()
+
+        first_client = service_client.pool.get_client("projects")
+        for _ in range(3):
+            data = await service_client.forward_request("projects", "/projects")
+            assert data == {"path": "/projects"}
+
+        assert service_client.pool.get_client("projects") is first_client
+        stats = service_client.pool.get_stats()["pools"]["projects"]
+        assert stats["requests"] == 3
+        assert stats["in_flight"] == 0
+
+        await service_client.close()
+        assert service_client.pool.clients == {}
+
+    asyncio.run(scenario())
+    print("   ✅ 3 requêtes servies par le même client")
+
+def test_pools_endpoint():
+    """Test de l'endpoint de statistiques des pools"""
+    print("\n🧪 Test Pools Endpoint")
+
+    with TestClient(app) as client:
+        response = client.get("/gateway/pools")
+        assert response.status_code == 200
+
+        data = response.json()
+        assert "limits" in data
+        assert set(data["pools"].keys()) == {"auth", "projects", "builds", "monitor"}
+    print(f"   ✅ {len(data['pools'])} pools exposés")
+
+def test_stream_mode_passthrough():
+    """Test du proxy en mode stream : status, headers et body bruts conservés"""
+    print("\n🧪 Test Proxy Stream - pass-through brut")
+
+    received = {}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        received["body"] = await request.aread()
+        received["content_type"] = request.headers.get("content-type")
+        received["x_user"] = request.headers.get("x-user")
+        return httpx.Response(
+            409,
+            content=upstream_body(b"data: not json\n\n"),
+            headers={"Content-Type": "text/plain", "X-Upstream": "auth"}
+        )
+
+    original_pool = service_client.pool
+    service_client.pool = ServicePool(httpx.MockTransport(handler))
+    try:
+        with TestClient(app) as client:
+            response = client.post(
+                "/api/v1/auth/register",
+                content=b'{"username": "testuser"}',
+                headers={"Content-Type": "application/json", "X-User": "spoofed"}
+            )
+    finally:
+        service_client.pool = original_pool
+
+    assert response.status_code == 409
+    assert response.content == b"data: not json\n\n"
+    assert response.headers["x-upstream"] == "auth"
+    assert received["body"] == b'{"username": "testuser"}'
+    assert received["content_type"] == "application/json"
+    assert received["x_user"] is None  # X-User du client jamais relayé
+    print("   ✅ Status 409, headers et body non-JSON relayés tels quels")
+
+def test_stream_mode_releases_on_body_error():
+    """Test du proxy en mode stream : connexion rendue au pool si la lecture du body lève"""
+    print("\n🧪 Test Proxy Stream - libération sur erreur de lecture")
+
+    async def broken_body():
+        yield b"partial"
+        raise httpx.ReadError("connection reset")
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=broken_body())
+
+    async def scenario():
+        service_client = make_client(handler)
+        proxied = await service_client.proxy_request("projects", "/projects", "GET")
+        assert service_client.pool.get_stats()["pools"]["projects"]["in_flight"] == 1
+
+        chunks = []
+        try:
+            async for chunk in proxied.body_iterator:
+                chunks.append(chunk)
+            assert False, "Erreur de lecture avalée"
+        except httpx.ReadError:
+            pass
+
+        assert chunks == [b"partial"]
+        assert service_client.pool.get_stats()["pools"]["projects"]["in_flight"] == 0
+        # La tâche de fond éventuelle ne compte pas la requête deux fois
+        await proxied.background()
+        assert service_client.pool.get_stats()["pools"]["projects"]["in_flight"] == 0
+
+    asyncio.run(scenario())
+    print("   ✅ Connexion libérée une seule fois malgré l'erreur")
+
+def test_health_probes_concurrent():
+    """Test des health checks lancés en parallèle et servis depuis le snapshot"""
+    print("\n🧪 Test Health - sondes concurrentes")
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.2)
+        return httpx.Response(200, json={"status": "healthy"})
+
+    async def scenario():
+        monitor = HealthMonitor(make_client(handler))
+
+        start = time.time()
+        await monitor.refresh()
+        elapsed = time.time() - start
+        assert elapsed < 0.6, f"Sondes séquentielles ({elapsed:.2f}s)"
+
+        statuses = await monitor.get_statuses()
+        assert [s.status for s in statuses] == ["healthy"] * 4
+        assert all(len(s.latency_history_ms) == 1 for s in statuses)
+        assert all(s.staleness_s is not None for s in statuses)
+        return elapsed
+
+    elapsed = asyncio.run(scenario())
+    print(f"   ✅ 4 services sondés en {elapsed:.2f}s")
+
+def test_health_probes_each_endpoint():
+    """Test des health checks par instance : un pod mort derrière le service headless est signalé"""
+    print("\n🧪 Test Health - sonde de chaque instance")
+
+    probed = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        probed.append(request.url.host)
+        if request.url.host == "10.0.0.2":
+            raise httpx.ConnectError("connection refused")
+        return httpx.Response(200, json={"status": "healthy"})
+
+    async def scenario():
+        service_client = make_client(handler)
+        service_client.balancers.get("monitor").set_urls(["http://10.0.0.1:8000", "http://10.0.0.2:8000"])
+        return await service_client.check_service_health("monitor")
+
+    status = asyncio.run(scenario())
+
+    assert sorted(probed) == ["10.0.0.1", "10.0.0.2"]
+    assert status.status == "degraded"
+    assert {endpoint.url: endpoint.status for endpoint in status.endpoints} == {
+        "http://10.0.0.1:8000": "healthy",
+        "http://10.0.0.2:8000": "unhealthy"
+    }
+    assert status.response_time_ms is not None
+    print("   ✅ 2 instances sondées, service signalé dégradé")
+
+def test_circuit_breaker_fast_fail():
+    """Test de l'ouverture du circuit après une série d'erreurs 5xx"""
+    print("\n🧪 Test Circuit Breaker - fast-fail")
+
+    calls = {"count": 0}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls["count"] += 1
+        return httpx.Response(500, json={"detail": "boom"})
+
+    async def scenario():
+        service_client = make_client(handler)
+        for _ in range(settings.BREAKER_MIN_CALLS):
+            try:
+                await service_client.forward_request("monitor", "/deployments")
+            except HTTPException as e:
+                assert e.status_code == 500
+
+        breaker = service_client.breakers.get("monitor")
+        assert breaker.state == "open"
+
+        try:
+            await service_client.forward_request("monitor", "/deployments")
+            assert False, "Requête transmise malgré le circuit ouvert"
+        except HTTPException as e:
+            assert e.status_code == 503
+            assert "Retry-After" in e.headers
+
+        assert calls["count"] == settings.BREAKER_MIN_CALLS
+        assert service_client.breakers.get("projects").state == "closed"
+
+    asyncio.run(scenario())
+    print("   ✅ Circuit ouvert, requête suivante rejetée en 503 sans appel")
+
+def test_circuit_breaker_window_expiry():
+    """Test de la fenêtre glissante : les échecs expirés ne comptent plus dans les taux"""
+    print("\n🧪 Test Circuit Breaker - expiration de la fenêtre")
+
+    breaker = CircuitBreaker("monitor")
+    expired = time.monotonic() - settings.BREAKER_WINDOW_S - 1
+    for _ in range(settings.BREAKER_MIN_CALLS):
+        breaker._append(expired, True, True)
+
+    for _ in range(settings.BREAKER_MIN_CALLS):
+        breaker.record(False, 5)
+
+    state = breaker.get_state()
+    assert state["state"] == "closed"
+    assert state["window_calls"] == settings.BREAKER_MIN_CALLS
+    assert state["error_rate"] == 0 and state["slow_call_rate"] == 0
+
+    breaker.record(True, settings.BREAKER_SLOW_CALL_MS)
+    assert breaker.window_failures == 1 and breaker.window_slow == 1
+    print("   ✅ Échecs expirés retirés des compteurs de la fenêtre")
+
+def test_circuit_breaker_half_open_cancelled_probes():
+    """Test qu'un essai half-open annulé (client parti, hedge perdant) rend sa place"""
+    print("\n🧪 Test Circuit Breaker - essais half-open annulés")
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/hang":
+            await asyncio.sleep(10)
+        return httpx.Response(200, content=upstream_body(b'{"ok": true}'))
+
+    async def scenario():
+        service_client = make_client(handler)
+        breaker = service_client.breakers.get("monitor")
+        breaker._open(time.monotonic() - settings.BREAKER_OPEN_DURATION_S - 1)
+
+        for _ in range(settings.BREAKER_HALF_OPEN_CALLS + 1):
+            task = asyncio.ensure_future(service_client.forward_request("monitor", "/hang"))
+            await asyncio.sleep(0.02)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+        assert breaker.state == "half_open"
+        assert breaker.half_open_in_flight == 0
+
+        # Les essais suivants passent toujours et referment le circuit
+        for _ in range(settings.BREAKER_HALF_OPEN_CALLS):
+            assert await service_client.forward_request("monitor", "/ok") == {"ok": True}
+        assert breaker.state == "closed"
+        assert service_client.limiters.get("monitor").in_flight == 0
+
+    asyncio.run(scenario())
+    print("   ✅ Places half-open rendues, le circuit se referme")
+
+def test_identical_gets_coalesced():
+    """Test de la fusion des GET identiques en vol en un seul appel upstream"""
+    print("\n🧪 Test Coalescing - GET identiques concurrents")
+
+    calls = {"count": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls["count"] += 1
+        await asyncio.sleep(0.1)
+        return httpx.Response(200, content=upstream_body(b'{"status": "building"}'))
+
+    async def scenario():
+        service_client = make_client(handler)
+        alice = {"X-User": "alice"}
+        results = await asyncio.gather(
+            *[service_client.fetch("builds", "/builds/abc", headers=alice) for _ in range(5)],
+            service_client.fetch("builds", "/builds/abc", headers={"X-User": "bob"})
+        )
+        assert all(r.body == b'{"status": "building"}' for r in results)
+        assert calls["count"] == 2  # un appel pour alice, un pour bob
+        assert service_client.coalesced_requests == 4
+        assert service_client.in_flight == {}
+
+    asyncio.run(scenario())
+    print("   ✅ 6 requêtes, 2 appels upstream, 4 dédupliquées")
+
+def test_retry_on_connect_error():
+    """Test du retry d'un GET après une erreur de connexion (redémarrage d'un pod)"""
+    print("\n🧪 Test Retry - erreur de connexion")
+
+    calls = {"count": 0}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls["count"] += 1
+        if calls["count"] == 1:
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(200, json={"projects": []})
+
+    async def scenario():
+        service_client = make_client(handler)
+        data = await service_client.forward_request("projects", "/projects")
+        assert data == {"projects": []}
+        assert service_client.retry_budget.retries == 1
+
+        # POST non idempotent : jamais rejoué
+        calls["count"] = 0
+        try:
+            await service_client.forward_request("projects", "/projects", method="POST", json_data={})
+            assert False, "POST rejoué après une erreur de connexion"
+        except HTTPException as e:
+            assert e.status_code == 503
+        assert calls["count"] == 1
+
+    asyncio.run(scenario())
+    print("   ✅ GET rejoué avec succès, POST non rejoué")
+
+def test_retry_budget_exhausted():
+    """Test du budget de retries : une panne franche n'est pas amplifiée"""
+    print("\n🧪 Test Retry - budget global")
+
+    calls = {"count": 0}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls["count"] += 1
+        return httpx.Response(503, json={"detail": "restarting"})
+
+    async def scenario():
+        service_client = make_client(handler)
+        service_client.retry_budget.tokens = 2
+        service_client.retry_budget.min_per_s = 0
+        for _ in range(5):
+            try:
+                await service_client.forward_request("builds", "/builds")
+            except HTTPException as e:
+                assert e.status_code == 503
+
+    asyncio.run(scenario())
+    assert calls["count"] == 5 + 2  # 5 requêtes + 2 retries permis par le budget
+    print(f"   ✅ {calls['count']} appels upstream pour 5 requêtes en échec")
+
+def test_hedged_get_first_response_wins():
+    """Test du hedging : un GET lent est dupliqué, la réponse la plus rapide gagne"""
+    print("\n🧪 Test Hedging - première réponse gagnante")
+
+    calls = {"count": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls["count"] += 1
+        if request.url.path == "/slow" and calls["count"] % 2 == 1:
+            await asyncio.sleep(1)  # réplica lent
+        return httpx.Response(200, content=upstream_body(b'{"ok": true}'))
+
+    async def scenario():
+        service_client = make_client(handler)
+        for _ in range(settings.HEDGE_MIN_SAMPLES):
+            service_client.latencies("monitor").record(5)
+
+        calls["count"] = 0
+        start = time.time()
+        upstream = await service_client.fetch("monitor", "/slow")
+        elapsed = time.time() - start
+
+        assert upstream.body == b'{"ok": true}'
+        assert calls["count"] == 2
+        assert elapsed < 0.5
+        await asyncio.sleep(0)
+        assert service_client.pool.get_stats()["pools"]["monitor"]["in_flight"] == 0
+
+    original = settings.HEDGE_ENABLED
+    settings.HEDGE_ENABLED = True
+    try:
+        asyncio.run(scenario())
+    finally:
+        settings.HEDGE_ENABLED = original
+    print("   ✅ Requête dupliquée après le p95, réponse en moins de 0.5s")
+
+def test_hedged_loser_releases_counters():
+    """Test qu'un essai hedgé perdant annulé rend ses places (breaker, limite, instance, pool)"""
+    print("\n🧪 Test Hedging - compteurs libérés par le perdant")
+
+    calls = {"count": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls["count"] += 1
+        if calls["count"] == 1:
+            await asyncio.sleep(1)  # essai d'origine lent : perdant
+        return httpx.Response(200, content=upstream_body(b'{"ok": true}'))
+
+    async def scenario():
+        service_client = make_client(handler)
+        for _ in range(settings.HEDGE_MIN_SAMPLES):
+            service_client.latencies("monitor").record(5)
+        breaker = service_client.breakers.get("monitor")
+        breaker._open(time.monotonic() - settings.BREAKER_OPEN_DURATION_S - 1)
+
+        upstream = await service_client.fetch("monitor", "/slow")
+        assert upstream.body == b'{"ok": true}'
+        for _ in range(3):
+            await asyncio.sleep(0)
+
+        assert calls["count"] == 2
+        assert breaker.half_open_in_flight == 0
+        assert service_client.limiters.get("monitor").in_flight == 0
+        endpoints = service_client.balancers.get("monitor").get_state()["endpoints"]
+        assert all(endpoint["in_flight"] == 0 for endpoint in endpoints)
+        assert service_client.pool.get_stats()["pools"]["monitor"]["in_flight"] == 0
+
+    original = settings.HEDGE_ENABLED
+    settings.HEDGE_ENABLED = True
+    try:
+        asyncio.run(scenario())
+    finally:
+        settings.HEDGE_ENABLED = original
+    print("   ✅ Breaker, limite, instance et pool revenus à zéro")
+
+def test_adaptive_limit_sheds_overload():
+    """Test du délestage : au-delà de la limite et de la file d'attente, 503 immédiat"""
+    print("\n🧪 Test Limite adaptative - délestage")
+
+    calls = {"count": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls["count"] += 1
+        await asyncio.sleep(0.3)
+        return httpx.Response(201, content=upstream_body(b'{"created": true}'))
+
+    async def scenario():
+        service_client = make_client(handler)
+        limiter = service_client.limiters.get("projects")
+        limiter.limit = 2.0
+
+        start = time.time()
+        results = await asyncio.gather(
+            *[service_client.forward_request("projects", "/projects", method="POST") for _ in range(4)],
+            return_exceptions=True
+        )
+        elapsed = time.time() - start
+
+        shed = [r for r in results if isinstance(r, HTTPException)]
+        assert len(shed) == 2
+        assert all(e.status_code == 503 and "Retry-After" in e.headers for e in shed)
+        assert calls["count"] == 2
+        assert elapsed < 0.5
+
+        state = limiter.get_state()
+        assert state["shed"] == 2 and state["in_flight"] == 0 and state["queue_depth"] == 0
+
+    original = (settings.ADAPTIVE_LIMIT_QUEUE_SIZE, settings.ADAPTIVE_LIMIT_QUEUE_TIMEOUT_MS)
+    settings.ADAPTIVE_LIMIT_QUEUE_SIZE, settings.ADAPTIVE_LIMIT_QUEUE_TIMEOUT_MS = 1, 50
+    try:
+        asyncio.run(scenario())
+    finally:
+        settings.ADAPTIVE_LIMIT_QUEUE_SIZE, settings.ADAPTIVE_LIMIT_QUEUE_TIMEOUT_MS = original
+    print("   ✅ 2 requêtes servies, 1 rejetée file pleine, 1 rejetée après attente")
+
+def test_adaptive_limit_aimd():
+    """Test AIMD : +1 sur réponse rapide, baisse multiplicative sur latence dégradée ou surcharge"""
+    print("\n🧪 Test Limite adaptative - AIMD")
+
+    async def scenario():
+        service_client = make_client(lambda request: httpx.Response(200))
+        limiter = service_client.limiters.get("builds")
+        limiter.limit = 10.0
+        for _ in range(8):
+            await limiter.acquire()
+
+        limiter.release(10)
+        assert limiter.get_state()["limit"] == 11
+
+        limiter.release(200)  # latence bien au-delà de la base de 10ms
+        assert limiter.get_state()["limit"] == 9
+
+        limiter.release(overloaded=True)  # même aller-retour : pas de nouvelle baisse
+        assert limiter.get_state()["limit"] == 9
+        assert limiter.get_state()["decreases"] == 1
+
+        for _ in range(5):
+            limiter.release(10)
+        assert limiter.in_flight == 0
+
+    asyncio.run(scenario())
+
+    with TestClient(app) as client:
+        services = client.get("/services/status").json()["services"]
+    assert all("limit" in status["concurrency"] for status in services)
+    print("   ✅ Limite 10 → 11 → 9, une seule baisse par aller-retour")
+
+def test_adaptive_limit_ignores_slow_writes():
+    """Test que des écritures lentes par nature (déploiements) ne font pas baisser la limite des lectures"""
+    print("\n🧪 Test Limite adaptative - écritures lentes")
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.method == "POST":
+            await asyncio.sleep(0.12)  # appel K8s : lent même à vide
+        return httpx.Response(200, content=upstream_body(b'{"ok": true}'))
+
+    async def scenario():
+        service_client = make_client(handler)
+        limiter = service_client.limiters.get("monitor")
+        initial = limiter.get_state()["limit"]
+
+        for _ in range(3):
+            await service_client.fetch("monitor", "/status")
+        await asyncio.gather(*[
+            service_client.fetch("monitor", "/deploy", method="POST", content=b"{}")
+            for _ in range(5)
+        ], *[service_client.fetch("monitor", "/status") for _ in range(5)])
+        for _ in range(5):
+            await service_client.fetch("monitor", "/deploy", method="POST", content=b"{}")
+
+        state = limiter.get_state()
+        assert state["decreases"] == 0
+        assert state["limit"] >= initial
+
+    asyncio.run(scenario())
+    print("   ✅ Limite inchangée après 10 déploiements de 120ms")
+
+def test_metrics_endpoint():
+    """Test des métriques Prometheus : compteurs, latence upstream et surcoût gateway"""
+    print("\n🧪 Test Métriques Prometheus")
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/health":
+            return httpx.Response(200, content=upstream_body(b'{"status": "healthy"}'))
+        await asyncio.sleep(0.05)
+        return httpx.Response(201, content=upstream_body(b'{"created": true}'))
+
+    def sample(name, **labels):
+        return registry.get_sample_value(name, labels) or 0.0
+
+    labels = {"service": "auth", "method": "POST", "status": "201"}
+    before_requests = sample("gateway_requests_total", **labels)
+    before_upstream = sample("gateway_upstream_duration_seconds_sum", **labels)
+
+    original_pool = service_client.pool
+    service_client.pool = ServicePool(httpx.MockTransport(handler))
+    try:
+        with TestClient(app) as client:
+            client.post("/api/v1/auth/register", json={"username": "testuser"})
+            client.request("FOOBAR", "/api/v1/auth/register")
+            response = client.get("/metrics")
+    finally:
+        service_client.pool = original_pool
+
+    assert response.status_code == 200
+    assert "gateway_requests_in_flight" in response.text
+    assert sample("gateway_requests_total", **labels) == before_requests + 1
+    assert sample("gateway_upstream_duration_seconds_sum", **labels) - before_upstream >= 0.05
+    assert sample("gateway_overhead_duration_seconds_count", service="auth", method="POST") >= 1
+    assert 'method="FOOBAR"' not in response.text
+    assert sample("gateway_requests_total", service="auth", method="other", status="405") >= 1
+    print("   ✅ Requête comptée, latence upstream séparée du surcoût gateway, verbe inconnu en \"other\"")
+
+def main():
+    """Exécuter tous les tests du ServiceClient"""
+    print("🚀 Tests ServiceClient - NoKube API Gateway\n")
+
+    try:
+        test_pool_reuses_clients()
+        test_pools_endpoint()
+        test_stream_mode_passthrough()
+        test_stream_mode_releases_on_body_error()
+        test_health_probes_concurrent()
+        test_health_probes_each_endpoint()
+        test_circuit_breaker_fast_fail()
+        test_circuit_breaker_window_expiry()
+        test_circuit_breaker_half_open_cancelled_probes()
+        test_identical_gets_coalesced()
+        test_retry_on_connect_error()
+        test_retry_budget_exhausted()
+        test_hedged_get_first_response_wins()
+        test_hedged_loser_releases_counters()
+        test_adaptive_limit_sheds_overload()
+        test_adaptive_limit_aimd()
+        test_adaptive_limit_ignores_slow_writes()
+        test_metrics_endpoint()
+
+        print(f"\n✅ TOUS LES TESTS SERVICECLIENT RÉUSSIS!")
+
+    except Exception as e:
+        print(f"\n❌ ÉCHEC DU TEST SERVICECLIENT: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
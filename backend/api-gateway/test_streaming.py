@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Test du pass-through des flux longs (SSE, WebSocket) de l'API Gateway
+Test avec un transport httpx simulé et un serveur WebSocket local
+"""
+
+import sys
+import time
+import asyncio
+import threading
+from pathlib import Path
+
+import httpx
+import jwt
+from websockets.asyncio.server import serve
+
+# Ajouter le module app au path
+sys.path.append(str(Path(__file__).parent))
+
+from fastapi.testclient import TestClient
+from app.config import settings
+from app.client import service_client
+from app.pool import ServicePool
+from app.streaming import relay_stream
+from app.main import app
+
+settings.JWT_SECRET = "test-secret"
+
+def make_token(username: str) -> str:
+    payload = {"sub": username, "exp": int(time.time()) + 3600}
+    return jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+
+def test_sse_heartbeat():
+    """Test des heartbeats SSE pendant qu'un build ne produit pas de logs"""
+    print("🧪 Test Streaming - SSE avec heartbeats")
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        async def logs():
+            yield b"data: step 1\n\n"
+            await asyncio.sleep(0.25)  # étape longue sans sortie
+            yield b"data: step 2\n\n"
+        return httpx.Response(200, content=logs(), headers={"Content-Type": "text/event-stream"})
+
+    original_pool = service_client.pool
+    original_interval = settings.SSE_HEARTBEAT_INTERVAL
+    service_client.pool = ServicePool(httpx.MockTransport(handler))
+    settings.SSE_HEARTBEAT_INTERVAL = 0.05
+    try:
+        with TestClient(app) as client:
+            response = client.get(
+                "/api/v1/builds/builds/abc/logs",
+                headers={"Authorization": f"Bearer {make_token('alice')}", "Accept-Encoding": "identity"}
+            )
+    finally:
+        service_client.pool = original_pool
+        settings.SSE_HEARTBEAT_INTERVAL = original_interval
+
+    body = response.content
+    assert response.status_code == 200
+    assert response.headers["x-accel-buffering"] == "no"
+    assert body.startswith(b"data: step 1\n\n")
+    assert body.endswith(b"data: step 2\n\n")
+    assert body.count(b": keep-alive\n\n") >= 2
+    print(f"   ✅ {body.count(b': keep-alive')} heartbeats entre deux lignes de logs")
+
+def test_stream_unexpected_error_ends_relay():
+    """Test d'une erreur inattendue de l'upstream : le relais se termine au lieu d'attendre"""
+    print("\n🧪 Test Streaming - erreur inattendue en cours de flux")
+
+    async def logs():
+        yield b"data: step 1\n\n"
+        raise RuntimeError("decoder crashed")
+
+    async def scenario():
+        response = httpx.Response(200, content=logs(), request=httpx.Request("GET", "http://builds/logs"))
+        return [chunk async for chunk in relay_stream(response, 0.05)]
+
+    chunks = asyncio.run(asyncio.wait_for(scenario(), 2))
+    assert chunks[0] == b"data: step 1\n\n"
+    print("   ✅ Flux terminé après le dernier chunk reçu")
+
+def test_websocket_passthrough():
+    """Test du relais WebSocket bidirectionnel avec JWT en paramètre access_token"""
+    print("\n🧪 Test Streaming - pass-through WebSocket")
+
+    received = {}
+    ready = threading.Event()
+    stop = threading.Event()
+
+    async def echo(connection):
+        received["x_user"] = connection.request.headers.get("x-user")
+        received["path"] = connection.request.path
+        async for message in connection:
+            await connection.send(f"echo: {message}")
+
+    def run_upstream():
+        async def main():
+            async with serve(echo, "127.0.0.1", 0) as server:
+                received["port"] = server.sockets[0].getsockname()[1]
+                ready.set()
+                while not stop.is_set():
+                    await asyncio.sleep(0.01)
+        asyncio.run(main())
+
+    thread = threading.Thread(target=run_upstream, daemon=True)
+    thread.start()
+    ready.wait(5)
+
+    balancer = service_client.balancers.get("monitor")
+    original_urls = list(balancer.endpoints)
+    balancer.set_urls([f"http://127.0.0.1:{received['port']}"])
+    endpoint = next(iter(balancer.endpoints.values()))
+    try:
+        with TestClient(app) as client:
+            path = f"/api/v1/monitor/deployments/abc/stream?access_token={make_token('alice')}&tail=10"
+            with client.websocket_connect(path) as websocket:
+                websocket.send_text("hello")
+                reply = websocket.receive_text()
+    finally:
+        balancer.set_urls(original_urls)
+        stop.set()
+        thread.join(5)
+
+    assert reply == "echo: hello"
+    assert received["x_user"] == "alice"
+    assert received["path"] == "/deployments/abc/stream?tail=10"
+    assert endpoint.requests == 1 and endpoint.in_flight == 0
+    print("   ✅ Message relayé aller-retour, X-User transmis, token retiré de l'URL")
+
+def main():
+    """Exécuter tous les tests de streaming"""
+    print("🚀 Tests Streaming - NoKube API Gateway\n")
+
+    try:
+        test_sse_heartbeat()
+        test_stream_unexpected_error_ends_relay()
+        test_websocket_passthrough()
+
+        print(f"\n✅ TOUS LES TESTS STREAMING RÉUSSIS!")
+
+    except Exception as e:
+        print(f"\n❌ ÉCHEC DU TEST STREAMING: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
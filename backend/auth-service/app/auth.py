@@ -1,4 +1,6 @@
+import secrets
 from datetime import datetime, timedelta
+from typing import List
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.config import settings
@@ -11,15 +13,29 @@ def hash_password(password: str) -> str:
     """Hash a password using bcrypt"""
     return pwd_context.hash(password)
 
+def hash_passwords(passwords: List[str]) -> List[str]:
+    """Hash a batch of passwords (one worker job for a bulk import chunk)"""
+    return [pwd_context.hash(password) for password in passwords]
+
+def is_password_hash(value: str) -> bool:
+    """True if value is a bcrypt hash this service can verify (pre-hashed import)"""
+    return pwd_context.identify(value) == "bcrypt"
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     return pwd_context.verify(plain_password, hashed_password)
 
+def new_token_id() -> str:
+    """Random id of an access token (jti claim), the key of the revocation list"""
+    return secrets.token_hex(16)
+
 def create_access_token(data: dict) -> str:
-    """Create JWT access token"""
+    """Create JWT access token (data may carry its jti, a new one is generated otherwise)"""
     to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
-    to_encode.update({"exp": expire})
+    now = datetime.utcnow()
+    expire = now + timedelta(minutes=settings.access_token_expire_minutes)
+    to_encode.setdefault("jti", new_token_id())
+    to_encode.update({"exp": expire, "iat": now})
     
     encoded_jwt = jwt.encode(
         to_encode, 
@@ -42,7 +58,7 @@ def verify_token(token: str) -> TokenData:
         if username is None or user_id is None:
             raise JWTError("Invalid token payload")
             
-        return TokenData(username=username, user_id=user_id)
+        return TokenData(username=username, user_id=user_id, jti=payload.get("jti"), exp=payload.get("exp"))
     
     except JWTError:
         raise JWTError("Could not validate credentials")
@@ -12,7 +12,40 @@ class Settings(BaseSettings):
     # JWT configuration - MUST come from environment variables
     jwt_secret: str = os.getenv('JWT_SECRET')
     jwt_algorithm: str = "HS256"
-    access_token_expire_minutes: int = 1440  # 24 hours
+    # Short-lived access tokens (revocable via the revocation list), renewed with rotating refresh tokens
+    access_token_expire_minutes: int = int(os.getenv('ACCESS_TOKEN_EXPIRE_MINUTES', '15'))
+    refresh_token_expire_days: int = int(os.getenv('REFRESH_TOKEN_EXPIRE_DAYS', '30'))
+    # A token rotated less than this ago is a concurrent refresh (another tab), not a replay
+    refresh_reuse_grace_seconds: float = float(os.getenv('REFRESH_REUSE_GRACE_SECONDS', '10'))
+    revocation_heartbeat_interval: float = float(os.getenv('REVOCATION_HEARTBEAT_INTERVAL', '15'))
+    revocation_purge_interval: float = float(os.getenv('REVOCATION_PURGE_INTERVAL', '300'))
+    
+    # Distributed tracing (W3C traceparent): sink "file", "otlp" or "none" (propagation only)
+    trace_exporter: str = os.getenv('TRACE_EXPORTER', 'none')
+    trace_sample_ratio: float = float(os.getenv('TRACE_SAMPLE_RATIO', '0.05'))
+    trace_file: str = os.getenv('TRACE_FILE', '/tmp/nokube-traces.jsonl')
+    otlp_endpoint: str = os.getenv('OTLP_ENDPOINT', 'http://localhost:4318')
+    trace_export_interval: float = float(os.getenv('TRACE_EXPORT_INTERVAL', '5'))
+    trace_max_queue: int = int(os.getenv('TRACE_MAX_QUEUE', '2048'))
+    
+    # bcrypt worker processes (0 = available cores) and jobs allowed to wait for one before a 503
+    password_hash_workers: int = int(os.getenv('PASSWORD_HASH_WORKERS', '0'))
+    password_hash_queue_size: int = int(os.getenv('PASSWORD_HASH_QUEUE_SIZE', '32'))
+    
+    # In-process user cache for /verify (invalidated through Postgres NOTIFY user_changed)
+    user_cache_ttl: float = float(os.getenv('USER_CACHE_TTL', '30'))
+    user_cache_max_size: int = int(os.getenv('USER_CACHE_MAX_SIZE', '10000'))
+    user_cache_warmup: bool = os.getenv('USER_CACHE_WARMUP', 'true').lower() == 'true'
+    
+    # Write-behind of users.last_login: flushed every interval, or as soon as max_batch logins are buffered
+    last_login_flush_interval: float = float(os.getenv('LAST_LOGIN_FLUSH_INTERVAL', '5'))
+    last_login_max_batch: int = int(os.getenv('LAST_LOGIN_MAX_BATCH', '1000'))
+    
+    # Admin bulk import (POST /admin/users/import): disabled while ADMIN_TOKEN is empty
+    admin_token: str = os.getenv('ADMIN_TOKEN', '')
+    import_batch_size: int = int(os.getenv('IMPORT_BATCH_SIZE', '500'))
+    import_hash_chunk_size: int = int(os.getenv('IMPORT_HASH_CHUNK_SIZE', '8'))
+    import_max_errors: int = int(os.getenv('IMPORT_MAX_ERRORS', '100'))
     
     @property
     def database_url(self) -> str:
@@ -1,5 +1,6 @@
 import asyncpg
 from app.config import settings
+from app.tracing import instrument_connection
 
 class Database:
     def __init__(self):
@@ -15,6 +16,7 @@ class Database:
             database=settings.db_name,
             min_size=5,
             max_size=20,
+            init=instrument_connection,
         )
         print("Database connection pool created")
     
@@ -54,6 +56,47 @@ async def init_db():
             
             CREATE INDEX IF NOT EXISTS idx_username ON users(username);
             CREATE INDEX IF NOT EXISTS idx_email ON users(email);
+            
+            -- Tell the /verify user caches (every replica) when a cached user changes
+            CREATE OR REPLACE FUNCTION notify_user_changed() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP = 'DELETE'
+                   OR NEW.username IS DISTINCT FROM OLD.username
+                   OR NEW.email IS DISTINCT FROM OLD.email
+                   OR NEW.is_active IS DISTINCT FROM OLD.is_active
+                   OR NEW.password_hash IS DISTINCT FROM OLD.password_hash THEN
+                    PERFORM pg_notify('user_changed', OLD.id::text);
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+            
+            CREATE OR REPLACE TRIGGER users_changed
+                AFTER UPDATE OR DELETE ON users
+                FOR EACH ROW EXECUTE FUNCTION notify_user_changed();
+            
+            -- Refresh tokens (SHA-256 of the token only), rotated on every use;
+            -- a family is the chain of tokens issued from one login
+            CREATE TABLE IF NOT EXISTS refresh_tokens (
+                id SERIAL PRIMARY KEY,
+                user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+                token_hash CHAR(64) UNIQUE NOT NULL,
+                family_id UUID NOT NULL,
+                access_jti VARCHAR(32) NOT NULL,
+                access_exp BIGINT NOT NULL,
+                expires_at TIMESTAMP NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                revoked_at TIMESTAMP,
+                rotated_at TIMESTAMP
+            );
+            
+            CREATE INDEX IF NOT EXISTS idx_refresh_tokens_family ON refresh_tokens(family_id);
+            
+            -- Revoked access tokens, kept until their exp (pushed to the gateways)
+            CREATE TABLE IF NOT EXISTS revoked_tokens (
+                jti VARCHAR(32) PRIMARY KEY,
+                exp BIGINT NOT NULL
+            );
         """)
         print("Database tables initialized")
     finally:
@@ -0,0 +1,174 @@
+import os
+import math
+import time
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional
+from fastapi import HTTPException
+from app.auth import hash_password, hash_passwords, verify_password, pwd_context
+from app.config import settings
+from app.metrics import (
+    PASSWORD_HASH_QUEUE_WAIT, PASSWORD_HASH_DURATION,
+    PASSWORD_HASH_REJECTED, PASSWORD_HASH_PENDING
+)
+from app.tracing import tracer
+
+def available_cpus() -> int:
+    """CPUs usable by this pod: affinity mask, capped by the cgroup v2 CPU quota (Kubernetes limits)"""
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+def _run_timed(function: Callable, *args) -> tuple:
+    """Run in a worker process: (start time, bcrypt duration, result)"""
+    started = time.monotonic()
+    result = function(*args)
+    return started, time.monotonic() - started, result
+
+def _warm_up() -> int:
+    """Load the bcrypt backend in a worker process before the first request"""
+    pwd_context.handler("bcrypt").get_backend()
+    return os.getpid()
+
+class PasswordHasher:
+    """
+    bcrypt hashing and verification in a dedicated process pool
+
+    bcrypt holds the CPU (and the GIL) for tens of milliseconds per call: run
+    inline, every login blocks the event loop and logins are serialized on a
+    pod. Jobs run in one worker process per available core; at most
+    queue_size jobs wait for a worker, beyond that requests are rejected
+    immediately with 503 + Retry-After instead of piling up.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers or available_cpus()
+        self.queue_size = queue_size
+        self.pending = 0
+        self.rejected = 0
+        self.executor: Optional[ProcessPoolExecutor] = None
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        # spawn: workers do not inherit the event loop, the DB pool or open sockets
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+
+    async def start(self):
+        """Start the worker processes (one warm-up job each)"""
+        if self.executor is None:
+            self.executor = self._create_executor()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(self.executor, _warm_up) for _ in range(self.workers)
+        ))
+
+    async def stop(self):
+        """Drop queued jobs and stop the worker processes"""
+        if self.executor is not None:
+            executor, self.executor = self.executor, None
+            await asyncio.to_thread(executor.shutdown, True, cancel_futures=True)
+
+    async def hash(self, password: str) -> str:
+        return await self._submit("hash", hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit("verify", verify_password, plain_password, hashed_password)
+
+    async def hash_many(self, passwords: List[str], chunk_size: int) -> List[str]:
+        """
+        Hash a bulk import batch: chunks of chunk_size passwords, at most one
+        chunk per worker in flight so logins queued behind wait one chunk at most.
+        Waits (instead of failing) while the pool is saturated.
+        """
+        chunks = [passwords[i:i + chunk_size] for i in range(0, len(passwords), chunk_size)]
+        semaphore = asyncio.Semaphore(self.workers)
+
+        async def hash_chunk(chunk: List[str]) -> List[str]:
+            async with semaphore:
+                while True:
+                    try:
+                        return await self._submit("hash_batch", hash_passwords, chunk)
+                    except HTTPException as e:
+                        if e.status_code != 503:
+                            raise
+                        await asyncio.sleep(0.1)
+
+        results = await asyncio.gather(*(hash_chunk(chunk) for chunk in chunks))
+        return [password_hash for chunk in results for password_hash in chunk]
+
+    @staticmethod
+    def _busy() -> HTTPException:
+        """503 sent when the pool is full or broken: clients back off the same way"""
+        return HTTPException(
+            status_code=503,
+            detail="Authentication service busy, retry shortly",
+            headers={"Retry-After": "1"}
+        )
+
+    async def _submit(self, operation: str, function: Callable, *args) -> Any:
+        if self.pending >= self.workers + self.queue_size:
+            self.rejected += 1
+            PASSWORD_HASH_REJECTED.labels(operation).inc()
+            raise self._busy()
+        if self.executor is None:
+            self.executor = self._create_executor()
+
+        loop = asyncio.get_running_loop()
+        submitted = time.monotonic()
+        with tracer.span(f"password {operation}", "internal", {"password.pool_pending": self.pending}) as span:
+            try:
+                future = self.executor.submit(_run_timed, function, *args)
+            except BrokenProcessPool:
+                self._reset()
+                raise self._busy()
+
+            # Counted until the worker is done, even if the client went away meanwhile
+            self.pending += 1
+            PASSWORD_HASH_PENDING.set(self.pending)
+            future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._job_done))
+
+            try:
+                started, duration, result = await asyncio.wrap_future(future)
+            except BrokenProcessPool:
+                # A worker died (OOM kill): start a fresh pool for the next requests
+                self._reset()
+                raise self._busy()
+
+            queue_wait = max(0.0, started - submitted)
+            span.set_attribute("password.queue_wait_ms", round(queue_wait * 1000, 2))
+            PASSWORD_HASH_QUEUE_WAIT.labels(operation).observe(queue_wait)
+            PASSWORD_HASH_DURATION.labels(operation).observe(duration)
+            return result
+
+    def _job_done(self):
+        self.pending -= 1
+        PASSWORD_HASH_PENDING.set(self.pending)
+
+    def _reset(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "pending": self.pending,
+            "rejected": self.rejected
+        }
+
+# Global password hasher instance
+password_hasher = PasswordHasher(settings.password_hash_workers, settings.password_hash_queue_size)
@@ -0,0 +1,118 @@
+import asyncio
+import time
+from typing import Any, Dict, Optional
+from app.config import settings
+from app.database import db
+from app.metrics import LAST_LOGIN_FLUSH_SIZE, LAST_LOGIN_FLUSH_FAILURES, LAST_LOGIN_PENDING
+
+class LastLoginWriter:
+    """
+    Write-behind buffer for users.last_login
+
+    A login only records (user id, time) in memory; a background task writes
+    everything buffered every flush_interval seconds (or as soon as max_batch
+    users are waiting) in a single UPDATE ... FROM unnest(...). A user logging
+    in several times between two flushes costs one row update. The buffer is
+    flushed on shutdown; on a failed flush the entries are kept for the next
+    attempt.
+
+    Times are kept on the monotonic clock and written as the database's
+    LOCALTIMESTAMP minus the login's age: every replica writes on the same
+    clock as the CURRENT_TIMESTAMP columns, whatever its own time zone or drift.
+    """
+
+    def __init__(self, flush_interval: float, max_batch: int):
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.pending: Dict[int, float] = {}
+        self.flushed = 0
+        self.failures = 0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, user_id: int, last_login: Optional[float] = None):
+        """Buffer a successful login at time.monotonic() (the latest time wins)"""
+        if last_login is None:
+            last_login = time.monotonic()
+        current = self.pending.get(user_id)
+        if current is None or last_login > current:
+            self.pending[user_id] = last_login
+        LAST_LOGIN_PENDING.set(len(self.pending))
+        if len(self.pending) >= self.max_batch:
+            self._wakeup.set()
+
+    async def flush(self) -> int:
+        """Write the buffered logins in one statement, return the number of users written"""
+        if not self.pending:
+            return 0
+        batch, self.pending = self.pending, {}
+        LAST_LOGIN_PENDING.set(0)
+        try:
+            conn = await db.get_connection()
+            try:
+                # Never move last_login backwards (another replica may have written a later login)
+                now = time.monotonic()
+                await conn.execute("""
+                    UPDATE users SET last_login = v.ts
+                    FROM (
+                        SELECT id, LOCALTIMESTAMP - make_interval(secs => age) AS ts
+                        FROM unnest($1::int[], $2::float8[]) AS u(id, age)
+                    ) AS v
+                    WHERE users.id = v.id
+                      AND (users.last_login IS NULL OR users.last_login < v.ts)
+                """, list(batch.keys()), [now - login for login in batch.values()])
+            finally:
+                await db.release_connection(conn)
+        except asyncio.CancelledError:
+            # Stopped mid-flush: keep the batch for the final flush (the UPDATE is idempotent)
+            self._restore(batch)
+            raise
+        except Exception as e:
+            self.failures += 1
+            LAST_LOGIN_FLUSH_FAILURES.inc()
+            print(f"last_login flush failed ({len(batch)} users), retrying later: {e}")
+            self._restore(batch)
+            return 0
+        self.flushed += len(batch)
+        LAST_LOGIN_FLUSH_SIZE.observe(len(batch))
+        return len(batch)
+
+    def _restore(self, batch: Dict[int, float]):
+        # Put an unwritten batch back, without overwriting logins recorded meanwhile
+        for user_id, last_login in batch.items():
+            self.record(user_id, last_login)
+
+    async def start(self):
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop the background task and write what is still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self.pending),
+            "flush_interval_s": self.flush_interval,
+            "max_batch": self.max_batch,
+            "flushed": self.flushed,
+            "failures": self.failures
+        }
+
+# Global last_login writer instance
+last_login_writer = LastLoginWriter(settings.last_login_flush_interval, settings.last_login_max_batch)
@@ -1,29 +1,57 @@
-from fastapi import FastAPI, HTTPException, Header
+from fastapi import FastAPI, HTTPException, Header, Request
+from fastapi.responses import Response, StreamingResponse
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 from datetime import datetime
-import asyncpg
+import hmac
 from app.database import db, init_db
 from app.schemas import (
     UserRegister, UserLogin, UserResponse, LoginResponse, 
-    RegisterResponse, HealthResponse, ReadyResponse, Token
+    RegisterResponse, HealthResponse, ReadyResponse, ImportResponse,
+    RefreshRequest, RefreshResponse, LogoutRequest
 )
-from app.auth import hash_password, verify_password, create_access_token, verify_token, get_token_from_header
+from app.tracing import TracingMiddleware, tracer
+from app.responses import FastJSONResponse
+from app.auth import verify_token, get_token_from_header
+from app.hashing import password_hasher
+from app.notifications import notification_listener
+from app.user_cache import user_cache
+from app.tokens import revocation_store, issue_tokens, rotate_refresh_token, revoke_session
+from app.last_login import last_login_writer
+from app.user_import import UserImporter
+from app.config import settings
+from app.metrics import registry
 
 app = FastAPI(
     title="NoKube Auth Service",
     description="Authentication microservice for NoKube platform",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
+app.add_middleware(TracingMiddleware)
+
 @app.on_event("startup")
 async def startup():
-    """Initialize database connection and tables"""
+    """Initialize database connection, tables, notification listener, caches, last_login writer, bcrypt worker processes and trace export"""
     await db.connect()
     await init_db()
+    if not await notification_listener.start():
+        print("Notification listener not connected yet, retrying in the background")
+    await user_cache.start()
+    await revocation_store.start()
+    await last_login_writer.start()
+    await password_hasher.start()
+    await tracer.start()
 
 @app.on_event("shutdown")
 async def shutdown():
-    """Close database connection"""
+    """Stop bcrypt workers and notification listener, write buffered logins, close database connection and flush remaining spans"""
+    await password_hasher.stop()
+    await revocation_store.stop()
+    await notification_listener.stop()
+    await last_login_writer.stop()
     await db.disconnect()
+    await tracer.stop()
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
@@ -46,78 +74,112 @@ async def readiness_check():
     except Exception as e:
         raise HTTPException(status_code=503, detail=f"Database not ready: {str(e)}")
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics (bcrypt worker pool)"""
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/stats")
+async def stats():
+    """User cache, revocation list, last_login writer and bcrypt worker pool state"""
+    return {
+        "user_cache": user_cache.get_stats(),
+        "revocations": revocation_store.get_stats(),
+        "last_login_writer": last_login_writer.get_stats(),
+        "password_hasher": password_hasher.get_stats()
+    }
+
 @app.post("/register", response_model=RegisterResponse)
 async def register(user_data: UserRegister):
     """Register a new user"""
+    # Hash in the worker pool before taking a DB connection (503 if the pool is saturated)
+    password_hash = await password_hasher.hash(user_data.password)
+    
     conn = await db.get_connection()
     try:
-        # Check if user already exists
-        existing_user = await conn.fetchrow(
-            "SELECT id FROM users WHERE username = $1 OR email = $2",
-            user_data.username, user_data.email
-        )
-        
-        if existing_user:
-            raise HTTPException(status_code=409, detail="Username or email already exists")
-        
-        # Hash password and create user
-        password_hash = hash_password(user_data.password)
-        
-        user_record = await conn.fetchrow("""
-            INSERT INTO users (username, email, password_hash, created_at)
-            VALUES ($1, $2, $3, CURRENT_TIMESTAMP)
-            RETURNING id, username, email, is_active, created_at
-        """, user_data.username, user_data.email, password_hash)
-        
-        # Create user response
-        user = UserResponse(**user_record)
-        
-        # Generate JWT token
-        token = create_access_token({
-            "sub": user.username,
-            "user_id": user.id
-        })
+        async with conn.transaction():
+            # Create user in one round trip: no row returned if the username or email is taken
+            user_record = await conn.fetchrow("""
+                INSERT INTO users (username, email, password_hash, created_at)
+                VALUES ($1, $2, $3, CURRENT_TIMESTAMP)
+                ON CONFLICT DO NOTHING
+                RETURNING id, username, email, is_active, created_at
+            """, user_data.username, user_data.email, password_hash)
+            
+            if not user_record:
+                raise HTTPException(status_code=409, detail="Username or email already exists")
+            
+            # Create user response
+            user = UserResponse(**user_record)
+            
+            # Generate access + refresh tokens
+            token = await issue_tokens(conn, user.id, user.username)
         
         return RegisterResponse(
             message="User registered successfully",
             user=user,
-            token=Token(access_token=token)
+            token=token
         )
         
-    except asyncpg.UniqueViolationError:
-        raise HTTPException(status_code=409, detail="Username or email already exists")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Registration failed: {str(e)}")
     finally:
         await db.release_connection(conn)
 
+@app.post("/admin/users/import", response_model=ImportResponse)
+async def import_users(request: Request, x_admin_token: str = Header(None)):
+    """
+    Bulk import users from an NDJSON body (application/x-ndjson)
+    
+    One JSON object per line: {"username", "email", "password"} or
+    {"username", "email", "password_hash"} with an existing bcrypt hash.
+    Existing users are skipped, invalid lines reported by line number.
+    Internal endpoint (ADMIN_TOKEN), not exposed through the gateway.
+    """
+    if not settings.admin_token:
+        raise HTTPException(status_code=403, detail="Bulk import disabled (ADMIN_TOKEN not set)")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, settings.admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    
+    # Batches are committed one by one: on failure the users imported so far stay
+    importer = UserImporter()
+    try:
+        return await importer.run(request.stream())
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Import failed after {importer.imported} users: {str(e)}")
+
 @app.post("/login", response_model=LoginResponse)
 async def login(user_data: UserLogin):
     """Authenticate user and return JWT token"""
-    conn = await db.get_connection()
     try:
         # Get user from database
-        user_record = await conn.fetchrow(
-            "SELECT id, username, email, password_hash, is_active, created_at, last_login FROM users WHERE username = $1",
-            user_data.username
-        )
+        conn = await db.get_connection()
+        try:
+            user_record = await conn.fetchrow(
+                "SELECT id, username, email, password_hash, is_active, created_at, last_login FROM users WHERE username = $1",
+                user_data.username
+            )
+        finally:
+            await db.release_connection(conn)
         
         if not user_record:
             raise HTTPException(status_code=401, detail="Invalid credentials")
         
-        # Verify password
-        if not verify_password(user_data.password, user_record['password_hash']):
+        # Verify password in the worker pool, without holding a DB connection
+        if not await password_hasher.verify(user_data.password, user_record['password_hash']):
             raise HTTPException(status_code=401, detail="Invalid credentials")
         
         # Check if user is active
         if not user_record['is_active']:
             raise HTTPException(status_code=401, detail="Account is disabled")
         
-        # Update last login
-        await conn.execute(
-            "UPDATE users SET last_login = CURRENT_TIMESTAMP WHERE id = $1",
-            user_record['id']
-        )
+        # Update last login (buffered, written in the next batch on the database clock)
+        last_login_writer.record(user_record['id'])
+        last_login = datetime.now()  # app clock: response and user cache only
         
         # Create user response (exclude password_hash)
         user = UserResponse(
@@ -126,27 +188,27 @@ async def login(user_data: UserLogin):
             email=user_record['email'],
             is_active=user_record['is_active'],
             created_at=user_record['created_at'],
-            last_login=datetime.now()
+            last_login=last_login
         )
+        user_cache.record_login(user.id, user.last_login)
         
-        # Generate JWT token
-        token = create_access_token({
-            "sub": user.username,
-            "user_id": user.id
-        })
+        # Generate access + refresh tokens (new session)
+        conn = await db.get_connection()
+        try:
+            token = await issue_tokens(conn, user.id, user.username)
+        finally:
+            await db.release_connection(conn)
         
         return LoginResponse(
             message="Login successful",
             user=user,
-            token=Token(access_token=token)
+            token=token
         )
         
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Login failed: {str(e)}")
-    finally:
-        await db.release_connection(conn)
 
 @app.get("/verify", response_model=UserResponse)
 async def verify_token_endpoint(authorization: str = Header(None)):
@@ -161,30 +223,62 @@ async def verify_token_endpoint(authorization: str = Header(None)):
         # Verify token
         token_data = verify_token(token)
         
-        # Get user from database
-        conn = await db.get_connection()
-        try:
-            user_record = await conn.fetchrow(
-                "SELECT id, username, email, is_active, created_at, last_login FROM users WHERE id = $1",
-                token_data.user_id
-            )
-            
-            if not user_record:
-                raise HTTPException(status_code=401, detail="User not found")
-            
-            if not user_record['is_active']:
-                raise HTTPException(status_code=401, detail="Account is disabled")
-            
-            return UserResponse(**user_record)
-            
-        finally:
-            await db.release_connection(conn)
+        if revocation_store.is_revoked(token_data.jti):
+            raise HTTPException(status_code=401, detail="Token has been revoked")
+        
+        # Get user from the in-process cache (Postgres only on miss or expiry)
+        user_record = await user_cache.get(token_data.user_id)
+        
+        if not user_record:
+            raise HTTPException(status_code=401, detail="User not found")
+        
+        if not user_record['is_active']:
+            raise HTTPException(status_code=401, detail="Account is disabled")
+        
+        return UserResponse(**user_record)
             
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+@app.post("/refresh", response_model=RefreshResponse)
+async def refresh(request_data: RefreshRequest):
+    """Exchange a refresh token for a new access + refresh token pair (rotation)"""
+    try:
+        token = await rotate_refresh_token(request_data.refresh_token)
+        return RefreshResponse(message="Token refreshed", token=token)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Token refresh failed: {str(e)}")
+
+@app.post("/logout")
+async def logout(request_data: LogoutRequest = None, authorization: str = Header(None)):
+    """Revoke the access token (Authorization header) and the session of the refresh token"""
+    access = None
+    if authorization:
+        try:
+            access = verify_token(get_token_from_header(authorization))
+        except Exception:
+            # Expired or invalid: nothing to revoke
+            access = None
+    
+    try:
+        await revoke_session(access, request_data.refresh_token if request_data else None)
+        return {"message": "Logged out"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Logout failed: {str(e)}")
+
+@app.get("/revocations/stream")
+async def revocations_stream():
+    """Revoked access tokens for the gateways (server-sent events: snapshot, then revocations)"""
+    return StreamingResponse(
+        revocation_store.stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
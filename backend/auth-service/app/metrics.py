@@ -0,0 +1,74 @@
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+
+# Dedicated registry: only the auth-service metrics are exposed on /metrics
+registry = CollectorRegistry()
+
+HASH_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.5, 5.0)
+
+PASSWORD_HASH_QUEUE_WAIT = Histogram(
+    "auth_password_hash_queue_wait_seconds",
+    "Time a password hash/verify job waited for a free worker process",
+    ["operation"],
+    buckets=HASH_BUCKETS,
+    registry=registry
+)
+PASSWORD_HASH_DURATION = Histogram(
+    "auth_password_hash_duration_seconds",
+    "bcrypt time spent in the worker process",
+    ["operation"],
+    buckets=HASH_BUCKETS,
+    registry=registry
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "auth_password_hash_rejected_total",
+    "Hash/verify jobs rejected with 503 because the worker pool queue was full",
+    ["operation"],
+    registry=registry
+)
+PASSWORD_HASH_PENDING = Gauge(
+    "auth_password_hash_pending",
+    "Hash/verify jobs submitted to the worker pool and not finished (running + queued)",
+    registry=registry
+)
+USER_CACHE_REQUESTS = Counter(
+    "auth_user_cache_requests_total",
+    "/verify user lookups answered from memory (hit) or Postgres (miss)",
+    ["result"],
+    registry=registry
+)
+USER_CACHE_INVALIDATIONS = Counter(
+    "auth_user_cache_invalidations_total",
+    "Cached users dropped after a change notification",
+    registry=registry
+)
+LAST_LOGIN_FLUSH_SIZE = Histogram(
+    "auth_last_login_flush_size",
+    "Users written per batched last_login UPDATE",
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500),
+    registry=registry
+)
+LAST_LOGIN_FLUSH_FAILURES = Counter(
+    "auth_last_login_flush_failures_total",
+    "Batched last_login UPDATEs that failed (entries kept for the next flush)",
+    registry=registry
+)
+LAST_LOGIN_PENDING = Gauge(
+    "auth_last_login_pending",
+    "Logins buffered in memory, not yet written to users.last_login",
+    registry=registry
+)
+REVOKED_TOKENS = Gauge(
+    "auth_revoked_tokens",
+    "Revoked access tokens not yet expired (size of the list pushed to the gateways)",
+    registry=registry
+)
+REFRESH_TOKEN_REUSE = Counter(
+    "auth_refresh_token_reuse_total",
+    "Already rotated refresh tokens presented again (whole session revoked)",
+    registry=registry
+)
+REVOCATION_SUBSCRIBERS = Gauge(
+    "auth_revocation_subscribers",
+    "Gateways connected to /revocations/stream",
+    registry=registry
+)
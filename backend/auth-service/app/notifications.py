@@ -0,0 +1,92 @@
+import asyncio
+import inspect
+import asyncpg
+from typing import Callable, Dict, List, Optional
+from app.config import settings
+
+class NotificationListener:
+    """
+    Postgres LISTEN on a dedicated connection, shared by the in-process caches
+
+    Each subscriber gives a channel, a callback for the notification payload
+    and a resync callback run every time the connection is (re)established:
+    notifications sent while nobody was listening are lost, so state derived
+    from them must be reloaded or dropped.
+    """
+
+    def __init__(self):
+        self.handlers: Dict[str, Callable[[str], None]] = {}
+        self.resync_handlers: List[Callable] = []
+        self.connection: Optional[asyncpg.Connection] = None
+        self.listening = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, channel: str, handler: Callable[[str], None], resync: Optional[Callable] = None):
+        """Register before start(): handler(payload) per notification, resync() on every (re)connection"""
+        self.handlers[channel] = handler
+        if resync is not None:
+            self.resync_handlers.append(resync)
+
+    async def start(self, timeout: float = 5) -> bool:
+        """Start listening in the background; True once connected (False after timeout, still retrying)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen_loop())
+        try:
+            await asyncio.wait_for(self.listening.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _dispatch(self, connection, pid, channel: str, payload: str):
+        handler = self.handlers.get(channel)
+        if handler is not None:
+            handler(payload)
+
+    async def _listen_loop(self):
+        # Dedicated connection (outside the pool): LISTEN needs a session that stays open
+        while True:
+            closed = asyncio.Event()
+            try:
+                self.connection = await asyncpg.connect(
+                    host=settings.db_host,
+                    port=int(settings.db_port),
+                    user=settings.db_user,
+                    password=settings.db_password,
+                    database=settings.db_name
+                )
+                self.connection.add_termination_listener(lambda _: closed.set())
+                for channel in self.handlers:
+                    await self.connection.add_listener(channel, self._dispatch)
+                # Listening first, then resync: a change made meanwhile is not missed
+                for resync in self.resync_handlers:
+                    result = resync()
+                    if inspect.isawaitable(result):
+                        await result
+                self.listening.set()
+                await closed.wait()
+                print("Notification listener disconnected, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Notification listener error: {e}")
+            finally:
+                self.listening.clear()
+                if self.connection is not None and not self.connection.is_closed():
+                    await self.connection.close()
+                self.connection = None
+            await asyncio.sleep(5)
+
+    def is_listening(self) -> bool:
+        return self.connection is not None and not self.connection.is_closed()
+
+# Global notification listener instance
+notification_listener = NotificationListener()
@@ -0,0 +1,30 @@
+from decimal import Decimal
+from typing import Any
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+def _default(value: Any) -> Any:
+    """Types not handled natively by orjson (datetime, date, UUID, Enum and dataclasses are)"""
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type {type(value).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    """Encode to JSON (UTF-8) with orjson"""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response encoded by orjson (the application's default response class)
+
+    A route returning a FastJSONResponse directly also skips jsonable_encoder
+    and response_model validation (the model is kept for the OpenAPI docs).
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 # Input schemas (what we receive)
 class UserRegister(BaseModel):
@@ -8,6 +8,13 @@ class UserRegister(BaseModel):
     email: EmailStr
     password: str
 
+class UserImport(BaseModel):
+    """One NDJSON line of a bulk import: a plain password or an existing bcrypt hash"""
+    username: str
+    email: EmailStr
+    password: Optional[str] = None
+    password_hash: Optional[str] = None
+
 class UserLogin(BaseModel):
     username: str
     password: str
@@ -24,10 +31,20 @@ class UserResponse(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
+    expires_in: Optional[int] = None
+    refresh_token: Optional[str] = None
 
 class TokenData(BaseModel):
     username: Optional[str] = None
     user_id: Optional[int] = None
+    jti: Optional[str] = None
+    exp: Optional[int] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
 
 class LoginResponse(BaseModel):
     message: str
@@ -39,6 +56,20 @@ class RegisterResponse(BaseModel):
     user: UserResponse
     token: Token
 
+class RefreshResponse(BaseModel):
+    message: str
+    token: Token
+
+class ImportLineError(BaseModel):
+    line: int
+    error: str
+
+class ImportResponse(BaseModel):
+    imported: int
+    skipped: int
+    errors: List[ImportLineError]
+    error_count: int
+
 # Health check schemas
 class HealthResponse(BaseModel):
     status: str
@@ -0,0 +1,262 @@
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+import secrets
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+from fastapi import HTTPException
+from jose import jwt
+from app.auth import create_access_token, new_token_id
+from app.config import settings
+from app.database import db
+from app.metrics import REVOKED_TOKENS, REFRESH_TOKEN_REUSE, REVOCATION_SUBSCRIBERS
+from app.notifications import notification_listener
+from app.schemas import Token, TokenData
+
+# Postgres channel notified for every revoked access token (payload "jti:exp")
+TOKEN_REVOKED_CHANNEL = "token_revoked"
+
+# Events buffered per gateway before it gets a full snapshot instead
+SUBSCRIBER_QUEUE_SIZE = 1024
+
+def hash_refresh_token(refresh_token: str) -> str:
+    """Only the SHA-256 of a refresh token is stored (random 256-bit token: no salt needed)"""
+    return hashlib.sha256(refresh_token.encode()).hexdigest()
+
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+class RevocationStore:
+    """
+    Revoked access tokens (jti -> exp) that have not expired yet
+
+    The list lives in revoked_tokens; every replica keeps it in memory,
+    reloaded on each (re)connection of the notification listener and updated
+    by NOTIFY token_revoked. Gateways subscribe to /revocations/stream: a
+    snapshot on connect, then one event per revocation. Access tokens being
+    short-lived, the list only holds tokens revoked in the last few minutes.
+    """
+
+    def __init__(self):
+        self.revoked: Dict[str, int] = {}
+        self.subscribers: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+        notification_listener.subscribe(TOKEN_REVOKED_CHANNEL, self._on_token_revoked, self.load)
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        if jti is None:
+            return False
+        exp = self.revoked.get(jti)
+        return exp is not None and exp > time.time()
+
+    async def load(self):
+        """Reload the list from Postgres and send it to every gateway"""
+        conn = await db.get_connection()
+        try:
+            records = await conn.fetch("SELECT jti, exp FROM revoked_tokens WHERE exp > $1", int(time.time()))
+        finally:
+            await db.release_connection(conn)
+        self.revoked = {record["jti"]: record["exp"] for record in records}
+        REVOKED_TOKENS.set(len(self.revoked))
+        self._broadcast(self.snapshot_event())
+
+    async def revoke(self, conn, tokens: List[Tuple[str, int]]):
+        """
+        Revoke access tokens (jti, exp) in the caller's transaction: the
+        notification reaches every replica (this one included) at commit
+        """
+        now = time.time()
+        tokens = [(jti, exp) for jti, exp in tokens if exp > now]
+        if not tokens:
+            return
+        await conn.execute("""
+            WITH inserted AS (
+                INSERT INTO revoked_tokens (jti, exp)
+                SELECT * FROM unnest($1::text[], $2::bigint[])
+                ON CONFLICT DO NOTHING
+                RETURNING jti, exp
+            )
+            SELECT pg_notify($3, jti || ':' || exp) FROM inserted
+        """, [jti for jti, _ in tokens], [exp for _, exp in tokens], TOKEN_REVOKED_CHANNEL)
+
+    def _on_token_revoked(self, payload: str):
+        jti, _, exp = payload.partition(":")
+        if not exp.isdigit() or jti in self.revoked:
+            return
+        self.revoked[jti] = int(exp)
+        REVOKED_TOKENS.set(len(self.revoked))
+        self._broadcast(sse_event("revoked", {"jti": jti, "exp": int(exp)}))
+
+    def snapshot_event(self) -> str:
+        now = time.time()
+        return sse_event("snapshot", {"revoked": [[jti, exp] for jti, exp in self.revoked.items() if exp > now]})
+
+    def _broadcast(self, event: str):
+        for queue in self.subscribers:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Gateway too slow: drop its backlog, a snapshot contains everything
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self.snapshot_event())
+
+    async def stream(self) -> AsyncIterator[str]:
+        """Server-sent events for one gateway: snapshot, then revocations (heartbeat comments when idle)"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.subscribers.add(queue)
+        REVOCATION_SUBSCRIBERS.set(len(self.subscribers))
+        try:
+            yield self.snapshot_event()
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=settings.revocation_heartbeat_interval)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield event
+        finally:
+            self.subscribers.discard(queue)
+            REVOCATION_SUBSCRIBERS.set(len(self.subscribers))
+
+    async def start(self):
+        self._task = asyncio.create_task(self._purge_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _purge_loop(self):
+        # Expired tokens are rejected anyway: drop their revocations and refresh tokens
+        while True:
+            await asyncio.sleep(settings.revocation_purge_interval)
+            now = int(time.time())
+            self.revoked = {jti: exp for jti, exp in self.revoked.items() if exp > now}
+            REVOKED_TOKENS.set(len(self.revoked))
+            try:
+                conn = await db.get_connection()
+                try:
+                    await conn.execute("DELETE FROM revoked_tokens WHERE exp <= $1", now)
+                    await conn.execute("DELETE FROM refresh_tokens WHERE expires_at <= $1", datetime.utcnow())
+                finally:
+                    await db.release_connection(conn)
+            except Exception as e:
+                print(f"Revocation purge failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "revoked": len(self.revoked),
+            "subscribers": len(self.subscribers)
+        }
+
+# Global revocation store instance
+revocation_store = RevocationStore()
+
+async def issue_tokens(conn, user_id: int, username: str, family_id: Optional[uuid.UUID] = None) -> Token:
+    """Access token + new refresh token (stored hashed, in a new family unless rotating)"""
+    jti = new_token_id()
+    access_token = create_access_token({"sub": username, "user_id": user_id, "jti": jti})
+    access_exp = jwt.get_unverified_claims(access_token)["exp"]
+    refresh_token = secrets.token_urlsafe(32)
+
+    await conn.execute("""
+        INSERT INTO refresh_tokens (user_id, token_hash, family_id, access_jti, access_exp, expires_at)
+        VALUES ($1, $2, $3, $4, $5, $6)
+    """, user_id, hash_refresh_token(refresh_token), family_id or uuid.uuid4(), jti, access_exp,
+        datetime.utcnow() + timedelta(days=settings.refresh_token_expire_days))
+
+    return Token(
+        access_token=access_token,
+        expires_in=settings.access_token_expire_minutes * 60,
+        refresh_token=refresh_token
+    )
+
+async def revoke_family(conn, family_id: uuid.UUID):
+    """Revoke every refresh token of a session and the access tokens issued with them"""
+    records = await conn.fetch("""
+        UPDATE refresh_tokens SET revoked_at = COALESCE(revoked_at, CURRENT_TIMESTAMP)
+        WHERE family_id = $1
+        RETURNING access_jti, access_exp
+    """, family_id)
+    await revocation_store.revoke(conn, [(record["access_jti"], record["access_exp"]) for record in records])
+
+async def rotate_refresh_token(refresh_token: str) -> Token:
+    """
+    Exchange a refresh token for a new access + refresh token pair
+
+    The presented token is revoked. The refresh token is shared by every tab:
+    a token rotated less than refresh_reuse_grace_seconds ago, in a session
+    still active, is a concurrent refresh and gets a sibling pair in the same
+    family. Presented again later, it was stolen or replayed: the whole
+    session is revoked.
+    """
+    error = None
+    conn = await db.get_connection()
+    try:
+        async with conn.transaction():
+            record = await conn.fetchrow("""
+                SELECT r.id, r.user_id, r.family_id, r.expires_at, r.revoked_at, r.rotated_at, u.username, u.is_active
+                FROM refresh_tokens r JOIN users u ON u.id = r.user_id
+                WHERE r.token_hash = $1
+                FOR UPDATE OF r
+            """, hash_refresh_token(refresh_token))
+            now = datetime.utcnow()
+
+            if record is None:
+                error = "Invalid refresh token"
+            elif (
+                record["revoked_at"] is not None
+                and record["rotated_at"] is not None
+                and now - record["rotated_at"] <= timedelta(seconds=settings.refresh_reuse_grace_seconds)
+                and record["is_active"]
+                and await conn.fetchval(
+                    "SELECT EXISTS (SELECT 1 FROM refresh_tokens WHERE family_id = $1 AND revoked_at IS NULL)",
+                    record["family_id"]
+                )
+            ):
+                # Another tab refreshed with the same token just before: same session, no reuse
+                return await issue_tokens(conn, record["user_id"], record["username"], record["family_id"])
+            elif record["revoked_at"] is not None:
+                REFRESH_TOKEN_REUSE.inc()
+                await revoke_family(conn, record["family_id"])
+                error = "Refresh token reuse detected, session revoked"
+            elif record["expires_at"] <= now:
+                error = "Refresh token has expired"
+            elif not record["is_active"]:
+                await revoke_family(conn, record["family_id"])
+                error = "Account is disabled"
+            else:
+                await conn.execute(
+                    "UPDATE refresh_tokens SET revoked_at = CURRENT_TIMESTAMP, rotated_at = $2 WHERE id = $1",
+                    record["id"], now
+                )
+                return await issue_tokens(conn, record["user_id"], record["username"], record["family_id"])
+    finally:
+        await db.release_connection(conn)
+
+    # Outside the transaction: the revocations above are committed
+    raise HTTPException(status_code=401, detail=error)
+
+async def revoke_session(access: Optional[TokenData], refresh_token: Optional[str]):
+    """Revoke the presented access token and the session of the refresh token"""
+    conn = await db.get_connection()
+    try:
+        async with conn.transaction():
+            if access is not None and access.jti and access.exp:
+                await revocation_store.revoke(conn, [(access.jti, access.exp)])
+            if refresh_token:
+                family_id = await conn.fetchval(
+                    "SELECT family_id FROM refresh_tokens WHERE token_hash = $1",
+                    hash_refresh_token(refresh_token)
+                )
+                if family_id is not None:
+                    await revoke_family(conn, family_id)
+    finally:
+        await db.release_connection(conn)
@@ -0,0 +1,143 @@
+import time
+import asyncio
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from app.config import settings
+from app.database import db
+from app.notifications import notification_listener
+from app.metrics import USER_CACHE_REQUESTS, USER_CACHE_INVALIDATIONS
+
+# Columns returned by /verify (UserResponse)
+USER_COLUMNS = "id, username, email, is_active, created_at, last_login"
+
+# Postgres channel notified by the users trigger (see init_db)
+USER_CHANGED_CHANNEL = "user_changed"
+
+class UserCache:
+    """
+    In-process cache of user rows for /verify, keyed by user id
+
+    Entries live user_cache_ttl seconds (LRU bounded by user_cache_max_size);
+    concurrent misses for the same id share one query. A trigger on users
+    sends NOTIFY user_changed when a user is disabled, renamed, changes email
+    or password, or is deleted: every replica listening on that channel drops
+    the entry immediately instead of waiting for the TTL. The whole cache is
+    cleared every time the listening connection is (re)established since
+    notifications may have been missed.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries: "OrderedDict[int, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.loading: Dict[int, asyncio.Future] = {}
+        # Bumped on every invalidation: a row read before it must not be cached
+        self.epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        notification_listener.subscribe(USER_CHANGED_CHANNEL, self._on_user_changed, self.clear)
+
+    async def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """User row from memory, or from Postgres on miss/expiry (None if the user does not exist)"""
+        entry = self.entries.get(user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            self.entries.move_to_end(user_id)
+            self.hits += 1
+            USER_CACHE_REQUESTS.labels("hit").inc()
+            return entry[1]
+
+        self.misses += 1
+        USER_CACHE_REQUESTS.labels("miss").inc()
+        loading = self.loading.get(user_id)
+        if loading is None:
+            loading = asyncio.ensure_future(self._load(user_id))
+            self.loading[user_id] = loading
+            loading.add_done_callback(lambda _: self.loading.pop(user_id, None))
+        return await asyncio.shield(loading)
+
+    async def _load(self, user_id: int) -> Optional[Dict[str, Any]]:
+        epoch = self.epoch
+        conn = await db.get_connection()
+        try:
+            record = await conn.fetchrow(f"SELECT {USER_COLUMNS} FROM users WHERE id = $1", user_id)
+        finally:
+            await db.release_connection(conn)
+        if record is None:
+            return None
+        user = dict(record)
+        if epoch == self.epoch:
+            self.put(user)
+        return user
+
+    def put(self, user: Dict[str, Any]):
+        self.entries[user["id"]] = (time.monotonic() + self.ttl, user)
+        self.entries.move_to_end(user["id"])
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        """Drop a user (disabled or updated) so the next /verify reads Postgres"""
+        self.epoch += 1
+        if self.entries.pop(user_id, None) is not None:
+            self.invalidations += 1
+            USER_CACHE_INVALIDATIONS.inc()
+
+    def record_login(self, user_id: int, last_login: datetime):
+        """Keep the cached last_login in step with a successful login"""
+        entry = self.entries.get(user_id)
+        if entry is not None:
+            entry[1]["last_login"] = last_login
+
+    def clear(self):
+        self.epoch += 1
+        self.entries.clear()
+
+    async def warm_up(self):
+        """Load users with a possibly still valid access token (logged in within the token lifetime)"""
+        conn = await db.get_connection()
+        try:
+            records = await conn.fetch(f"""
+                SELECT {USER_COLUMNS} FROM users
+                WHERE last_login > CURRENT_TIMESTAMP - make_interval(mins => $1)
+                ORDER BY last_login DESC
+                LIMIT $2
+            """, settings.access_token_expire_minutes, self.max_size)
+        finally:
+            await db.release_connection(conn)
+        # Oldest first: the most recent logins end up last in LRU order
+        for record in reversed(records):
+            self.put(dict(record))
+        print(f"User cache warmed up with {len(records)} users")
+
+    async def start(self):
+        """Warm up once user_changed notifications are received (see notification_listener)"""
+        if not settings.user_cache_warmup:
+            return
+        if not notification_listener.listening.is_set():
+            print("User cache listener not connected, skipping warm-up")
+            return
+        await self.warm_up()
+
+    def _on_user_changed(self, payload: str):
+        try:
+            self.invalidate(int(payload))
+        except ValueError:
+            self.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "ttl_s": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else None,
+            "invalidations": self.invalidations,
+            "listening": notification_listener.is_listening()
+        }
+
+# Global user cache instance
+user_cache = UserCache(settings.user_cache_ttl, settings.user_cache_max_size)
@@ -0,0 +1,145 @@
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from fastapi import HTTPException
+from pydantic import ValidationError
+from app.auth import is_password_hash
+from app.config import settings
+from app.database import db
+from app.hashing import password_hasher
+from app.schemas import UserImport
+
+# A line longer than this is not a user record
+MAX_LINE_BYTES = 64 * 1024
+
+# VARCHAR sizes of the users table: COPY would reject the whole batch
+MAX_USERNAME_LENGTH = 50
+MAX_EMAIL_LENGTH = 100
+
+async def read_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, bytes]]:
+    """(line number, line) of an NDJSON body read chunk by chunk, blank lines skipped"""
+    buffer = b""
+    line_number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield line_number, line
+        if len(buffer) > MAX_LINE_BYTES:
+            raise HTTPException(status_code=400, detail=f"Line {line_number + 1} longer than {MAX_LINE_BYTES} bytes")
+    if buffer.strip():
+        yield line_number + 1, buffer
+
+class UserImporter:
+    """
+    Bulk import of users from an NDJSON stream
+
+    Lines are read as the body arrives and handled in batches of
+    import_batch_size: users that already exist are dropped, plain passwords
+    are hashed in the bcrypt worker pool (chunks spread over the workers),
+    then the batch goes through COPY into a temporary table and a single
+    INSERT ... SELECT ... ON CONFLICT DO NOTHING. Only one batch is held in
+    memory; invalid lines are reported and do not stop the import.
+    """
+
+    def __init__(self):
+        self.imported = 0
+        self.skipped = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.error_count = 0
+
+    def error(self, line_number: int, message: str):
+        self.error_count += 1
+        if len(self.errors) < settings.import_max_errors:
+            self.errors.append({"line": line_number, "error": message})
+
+    def parse(self, line_number: int, line: bytes) -> Optional[UserImport]:
+        try:
+            user = UserImport.model_validate_json(line)
+        except ValidationError as e:
+            first = e.errors()[0]
+            location = ".".join(str(part) for part in first["loc"])
+            self.error(line_number, f"{location}: {first['msg']}" if location else first["msg"])
+            return None
+
+        if (user.password is None) == (user.password_hash is None):
+            self.error(line_number, "Exactly one of password or password_hash is required")
+        elif user.password_hash is not None and not is_password_hash(user.password_hash):
+            self.error(line_number, "password_hash is not a bcrypt hash")
+        elif len(user.username) > MAX_USERNAME_LENGTH or len(user.email) > MAX_EMAIL_LENGTH:
+            self.error(line_number, "username or email too long")
+        else:
+            return user
+        return None
+
+    async def run(self, chunks: AsyncIterator[bytes]) -> Dict[str, Any]:
+        batch: List[UserImport] = []
+        async for line_number, line in read_lines(chunks):
+            user = self.parse(line_number, line)
+            if user is None:
+                continue
+            batch.append(user)
+            if len(batch) >= settings.import_batch_size:
+                await self.import_batch(batch)
+                batch = []
+        if batch:
+            await self.import_batch(batch)
+
+        return {
+            "imported": self.imported,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "error_count": self.error_count
+        }
+
+    async def import_batch(self, batch: List[UserImport]):
+        conn = await db.get_connection()
+        try:
+            # Existing users are skipped before paying for bcrypt
+            existing = await conn.fetch(
+                "SELECT username, email FROM users WHERE username = ANY($1::text[]) OR email = ANY($2::text[])",
+                [user.username for user in batch], [user.email for user in batch]
+            )
+        finally:
+            await db.release_connection(conn)
+        taken = {record["username"] for record in existing} | {record["email"] for record in existing}
+        new_users = [user for user in batch if user.username not in taken and user.email not in taken]
+        self.skipped += len(batch) - len(new_users)
+        if not new_users:
+            return
+
+        # Hash without holding a DB connection
+        plain = [user for user in new_users if user.password_hash is None]
+        hashes = await password_hasher.hash_many(
+            [user.password for user in plain], settings.import_hash_chunk_size
+        )
+        for user, password_hash in zip(plain, hashes):
+            user.password_hash = password_hash
+
+        conn = await db.get_connection()
+        try:
+            async with conn.transaction():
+                await conn.execute("""
+                    CREATE TEMP TABLE users_import (
+                        username VARCHAR(50),
+                        email VARCHAR(100),
+                        password_hash VARCHAR(255)
+                    ) ON COMMIT DROP
+                """)
+                await conn.copy_records_to_table(
+                    "users_import",
+                    records=[(user.username, user.email, user.password_hash) for user in new_users],
+                    columns=["username", "email", "password_hash"]
+                )
+                # Duplicates inside the file or users created meanwhile are skipped, not errors
+                status = await conn.execute("""
+                    INSERT INTO users (username, email, password_hash, created_at)
+                    SELECT username, email, password_hash, CURRENT_TIMESTAMP FROM users_import
+                    ON CONFLICT DO NOTHING
+                """)
+        finally:
+            await db.release_connection(conn)
+
+        inserted = int(status.split()[-1])
+        self.imported += inserted
+        self.skipped += len(new_users) - inserted
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the bcrypt step of /login: inline vs worker process pool
+
+Runs N concurrent password verifications (the CPU-bound part of a login)
+against a bcrypt hash, first inline in the event loop as /login used to,
+then through PasswordHasher. Reports logins/sec, logins/sec per core used,
+the worst event loop stall seen by a 5 ms ticker meanwhile (how long every
+other request on the pod was blocked) and the logins rejected with 503 when
+more than workers + queue size are in flight.
+
+Usage:
+    python benchmarks/bench_login.py [--logins 40] [--workers N] [--queue-size 64]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+from pathlib import Path
+
+# Add the app module to the path (dummy DB settings: no connection is opened)
+sys.path.append(str(Path(__file__).parent.parent))
+for key in ("DB_NAME", "DB_USER", "DB_PASSWORD", "JWT_SECRET"):
+    os.environ.setdefault(key, "bench")
+
+from fastapi import HTTPException
+from app.auth import hash_password, verify_password
+from app.hashing import PasswordHasher, available_cpus
+
+PASSWORD = "correct horse battery staple"
+
+async def max_loop_stall(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Largest delay between when a 5 ms sleep should have ended and when it did"""
+    worst = 0.0
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - expected)
+    return worst
+
+async def measure(verify, logins: int):
+    """(logins/sec, worst loop stall in ms, rejected) for `logins` concurrent verifications"""
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(max_loop_stall(stop))
+    await asyncio.sleep(0.02)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(verify() for _ in range(logins)), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    stall = await ticker
+    rejected = sum(1 for result in results if isinstance(result, HTTPException) and result.status_code == 503)
+    assert all(result is True for result in results if not isinstance(result, HTTPException))
+    return (logins - rejected) / elapsed, stall * 1000, rejected
+
+async def run(logins: int, workers: int, queue_size: int):
+    password_hash = hash_password(PASSWORD)
+
+    async def inline():
+        # Before: bcrypt called directly from the async handler
+        return verify_password(PASSWORD, password_hash)
+
+    hasher = PasswordHasher(workers, queue_size)
+    await hasher.start()
+
+    async def pooled():
+        return await hasher.verify(PASSWORD, password_hash)
+
+    print(f"🚀 /login bcrypt step - {logins} concurrent logins, {hasher.workers} worker(s), "
+          f"{available_cpus()} core(s) available\n")
+    print(f"   {'mode':<22} {'logins/s':>9} {'per core':>9} {'max loop stall':>15} {'503':>5}")
+    try:
+        for name, verify, cores in (
+            ("inline (before)", inline, 1),
+            ("process pool (after)", pooled, min(hasher.workers, available_cpus()))
+        ):
+            rate, stall_ms, rejected = await measure(verify, logins)
+            print(f"   {name:<22} {rate:9.1f} {rate / cores:9.1f} {stall_ms:12.1f} ms {rejected:5d}")
+    finally:
+        await hasher.stop()
+
+    print(f"\n   Pool stats: {hasher.get_stats()}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=0, help="0 = available cores")
+    parser.add_argument("--queue-size", type=int, default=64)
+    args = parser.parse_args()
+    asyncio.run(run(args.logins, args.workers, args.queue_size))
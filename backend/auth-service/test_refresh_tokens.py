@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Test of refresh token rotation in the Auth Service
+Runs without Postgres: an in-memory connection answers the refresh_tokens queries
+"""
+
+import os
+import sys
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the app module to the path (dummy settings: no connection is opened)
+sys.path.append(str(Path(__file__).parent))
+for key in ("DB_NAME", "DB_USER", "DB_PASSWORD", "JWT_SECRET"):
+    os.environ.setdefault(key, "test")
+
+from fastapi import HTTPException
+from app import tokens
+
+class FakeConnection:
+    """refresh_tokens and revoked_tokens in memory, for the statements used by app.tokens"""
+
+    def __init__(self):
+        self.refresh_tokens = []
+        self.revoked_jtis = set()
+        self.users = {1: {"username": "alice", "is_active": True}}
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+    async def execute(self, query, *args):
+        if "INSERT INTO refresh_tokens" in query:
+            user_id, token_hash, family_id, access_jti, access_exp, expires_at = args
+            self.refresh_tokens.append({
+                "id": len(self.refresh_tokens) + 1, "user_id": user_id, "token_hash": token_hash,
+                "family_id": family_id, "access_jti": access_jti, "access_exp": access_exp,
+                "expires_at": expires_at, "revoked_at": None, "rotated_at": None
+            })
+        elif "rotated_at = $2" in query:
+            row = self.refresh_tokens[args[0] - 1]
+            row["revoked_at"] = row["rotated_at"] = args[1]
+        elif "INSERT INTO revoked_tokens" in query:
+            self.revoked_jtis.update(args[0])
+
+    async def fetchrow(self, query, token_hash):
+        for row in self.refresh_tokens:
+            if row["token_hash"] == token_hash:
+                return {**row, **self.users[row["user_id"]]}
+        return None
+
+    async def fetchval(self, query, value):
+        if "token_hash" in query:
+            return next((row["family_id"] for row in self.refresh_tokens if row["token_hash"] == value), None)
+        return any(row["family_id"] == value and row["revoked_at"] is None for row in self.refresh_tokens)
+
+    async def fetch(self, query, family_id):
+        revoked = []
+        for row in self.refresh_tokens:
+            if row["family_id"] == family_id:
+                row["revoked_at"] = row["revoked_at"] or datetime.utcnow()
+                revoked.append(row)
+        return revoked
+
+class FakeDatabase:
+    def __init__(self, connection: FakeConnection):
+        self.connection = connection
+
+    async def get_connection(self):
+        return self.connection
+
+    async def release_connection(self, connection):
+        pass
+
+def setup() -> FakeConnection:
+    connection = FakeConnection()
+    tokens.db = FakeDatabase(connection)
+    return connection
+
+async def login(connection: FakeConnection) -> str:
+    token = await tokens.issue_tokens(connection, 1, "alice")
+    return token.refresh_token
+
+def test_concurrent_refresh_same_token():
+    """Test of two back-to-back refreshes with the same token (two tabs): both succeed"""
+    print("🧪 Test Refresh - two tabs refreshing at once")
+    connection = setup()
+
+    async def scenario():
+        refresh_token = await login(connection)
+        first = await tokens.rotate_refresh_token(refresh_token)
+        second = await tokens.rotate_refresh_token(refresh_token)
+
+        assert first.refresh_token != second.refresh_token
+        assert not connection.revoked_jtis
+        # Both tabs keep a working session
+        await tokens.rotate_refresh_token(first.refresh_token)
+        await tokens.rotate_refresh_token(second.refresh_token)
+
+    asyncio.run(scenario())
+    print("   ✅ Second refresh answered with a sibling pair, session kept")
+
+def test_replay_after_grace_revokes_session():
+    """Test of a rotated token replayed after the grace window: whole session revoked"""
+    print("\n🧪 Test Refresh - replay after the grace window")
+    connection = setup()
+
+    async def scenario():
+        refresh_token = await login(connection)
+        successor = await tokens.rotate_refresh_token(refresh_token)
+        connection.refresh_tokens[0]["rotated_at"] -= timedelta(seconds=tokens.settings.refresh_reuse_grace_seconds + 1)
+
+        for presented in (refresh_token, successor.refresh_token):
+            try:
+                await tokens.rotate_refresh_token(presented)
+                assert False, "Refresh accepted after reuse"
+            except HTTPException as e:
+                assert e.status_code == 401
+
+        assert all(row["revoked_at"] is not None for row in connection.refresh_tokens)
+        assert len(connection.revoked_jtis) == 2
+
+    asyncio.run(scenario())
+    print("   ✅ Session and its access tokens revoked")
+
+def test_replay_after_logout_rejected():
+    """Test that the grace window does not revive a logged out session"""
+    print("\n🧪 Test Refresh - replay after logout")
+    connection = setup()
+
+    async def scenario():
+        refresh_token = await login(connection)
+        await tokens.rotate_refresh_token(refresh_token)
+        await tokens.revoke_session(None, refresh_token)
+        try:
+            await tokens.rotate_refresh_token(refresh_token)
+            assert False, "Refresh accepted after logout"
+        except HTTPException as e:
+            assert e.status_code == 401
+
+    asyncio.run(scenario())
+    print("   ✅ Refresh rejected")
+
+def main():
+    """Run all refresh token tests"""
+    print("🚀 Refresh Token Tests - NoKube Auth Service\n")
+
+    try:
+        test_concurrent_refresh_same_token()
+        test_replay_after_grace_revokes_session()
+        test_replay_after_logout_rejected()
+
+        print(f"\n✅ ALL REFRESH TOKEN TESTS PASSED!")
+
+    except Exception as e:
+        print(f"\n❌ REFRESH TOKEN TEST FAILED: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
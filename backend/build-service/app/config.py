@@ -32,5 +32,13 @@ class Settings:
     # Configuration build
     BUILD_TIMEOUT: int = int(os.getenv("BUILD_TIMEOUT", "600"))  # 10 minutes
     MAX_CONCURRENT_BUILDS: int = int(os.getenv("MAX_CONCURRENT_BUILDS", "3"))
+    
+    # Tracing distribué W3C (traceparent) : sink "file", "otlp" ou "none" (propagation seule)
+    TRACE_EXPORTER: str = os.getenv("TRACE_EXPORTER", "none")
+    TRACE_SAMPLE_RATIO: float = float(os.getenv("TRACE_SAMPLE_RATIO", "0.05"))
+    TRACE_FILE: str = os.getenv("TRACE_FILE", "/tmp/nokube-traces.jsonl")
+    OTLP_ENDPOINT: str = os.getenv("OTLP_ENDPOINT", "http://localhost:4318")
+    TRACE_EXPORT_INTERVAL: float = float(os.getenv("TRACE_EXPORT_INTERVAL", "5"))
+    TRACE_MAX_QUEUE: int = int(os.getenv("TRACE_MAX_QUEUE", "2048"))
 
 settings = Settings()
\ No newline at end of file
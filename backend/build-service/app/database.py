@@ -1,5 +1,6 @@
 import asyncpg
 from app.config import settings
+from app.tracing import instrument_connection
 
 class Database:
     def __init__(self):
@@ -15,6 +16,7 @@ class Database:
             database=settings.db_name,
             min_size=5,
             max_size=20,
+            init=instrument_connection,
         )
         print("Build Service: Database connection pool created")
     
@@ -173,7 +175,7 @@ async def list_all_builds(limit: int = 50, offset: int = 0, status: str = None)
                        error_message, estimated_duration
                 FROM builds 
                 ORDER BY created_at DESC
-                LIMIT $2 OFFSET $3
+                LIMIT $1 OFFSET $2
             """, limit, offset)
         return [dict(row) for row in rows]
     finally:
@@ -10,6 +10,7 @@ import time
 
 from app.config import settings
 from app.schemas import BuildStatus, BuildRequest, BuildStatusResponse
+from app.tracing import tracer
 
 
 class GitHubActionsBuilder:
@@ -158,21 +159,24 @@ CMD ["echo", "NoKube default container - configure your Dockerfile"]"""
         try:
             # Vérifier si le fichier existe déjà
             try:
-                existing_file = self.repo.get_contents(dockerfile_path)
+                with self._github_span("get_contents", path=dockerfile_path):
+                    existing_file = self.repo.get_contents(dockerfile_path)
                 # Mettre à jour le fichier existant
-                self.repo.update_file(
-                    path=dockerfile_path,
-                    message=f"Update Dockerfile for {username}/{project_name}/{service_name}",
-                    content=dockerfile_content,
-                    sha=existing_file.sha
-                )
+                with self._github_span("update_file", path=dockerfile_path):
+                    self.repo.update_file(
+                        path=dockerfile_path,
+                        message=f"Update Dockerfile for {username}/{project_name}/{service_name}",
+                        content=dockerfile_content,
+                        sha=existing_file.sha
+                    )
             except GithubException:
                 # Le fichier n'existe pas, le créer
-                self.repo.create_file(
-                    path=dockerfile_path,
-                    message=f"Add Dockerfile for {username}/{project_name}/{service_name}",
-                    content=dockerfile_content
-                )
+                with self._github_span("create_file", path=dockerfile_path):
+                    self.repo.create_file(
+                        path=dockerfile_path,
+                        message=f"Add Dockerfile for {username}/{project_name}/{service_name}",
+                        content=dockerfile_content
+                    )
             
             print(f"Dockerfile uploaded to {self.build_repo}:{dockerfile_path}")
             return dockerfile_path
@@ -202,18 +206,21 @@ CMD ["echo", "NoKube default container - configure your Dockerfile"]"""
         
         try:
             # Déclencher le workflow via l'API GitHub
-            workflow = self.repo.get_workflow("build-image.yml")
-            workflow_dispatch = workflow.create_dispatch(
-                ref="main",
-                inputs=workflow_inputs
-            )
+            with self._github_span("get_workflow", workflow="build-image.yml"):
+                workflow = self.repo.get_workflow("build-image.yml")
+            with self._github_span("create_dispatch", workflow="build-image.yml"):
+                workflow_dispatch = workflow.create_dispatch(
+                    ref="main",
+                    inputs=workflow_inputs
+                )
             
             # Attendre quelques secondes pour que le run soit créé
             await asyncio.sleep(3)
             
             # Récupérer le workflow run ID le plus récent
-            runs = workflow.get_runs()
-            latest_run = runs[0]
+            with self._github_span("get_runs", workflow="build-image.yml"):
+                runs = workflow.get_runs()
+                latest_run = runs[0]
             
             print(f"Workflow dispatched: {latest_run.id}")
             return latest_run.id
@@ -229,7 +236,8 @@ CMD ["echo", "NoKube default container - configure your Dockerfile"]"""
         while time.time() - start_time < timeout:
             try:
                 # Récupérer le statut du workflow run
-                workflow_run = self.repo.get_workflow_run(workflow_run_id)
+                with self._github_span("get_workflow_run", run_id=workflow_run_id):
+                    workflow_run = self.repo.get_workflow_run(workflow_run_id)
                 status = workflow_run.status
                 conclusion = workflow_run.conclusion
                 
@@ -281,6 +289,12 @@ CMD ["echo", "NoKube default container - configure your Dockerfile"]"""
             if status_callback:
                 status_callback(build_status)
     
+    def _github_span(self, operation: str, **attributes):
+        """Span d'un appel à l'API GitHub (PyGithub, appel bloquant)"""
+        attributes = {f"github.{key}": value for key, value in attributes.items()}
+        attributes["github.repo"] = self.build_repo
+        return tracer.span(f"github {operation}", "client", attributes)
+    
     def get_active_builds(self) -> Dict[str, str]:
         """Retourner la liste des builds actifs"""
         return {build_id: "building" for build_id in self.active_builds.keys()}
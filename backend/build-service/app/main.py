@@ -11,15 +11,18 @@ from app.schemas import (
     HealthResponse, ReadyResponse, BuildStatus
 )
 from app.github_builder import github_builder
-from app.database import db, init_db, create_build, get_build, update_build_status, list_builds_by_project, list_all_builds, count_builds
+from app.database import db, init_db, create_build, get_build, update_build_status, list_builds_by_project, list_all_builds as fetch_all_builds, count_builds
 from app.middleware import LoggingMiddleware
+from app.tracing import TracingMiddleware, tracer
+from app.responses import FastJSONResponse, rows_as
 from fastapi.middleware.cors import CORSMiddleware
 
 # Création de l'application FastAPI
 app = FastAPI(
     title=settings.TITLE,
     description=settings.DESCRIPTION,
-    version=settings.VERSION
+    version=settings.VERSION,
+    default_response_class=FastJSONResponse
 )
 
 # Ajout des middlewares
@@ -31,18 +34,21 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(TracingMiddleware)
 
 # Events de cycle de vie
 @app.on_event("startup")
 async def startup():
-    """Initialiser la connexion DB au démarrage"""
+    """Initialiser la connexion DB et l'export des traces au démarrage"""
     await db.connect()
     await init_db()
+    await tracer.start()
 
 @app.on_event("shutdown")
 async def shutdown():
-    """Fermer la connexion DB à l'arrêt"""
+    """Fermer la connexion DB et exporter les derniers spans à l'arrêt"""
     await db.disconnect()
+    await tracer.stop()
 
 # Note: Builds maintenant stockés dans PostgreSQL (plus de stockage en mémoire)
 
@@ -204,7 +210,7 @@ async def get_build_logs(
     
     return StreamingResponse(
         log_generator(),
-        media_type="text/plain",
+        media_type="text/event-stream",
         headers={"Cache-Control": "no-cache"}
     )
 
@@ -227,15 +233,13 @@ async def list_project_builds(
     finally:
         await db.release_connection(conn)
     
-    # Convertir en BuildStatusResponse
-    builds = [BuildStatusResponse(**build_data) for build_data in builds_data]
-    
-    return BuildListResponse(
-        builds=builds,
-        total=total,
-        limit=limit,
-        offset=offset
-    )
+    # Lignes réduites aux champs de BuildStatusResponse, encodées directement par orjson
+    return FastJSONResponse({
+        "builds": rows_as(BuildStatusResponse, builds_data),
+        "total": total,
+        "limit": limit,
+        "offset": offset
+    })
 
 @app.get("/builds")
 async def list_all_builds(
@@ -248,7 +252,7 @@ async def list_all_builds(
     
     # Récupérer depuis la DB avec filtrage optionnel
     status_str = status.value if status else None
-    builds_data = await list_all_builds(limit, offset, status_str)
+    builds_data = await fetch_all_builds(limit, offset, status_str)
     
     # Compter le total
     total = await count_builds()
@@ -260,16 +264,14 @@ async def list_all_builds(
         finally:
             await db.release_connection(conn)
     
-    # Convertir en BuildStatusResponse
-    builds = [BuildStatusResponse(**build_data) for build_data in builds_data]
-    
-    return {
-        "builds": builds,
+    # Lignes réduites aux champs de BuildStatusResponse, encodées directement par orjson
+    return FastJSONResponse({
+        "builds": rows_as(BuildStatusResponse, builds_data),
         "total": total,
         "limit": limit,
         "offset": offset,
         "active_builds": github_builder.get_active_builds()
-    }
+    })
 
 @app.get("/status")
 async def service_status():
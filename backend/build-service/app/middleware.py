@@ -1,7 +1,7 @@
 import time
 import logging
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Receive, Scope, Send, Message
 from fastapi.middleware.cors import CORSMiddleware as FastAPICORSMiddleware
 
 # Configuration du logging
@@ -11,31 +11,44 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware de logging pour les requêtes HTTP"""
+class LoggingMiddleware:
+    """Middleware ASGI de logging pour les requêtes HTTP (sans bufferiser les réponses streamées)"""
     
-    async def dispatch(self, request: Request, call_next):
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
         start_time = time.time()
+        method = scope["method"]
+        path = scope["path"]
+        status_code = 500
         
         # Logs de la requête entrante
-        logger.info(f"Incoming request: {request.method} {request.url}")
-        
-        # Traitement de la requête
-        response = await call_next(request)
-        
-        # Calcul du temps de traitement
-        process_time = time.time() - start_time
-        
-        # Logs de la réponse
-        logger.info(
-            f"Request processed: {request.method} {request.url.path} - "
-            f"Status: {response.status_code} - Time: {process_time:.3f}s"
-        )
+        logger.info(f"Incoming request: {method} {path}")
         
-        # Ajouter le temps de traitement dans les headers
-        response.headers["X-Process-Time"] = str(process_time)
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # Ajouter le temps de traitement dans les headers
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Process-Time", str(time.time() - start_time))
+            await send(message)
         
-        return response
+        try:
+            # Traitement de la requête
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Calcul du temps de traitement et logs de la réponse
+            process_time = time.time() - start_time
+            logger.info(
+                f"Request processed: {method} {path} - "
+                f"Status: {status_code} - Time: {process_time:.3f}s"
+            )
 
 # Configuration CORS pour le Build Service
 def get_cors_middleware():
@@ -32,7 +32,18 @@ class Settings:
     DEFAULT_INGRESS_CLASS: str = os.getenv("INGRESS_CLASS", "nginx")
     DEFAULT_HOST: str = os.getenv("DEFAULT_HOST", "localhost")
     
+    # Stream SSE de progression des déploiements (intervalle de lecture de l'état en DB)
+    EVENTS_POLL_INTERVAL: float = float(os.getenv("EVENTS_POLL_INTERVAL", "2"))
+    
     # Services externes
     BUILD_SERVICE_URL: str = os.getenv("BUILD_SERVICE_URL", "http://build-service:8000")
+    
+    # Tracing distribué W3C (traceparent) : sink "file", "otlp" ou "none" (propagation seule)
+    TRACE_EXPORTER: str = os.getenv("TRACE_EXPORTER", "none")
+    TRACE_SAMPLE_RATIO: float = float(os.getenv("TRACE_SAMPLE_RATIO", "0.05"))
+    TRACE_FILE: str = os.getenv("TRACE_FILE", "/tmp/nokube-traces.jsonl")
+    OTLP_ENDPOINT: str = os.getenv("OTLP_ENDPOINT", "http://localhost:4318")
+    TRACE_EXPORT_INTERVAL: float = float(os.getenv("TRACE_EXPORT_INTERVAL", "5"))
+    TRACE_MAX_QUEUE: int = int(os.getenv("TRACE_MAX_QUEUE", "2048"))
 
 settings = Settings()
\ No newline at end of file
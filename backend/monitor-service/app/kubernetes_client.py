@@ -6,6 +6,8 @@ from kubernetes import client, config
 from kubernetes.client.rest import ApiException
 import tempfile
 import os
+from contextlib import contextmanager
+from app.tracing import tracer
 
 class KubernetesClient:
     """Client Kubernetes pour déployer et gérer les manifests"""
@@ -43,7 +45,8 @@ class KubernetesClient:
         """Tester la connexion au cluster Kubernetes"""
         try:
             # Test simple : lister les nodes
-            nodes = self.v1.list_node()
+            with self._k8s_span("list_node"):
+                nodes = self.v1.list_node()
             print(f"Connected to K8s cluster with {len(nodes.items)} nodes")
             return True
         except Exception as e:
@@ -53,7 +56,8 @@ class KubernetesClient:
     async def namespace_exists(self, namespace: str) -> bool:
         """Vérifier si un namespace existe"""
         try:
-            self.v1.read_namespace(name=namespace)
+            with self._k8s_span("read_namespace", namespace):
+                self.v1.read_namespace(name=namespace)
             return True
         except ApiException as e:
             if e.status == 404:
@@ -75,7 +79,8 @@ class KubernetesClient:
                 )
             )
             
-            self.v1.create_namespace(body=ns_manifest)
+            with self._k8s_span("create_namespace", namespace):
+                self.v1.create_namespace(body=ns_manifest)
             print(f"Created namespace: {namespace}")
             return True
             
@@ -168,14 +173,16 @@ class KubernetesClient:
             
             # Essayer de créer, si existe déjà, remplacer
             try:
-                self.v1.create_namespaced_config_map(namespace=namespace, body=configmap)
+                with self._k8s_span("create_namespaced_config_map", namespace):
+                    self.v1.create_namespaced_config_map(namespace=namespace, body=configmap)
             except ApiException as e:
                 if e.status == 409:  # Already exists
-                    self.v1.replace_namespaced_config_map(
-                        name=manifest['metadata']['name'],
-                        namespace=namespace, 
-                        body=configmap
-                    )
+                    with self._k8s_span("replace_namespaced_config_map", namespace):
+                        self.v1.replace_namespaced_config_map(
+                            name=manifest['metadata']['name'],
+                            namespace=namespace, 
+                            body=configmap
+                        )
                 else:
                     raise e
             
@@ -199,14 +206,16 @@ class KubernetesClient:
             )
             
             try:
-                self.v1.create_namespaced_secret(namespace=namespace, body=secret)
+                with self._k8s_span("create_namespaced_secret", namespace):
+                    self.v1.create_namespaced_secret(namespace=namespace, body=secret)
             except ApiException as e:
                 if e.status == 409:  # Already exists
-                    self.v1.replace_namespaced_secret(
-                        name=manifest['metadata']['name'],
-                        namespace=namespace,
-                        body=secret
-                    )
+                    with self._k8s_span("replace_namespaced_secret", namespace):
+                        self.v1.replace_namespaced_secret(
+                            name=manifest['metadata']['name'],
+                            namespace=namespace,
+                            body=secret
+                        )
                 else:
                     raise e
             
@@ -266,7 +275,9 @@ class KubernetesClient:
             
             # Appliquer avec kubectl
             cmd = ["kubectl", "apply", "-f", temp_file, "-n", namespace]
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            with self._k8s_span(f"kubectl apply {manifest.get('kind', '')}".strip(), namespace) as span:
+                result = subprocess.run(cmd, capture_output=True, text=True)
+                span.set_attribute("process.exit_code", result.returncode)
             
             # Nettoyer le fichier temporaire
             os.unlink(temp_file)
@@ -285,10 +296,11 @@ class KubernetesClient:
     async def get_deployment_status(self, deployment_name: str, namespace: str) -> Dict:
         """Récupérer le statut d'un déploiement"""
         try:
-            deployment = self.apps_v1.read_namespaced_deployment(
-                name=deployment_name,
-                namespace=namespace
-            )
+            with self._k8s_span("read_namespaced_deployment", namespace):
+                deployment = self.apps_v1.read_namespaced_deployment(
+                    name=deployment_name,
+                    namespace=namespace
+                )
             
             return {
                 "replicas_total": deployment.spec.replicas or 0,
@@ -313,7 +325,8 @@ class KubernetesClient:
     async def delete_namespace(self, namespace: str) -> bool:
         """Supprimer un namespace complet (undeploy projet)"""
         try:
-            self.v1.delete_namespace(name=namespace)
+            with self._k8s_span("delete_namespace", namespace):
+                self.v1.delete_namespace(name=namespace)
             print(f"Deleted namespace: {namespace}")
             return True
         except ApiException as e:
@@ -322,6 +335,17 @@ class KubernetesClient:
                 return True
             print(f"Error deleting namespace {namespace}: {e}")
             return False
+    
+    @contextmanager
+    def _k8s_span(self, operation: str, namespace: Optional[str] = None):
+        """Span d'un appel au cluster (API Kubernetes ou kubectl), status HTTP relevé sur ApiException"""
+        attributes = {"k8s.namespace": namespace} if namespace else None
+        with tracer.span(f"k8s {operation}", "client", attributes) as span:
+            try:
+                yield span
+            except ApiException as e:
+                span.set_attribute("http.status_code", e.status)
+                raise
 
 # Instance globale du client
 k8s_client = KubernetesClient()
\ No newline at end of file
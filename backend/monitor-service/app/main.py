@@ -1,4 +1,5 @@
 from fastapi import FastAPI, HTTPException, Header, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from datetime import datetime
 from typing import List, Optional, Dict
 import asyncio
@@ -17,13 +18,16 @@ from app.database import (
     list_deployments_by_project, count_deployments, count_deployments_by_status
 )
 from app.middleware import LoggingMiddleware
+from app.tracing import TracingMiddleware, tracer
+from app.responses import FastJSONResponse, rows_as
 from fastapi.middleware.cors import CORSMiddleware
 
 # Création de l'application FastAPI
 app = FastAPI(
     title=settings.TITLE,
     description=settings.DESCRIPTION,
-    version=settings.VERSION
+    version=settings.VERSION,
+    default_response_class=FastJSONResponse
 )
 
 # Ajout des middlewares
@@ -35,18 +39,21 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(TracingMiddleware)
 
 # Events de cycle de vie
 @app.on_event("startup")
 async def startup():
-    """Initialiser la connexion DB au démarrage"""
+    """Initialiser la connexion DB et l'export des traces au démarrage"""
     await db.connect()
     await init_db()
+    await tracer.start()
 
 @app.on_event("shutdown")
 async def shutdown():
-    """Fermer la connexion DB à l'arrêt"""
+    """Fermer la connexion DB et exporter les derniers spans à l'arrêt"""
     await db.disconnect()
+    await tracer.stop()
 
 # Note: Déploiements maintenant stockés dans PostgreSQL (plus de stockage en mémoire)
 manifests_storage: Dict[str, Dict[str, str]] = {}  # deployment_id -> manifests
@@ -71,6 +78,7 @@ async def root(x_user: str = Header(...)):
             "deploy": "/deploy", 
             "manifests": "/manifests/{deployment_id}",
             "status": "/deployments/{deployment_id}",
+            "events": "/deployments/{deployment_id}/events",
             "docs": "/docs"
         }
     }
@@ -299,6 +307,46 @@ async def get_deployment_status(
     # Convertir les données DB en DeploymentStatusResponse
     return DeploymentStatusResponse(**deployment_data)
 
+@app.get("/deployments/{deployment_id}/events")
+async def stream_deployment_events(
+    deployment_id: str,
+    x_user: str = Header(..., description="Utilisateur authentifié via Gateway")
+):
+    """Stream SSE de la progression d'un déploiement jusqu'à un état final"""
+    
+    deployment_data = await get_deployment(deployment_id)
+    if not deployment_data:
+        raise HTTPException(status_code=404, detail=f"Deployment {deployment_id} not found")
+    
+    async def event_generator():
+        last_payload = None
+        while True:
+            deployment_data = await get_deployment(deployment_id)
+            if not deployment_data:
+                break
+            
+            # Un événement par changement d'état (statut, replicas prêts, erreur...)
+            deployment = DeploymentStatusResponse(**deployment_data)
+            payload = deployment.model_dump_json()
+            if payload != last_payload:
+                yield f"event: status\ndata: {payload}\n\n"
+                last_payload = payload
+            
+            finished = deployment.status in [DeploymentStatus.FAILED, DeploymentStatus.STOPPED] or (
+                deployment.status == DeploymentStatus.RUNNING
+                and deployment.replicas_ready >= deployment.replicas_total
+            )
+            if finished:
+                break
+            
+            await asyncio.sleep(settings.EVENTS_POLL_INTERVAL)
+    
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
 @app.get("/manifests/{deployment_id}", response_model=ManifestResponse)
 async def get_deployment_manifests(
     deployment_id: str,
@@ -337,16 +385,14 @@ async def list_project_deployments(
     finally:
         await db.release_connection(conn)
     
-    # Convertir en DeploymentStatusResponse
-    deployments = [DeploymentStatusResponse(**deployment_data) for deployment_data in deployments_data]
-    
-    return {
-        "deployments": deployments,
+    # Lignes réduites aux champs de DeploymentStatusResponse, encodées directement par orjson
+    return FastJSONResponse({
+        "deployments": rows_as(DeploymentStatusResponse, deployments_data),
         "total": total,
         "limit": limit,
         "offset": offset,
         "project_id": project_id
-    }
+    })
 
 @app.delete("/deployments/{deployment_id}")
 async def delete_deployment(
@@ -423,6 +469,7 @@ async def not_found_handler(request, exc):
             "/ready",
             "/deploy",
             "/deployments/{deployment_id}",
+            "/deployments/{deployment_id}/events",
             "/manifests/{deployment_id}",
             "/projects/{project_id}/deployments",
             "/status"
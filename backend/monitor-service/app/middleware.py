@@ -1,35 +1,48 @@
 import time
 import logging
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Receive, Scope, Send, Message
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware pour logger les requêtes et performances"""
+class LoggingMiddleware:
+    """Middleware ASGI pour logger les requêtes et performances (sans bufferiser les réponses)"""
     
-    async def dispatch(self, request: Request, call_next):
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
         # Démarrer le timer
         start_time = time.time()
+        method = scope["method"]
+        path = scope["path"]
+        status_code = 500
         
         # Logger la requête entrante
-        logger.info(f"Incoming request: {request.method} {request.url}")
-        
-        # Exécuter la requête
-        response = await call_next(request)
-        
-        # Calculer le temps de traitement
-        process_time = time.time() - start_time
-        
-        # Logger la réponse
-        logger.info(
-            f"Request processed: {request.method} {request.url.path} - "
-            f"Status: {response.status_code} - Time: {process_time:.3f}s"
-        )
+        logger.info(f"Incoming request: {method} {path}")
         
-        # Ajouter le temps de traitement dans les headers
-        response.headers["X-Process-Time"] = str(process_time)
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # Ajouter le temps de traitement dans les headers
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Process-Time", str(time.time() - start_time))
+            await send(message)
         
-        return response
\ No newline at end of file
+        try:
+            # Exécuter la requête
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Calculer le temps de traitement et logger la réponse
+            process_time = time.time() - start_time
+            logger.info(
+                f"Request processed: {method} {path} - "
+                f"Status: {status_code} - Time: {process_time:.3f}s"
+            )
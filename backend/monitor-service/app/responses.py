@@ -0,0 +1,45 @@
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Mapping, Type
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+def _default(value: Any) -> Any:
+    """Types non gérés nativement par orjson (datetime, date, UUID, Enum et dataclasses le sont)"""
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type {type(value).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    """Encoder en JSON (UTF-8) avec orjson"""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+def rows_as(model: Type[BaseModel], rows: Iterable[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Lignes (dict ou asyncpg.Record) réduites aux champs du modèle de réponse
+
+    Remplace un modèle Pydantic par ligne dans les listes : les colonnes
+    absentes prennent la valeur par défaut du champ, les types viennent déjà
+    de la base.
+    """
+    defaults = {
+        name: None if field.is_required() else field.get_default(call_default_factory=True)
+        for name, field in model.model_fields.items()
+    }
+    return [{name: row.get(name, default) for name, default in defaults.items()} for row in rows]
+
+class FastJSONResponse(JSONResponse):
+    """
+    Réponse JSON encodée par orjson (classe de réponse par défaut de l'application)
+
+    Une route qui retourne directement une FastJSONResponse évite aussi le
+    passage par jsonable_encoder et la validation du response_model (conservé
+    pour la documentation OpenAPI).
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
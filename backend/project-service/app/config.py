@@ -45,6 +45,14 @@ class Settings(BaseSettings):
     DEFAULT_CPU_REQUEST: str = os.getenv("DEFAULT_CPU_REQUEST", "100m")
     DEFAULT_MEMORY_REQUEST: str = os.getenv("DEFAULT_MEMORY_REQUEST", "128Mi")
     
+    # Tracing distribué W3C (traceparent) : sink "file", "otlp" ou "none" (propagation seule)
+    TRACE_EXPORTER: str = os.getenv("TRACE_EXPORTER", "none")
+    TRACE_SAMPLE_RATIO: float = float(os.getenv("TRACE_SAMPLE_RATIO", "0.05"))
+    TRACE_FILE: str = os.getenv("TRACE_FILE", "/tmp/nokube-traces.jsonl")
+    OTLP_ENDPOINT: str = os.getenv("OTLP_ENDPOINT", "http://localhost:4318")
+    TRACE_EXPORT_INTERVAL: float = float(os.getenv("TRACE_EXPORT_INTERVAL", "5"))
+    TRACE_MAX_QUEUE: int = int(os.getenv("TRACE_MAX_QUEUE", "2048"))
+    
     def get_project_namespace(self, project_name: str) -> str:
         """Génère le namespace unique pour un projet"""
         # Nettoyer le nom du projet pour être compatible K8s
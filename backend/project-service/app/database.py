@@ -1,5 +1,6 @@
 import asyncpg
 from app.config import settings
+from app.tracing import instrument_connection
 
 class Database:
     def __init__(self):
@@ -15,6 +16,7 @@ class Database:
             database=settings.db_name,
             min_size=5,
             max_size=20,
+            init=instrument_connection,
         )
         print("Project Service: Database connection pool created")
     
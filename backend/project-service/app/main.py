@@ -8,29 +8,35 @@ from app.schemas import (
 )
 from app.database import db, init_db
 from app.middleware import LoggingMiddleware, CORSMiddleware
+from app.tracing import TracingMiddleware, tracer
+from app.responses import FastJSONResponse, rows_as
 
 # Création de l'application FastAPI
 app = FastAPI(
     title=settings.TITLE,
     description=settings.DESCRIPTION,
-    version=settings.VERSION
+    version=settings.VERSION,
+    default_response_class=FastJSONResponse
 )
 
 # Ajout des middlewares
 app.add_middleware(LoggingMiddleware)
 app.add_middleware(CORSMiddleware)
+app.add_middleware(TracingMiddleware)
 
 # Events de cycle de vie
 @app.on_event("startup")
 async def startup():
-    """Initialiser la connexion DB au démarrage"""
+    """Initialiser la connexion DB et l'export des traces au démarrage"""
     await db.connect()
     await init_db()
+    await tracer.start()
 
 @app.on_event("shutdown")
 async def shutdown():
-    """Fermer la connexion DB à l'arrêt"""
+    """Fermer la connexion DB et exporter les derniers spans à l'arrêt"""
     await db.disconnect()
+    await tracer.stop()
 
 @app.get("/")
 async def root(x_user: str = Header(...)):
@@ -113,12 +119,13 @@ async def list_projects(
             LIMIT $2 OFFSET $3
         """, x_user, limit, offset)
         
-        return ProjectListResponse(
-            projects=[ProjectResponse(**dict(p)) for p in projects],
-            total=total,
-            limit=limit,
-            offset=offset
-        )
+        # Lignes encodées directement par orjson, sans modèle Pydantic par projet
+        return FastJSONResponse({
+            "projects": rows_as(ProjectResponse, projects),
+            "total": total,
+            "limit": limit,
+            "offset": offset
+        })
     
     finally:
         await db.release_connection(conn)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark de l'encodage JSON des réponses de liste (GET /projects)
+
+Compare, sur une liste de N projets (1000 par défaut) :
+- avant : un ProjectResponse par ligne, sérialisation FastAPI du response_model
+  puis json.dumps (JSONResponse)
+- modèles + orjson : même chemin, seule la classe de réponse par défaut change
+- après : lignes réduites aux champs du modèle (rows_as) encodées par orjson
+  (FastJSONResponse retournée directement par la route)
+
+Pour chaque scénario : temps moyen par réponse, pic mémoire alloué pendant
+l'encodage (tracemalloc) et collectes du GC (génération 0) par 100 réponses.
+Les trois corps JSON sont vérifiés identiques une fois décodés.
+
+Usage:
+    python benchmarks/bench_json.py [--rows 1000] [--iterations 200]
+"""
+
+import os
+import gc
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Ajouter le module app au path (configuration DB factice : aucune connexion n'est ouverte)
+sys.path.append(str(Path(__file__).parent.parent))
+for key in ("DB_NAME", "DB_USER", "DB_PASSWORD"):
+    os.environ.setdefault(key, "bench")
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from app.main import app
+from app.schemas import ProjectResponse, ProjectListResponse
+from app.responses import FastJSONResponse, rows_as
+
+def make_rows(count: int):
+    """Lignes comme retournées par asyncpg pour SELECT ... FROM projects"""
+    now = datetime(2024, 1, 1, 12, 0, 0)
+    return [
+        {
+            "id": i,
+            "name": f"project-{i}",
+            "description": f"Description du projet {i}" if i % 3 else None,
+            "repository_url": f"https://github.com/user/project-{i}.git",
+            "framework": "react",
+            "status": "deployed",
+            "owner": "alice",
+            "created_at": now - timedelta(minutes=i),
+            "updated_at": now - timedelta(seconds=i)
+        }
+        for i in range(count)
+    ]
+
+def response_field():
+    """response_model de la route GET /projects, tel que FastAPI l'utilise"""
+    for route in app.routes:
+        if getattr(route, "path", None) == "/projects" and "GET" in route.methods:
+            return route.response_field
+    raise RuntimeError("Route GET /projects introuvable")
+
+async def models_then(response_class, rows, field) -> bytes:
+    content = ProjectListResponse(
+        projects=[ProjectResponse(**row) for row in rows],
+        total=len(rows),
+        limit=len(rows),
+        offset=0
+    )
+    serialized = await serialize_response(field=field, response_content=content)
+    return response_class(serialized).body
+
+async def models_json(rows, field) -> bytes:
+    return await models_then(JSONResponse, rows, field)
+
+async def models_orjson(rows, field) -> bytes:
+    return await models_then(FastJSONResponse, rows, field)
+
+async def rows_orjson(rows, field) -> bytes:
+    return FastJSONResponse({
+        "projects": rows_as(ProjectResponse, rows),
+        "total": len(rows),
+        "limit": len(rows),
+        "offset": 0
+    }).body
+
+async def measure(encode, rows, field, iterations: int):
+    for _ in range(10):  # échauffement
+        await encode(rows, field)
+
+    gc_before = gc.get_stats()[0]["collections"]
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await encode(rows, field)
+    per_response_ms = (time.perf_counter() - start) / iterations * 1000
+    gc_per_100 = (gc.get_stats()[0]["collections"] - gc_before) / iterations * 100
+
+    tracemalloc.start()
+    body = await encode(rows, field)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return per_response_ms, peak / 1024, gc_per_100, body
+
+async def run(row_count: int, iterations: int):
+    rows = make_rows(row_count)
+    field = response_field()
+
+    scenarios = [
+        ("modèle par ligne + json (avant)", models_json),
+        ("modèle par ligne + orjson", models_orjson),
+        ("rows_as + orjson (après)", rows_orjson),
+    ]
+
+    print(f"🚀 Encodage GET /projects - {row_count} lignes, {iterations} réponses\n")
+    print(f"   {'scénario':<34} {'ms/réponse':>10} {'pic KiB':>9} {'GC gen0/100':>12}")
+    results = {}
+    bodies = []
+    for name, encode in scenarios:
+        per_response_ms, peak_kib, gc_per_100, body = await measure(encode, rows, field, iterations)
+        results[name] = per_response_ms
+        bodies.append(body)
+        print(f"   {name:<34} {per_response_ms:10.2f} {peak_kib:9.0f} {gc_per_100:12.1f}")
+
+    assert all(json.loads(body) == json.loads(bodies[0]) for body in bodies), "Corps JSON différents"
+    before = results["modèle par ligne + json (avant)"]
+    after = results["rows_as + orjson (après)"]
+    print(f"\n   ✅ Corps identiques ({len(bodies[0]) / 1024:.0f} KiB), encodage x{before / after:.1f} plus rapide")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.iterations))
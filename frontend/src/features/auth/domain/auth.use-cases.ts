@@ -22,7 +22,7 @@ export class AuthUseCases {
       const response = await authApiRepository.login(credentials);
       
       // Store auth data
-      authStorageRepository.setToken(response.token.access_token);
+      authStorageRepository.setTokens(response.token);
       authStorageRepository.setUser(response.user);
       
       return {
@@ -49,7 +49,7 @@ export class AuthUseCases {
       const response = await authApiRepository.register(userData);
       
       // Store auth data
-      authStorageRepository.setToken(response.token.access_token);
+      authStorageRepository.setTokens(response.token);
       authStorageRepository.setUser(response.user);
       
       return {
@@ -66,6 +66,12 @@ export class AuthUseCases {
 
   // Logout use case
   async logout(): Promise<void> {
+    try {
+      // Revoke the access token and the refresh token session server-side
+      await authApiRepository.logout(authStorageRepository.getRefreshToken());
+    } catch (error) {
+      // Already expired or unreachable: local logout anyway
+    }
     authStorageRepository.clearAll();
     // Redirect will be handled by the presentation layer
   }
@@ -22,6 +22,10 @@ export class AuthApiRepository {
     return response.data;
   }
 
+  async logout(refreshToken: string | null): Promise<void> {
+    await apiClient.post('/api/v1/auth/logout', { refresh_token: refreshToken });
+  }
+
   async verifyToken(token: string): Promise<User> {
     const response = await apiClient.get<User>('/api/v1/auth/verify', {
       headers: { Authorization: `Bearer ${token}` }
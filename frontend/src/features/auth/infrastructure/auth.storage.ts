@@ -24,6 +24,31 @@ export class AuthStorageRepository {
     Cookies.remove(AUTH_CONSTANTS.STORAGE_KEYS.TOKEN);
   }
 
+  // Refresh token management (rotated on every refresh)
+  setRefreshToken(refreshToken: string): void {
+    Cookies.set(AUTH_CONSTANTS.STORAGE_KEYS.REFRESH_TOKEN, refreshToken, {
+      expires: AUTH_CONSTANTS.TOKEN.EXPIRE_DAYS,
+      secure: process.env.NODE_ENV === 'production',
+      sameSite: 'strict'
+    });
+  }
+
+  getRefreshToken(): string | null {
+    return Cookies.get(AUTH_CONSTANTS.STORAGE_KEYS.REFRESH_TOKEN) || null;
+  }
+
+  removeRefreshToken(): void {
+    Cookies.remove(AUTH_CONSTANTS.STORAGE_KEYS.REFRESH_TOKEN);
+  }
+
+  // Store the access + refresh tokens returned by login, register and refresh
+  setTokens(token: AuthToken): void {
+    this.setToken(token.access_token);
+    if (token.refresh_token) {
+      this.setRefreshToken(token.refresh_token);
+    }
+  }
+
   // User data management
   setUser(user: User): void {
     if (typeof window !== 'undefined') {
@@ -50,6 +75,7 @@ export class AuthStorageRepository {
   // Clear all auth data
   clearAll(): void {
     this.removeToken();
+    this.removeRefreshToken();
     this.removeUser();
   }
 
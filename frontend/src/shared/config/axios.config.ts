@@ -6,6 +6,34 @@ import axios from 'axios';
 import { getApiUrl } from './env.config';
 import { authStorageRepository } from '@/features/auth/infrastructure/auth.storage';
 import { AUTH_CONSTANTS } from '@/shared/constants/auth.constants';
+import type { RefreshResponse } from '@/shared/types/auth.types';
+
+const REFRESH_URL = '/api/v1/auth/refresh';
+
+// Un seul refresh en vol : le refresh token est à usage unique (rotation)
+let refreshInFlight: Promise<string | null> | null = null;
+
+const refreshAccessToken = (): Promise<string | null> => {
+  const refreshToken = authStorageRepository.getRefreshToken();
+  if (!refreshToken) {
+    return Promise.resolve(null);
+  }
+
+  if (!refreshInFlight) {
+    // axios nu : pas d'intercepteurs (un 401 ici ne doit pas relancer un refresh)
+    refreshInFlight = axios
+      .post<RefreshResponse>(REFRESH_URL, { refresh_token: refreshToken })
+      .then((response) => {
+        authStorageRepository.setTokens(response.data.token);
+        return response.data.token.access_token;
+      })
+      .catch(() => null)
+      .finally(() => {
+        refreshInFlight = null;
+      });
+  }
+  return refreshInFlight;
+};
 
 // Instance axios globale pour toute l'application
 export const apiClient = axios.create({
@@ -33,9 +61,21 @@ apiClient.interceptors.request.use(
 // Intercepteur de réponse - Gère les erreurs d'authentification
 apiClient.interceptors.response.use(
   (response) => response,
-  (error) => {
-    // Si erreur 401, nettoyer le storage SEULEMENT
+  async (error) => {
+    const original = error.config;
+
     if (error.response?.status === 401) {
+      // Access token expiré ou révoqué : un refresh puis on rejoue la requête une fois
+      if (original && !original._retry && original.url !== REFRESH_URL) {
+        original._retry = true;
+        const accessToken = await refreshAccessToken();
+        if (accessToken) {
+          original.headers.Authorization = `Bearer ${accessToken}`;
+          return apiClient(original);
+        }
+      }
+
+      // Refresh impossible : nettoyer le storage SEULEMENT
       authStorageRepository.clearAll();
       // La redirection sera gérée par AuthGuard
     }
@@ -5,6 +5,7 @@
 export const AUTH_CONSTANTS = {
   STORAGE_KEYS: {
     TOKEN: 'nokube_auth_token',
+    REFRESH_TOKEN: 'nokube_refresh_token',
     USER: 'nokube_user_data',
   },
   TOKEN: {
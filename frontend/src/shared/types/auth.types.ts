@@ -14,6 +14,8 @@ export interface User {
 export interface AuthToken {
   access_token: string;
   token_type: string;
+  expires_in?: number;
+  refresh_token?: string;
 }
 
 export interface AuthResponse {
@@ -22,6 +24,11 @@ export interface AuthResponse {
   token: AuthToken;
 }
 
+export interface RefreshResponse {
+  message: string;
+  token: AuthToken;
+}
+
 export interface AuthError {
   detail: string;
 }